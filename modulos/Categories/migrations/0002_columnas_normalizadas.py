@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:53
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def normalizar(texto):
+    # copia de `modulos.normalizacion.normalizar` al momento de la migracion
+    if not texto:
+        return ""
+
+    texto = unicodedata.normalize("NFKD", texto.strip().casefold())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def normalizar_categorias(apps, schema_editor):
+    Category = apps.get_model("Categories", "Category")
+
+    categorias = list(Category.objects.only("id", "name"))
+    for categoria in categorias:
+        # la normalizacion puede superar el largo de la columna
+        categoria.name_normalizado = normalizar(categoria.name)[:255]
+
+    Category.objects.bulk_update(categorias, ["name_normalizado"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Categories", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="name_normalizado",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=255
+            ),
+        ),
+        migrations.RunPython(normalizar_categorias, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Categories", "0002_columnas_normalizadas"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="favorite_count",
+            field=models.IntegerField(db_index=True, default=0, editable=False),
+        ),
+    ]
@@ -1,5 +1,8 @@
 from django.db import models
 
+from modulos.contadores import sin_contadores
+from modulos.normalizacion import normalizar_columnas
+
 
 class Category(models.Model):
     """
@@ -53,5 +56,25 @@ class Category(models.Model):
         verbose_name="Imagen de la categoría",
     )
 
+    # nombre normalizado (sin acentos ni mayusculas) utilizado por el buscador
+    name_normalizado = models.CharField(
+        max_length=255, blank=True, editable=False, db_index=True
+    )
+
+    COLUMNAS_NORMALIZADAS = {"name": "name_normalizado"}
+
+    # suma de los favoritos de los posts publicados y activos de la categoria, se
+    # mantiene desde `modulos.Posts.favoritos`
+    favorite_count = models.IntegerField(default=0, editable=False, db_index=True)
+
+    def save(self, *args, **kwargs):
+        kwargs["update_fields"] = sin_contadores(
+            self, ["favorite_count"], kwargs.get("update_fields")
+        )
+        kwargs["update_fields"] = normalizar_columnas(
+            self, self.COLUMNAS_NORMALIZADAS, kwargs["update_fields"]
+        )
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name  # Returns the category name for display
@@ -4,6 +4,7 @@ from django.urls import reverse
 
 from modulos.Authorization import permissions
 from modulos.Categories.models import Category
+from modulos.Posts.models import Post
 from modulos.UserProfile.management.commands.new_admin import (_credentials,
                                                                create_admin)
 
@@ -130,3 +131,29 @@ def test_category_delete_view_non_admin(client):
     url = reverse("category_delete", args=[category.pk])
     response = client.post(url)
     assert response.status_code == 403  # Acceso denegado
+
+
+@pytest.mark.django_db
+def test_category_detail_view_cursor_pagination(client):
+    category = Category.objects.create(name="Deportes")
+    for i in range(25):
+        Post.objects.create(
+            title=f"Post {i}",
+            content="Contenido",
+            category=category,
+            status=Post.PUBLISHED,
+        )
+
+    url = reverse("category_detail", args=[category.id])
+    response = client.get(url)
+    assert response.status_code == 200
+
+    primera = response.context["posts"]
+    assert len(primera) == 20
+    assert primera.has_next() and not primera.has_previous()
+
+    response = client.get(url, {"cursor": primera.next_cursor})
+    segunda = response.context["posts"]
+    assert len(segunda) == 5
+    assert not segunda.has_next() and segunda.has_previous()
+    assert not {p.id for p in primera} & {p.id for p in segunda}
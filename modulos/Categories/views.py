@@ -2,13 +2,16 @@ from django.contrib.auth.decorators import login_required
 from django.db.models.query_utils import Q
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django.views import generic
 from django.views.generic import DetailView, ListView
 
+from modulos import paginas
 from modulos.Authorization import permissions
 from modulos.Authorization.decorators import permissions_required
 from modulos.Categories.forms import CategoryCreationForm
 from modulos.Categories.models import Category
+from modulos.paginacion import paginar_keyset
 from modulos.Posts.models import Post
 from modulos.utils import new_ctx
 
@@ -33,13 +36,26 @@ class CategoryListView(ListView):
         # Cambiar a la plantilla 'categories_premium.html' si el parámetro 'premium' es true
         return ["categories_list.html"]
 
+
+def _claves_categoria(pk) -> list[str]:
+    return [f"categoria:{pk}", "categorias"]
+
+
 class CategoryDetailView(DetailView):
     model = Category
     template_name = "category_detail.html"
     context_object_name = "category"
 
+    # Responde 304 a los visitantes anonimos si la categoria no cambio
+    @method_decorator(
+        paginas.condicional(
+            lambda request, pk: paginas.validadores(_claves_categoria(pk))
+        )
+    )
     def get(self, request, *args, **kwargs):
         # Permitir acceso a categorías gratuitas sin autenticación
+        # La pagina se cachea para los visitantes anonimos
+        paginas.etiquetar(request, _claves_categoria(kwargs["pk"]))
         return super().get(request, *args, **kwargs)
 
     def get_context_data(self, **kwargs):
@@ -47,14 +63,6 @@ class CategoryDetailView(DetailView):
         context = super().get_context_data(**kwargs)
         category = self.get_object()
 
-        try:
-            page = int(request.GET.get("page", 1))
-        except ValueError:
-            page = 1
-
-        if page <= 0:
-            page = 1
-
         # Filtrar solo los posts activos, publicados y no expirados en la categoría
         posts = Post.objects.filter(
             active=True,
@@ -62,17 +70,10 @@ class CategoryDetailView(DetailView):
             category=category,
         ).filter(
             Q(expiration_date__gt=timezone.now()) | Q(expiration_date__isnull=True)
-        )[
-            20 * (page - 1) : 20 * page
-        ]
-
-        context["posts"] = posts
-
-        if len(posts) >= 20:
-            context["next_page"] = page + 1
+        ).tarjetas()
 
-        if page > 1:
-            context["previous_page"] = page - 1
+        # Paginación por cursor sobre (publication_date, id), 20 posts por página
+        context["posts"] = paginar_keyset(posts, request.GET.get("cursor"), 20)
 
         return new_ctx(self.request, context)
 
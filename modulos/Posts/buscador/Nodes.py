@@ -1,8 +1,16 @@
 from datetime import datetime
+from functools import reduce
+from operator import or_
 
 from django.db.models import Q
 
+from modulos.normalizacion import filtro_prefijo, normalizar
+from modulos.Posts.buscador import nombres
+from modulos.Posts.buscador.backends import get_backend
+from modulos.Posts.buscador.nombres import (RELACION_AUTOR, RELACION_CATEGORIA,
+                                            RELACION_TAG, RELACIONES)
 from modulos.Posts.buscador.tokenizer import *
+from modulos.Posts.models import PostTag, TerminoIndice
 
 
 class QueryBuilder:
@@ -11,6 +19,9 @@ class QueryBuilder:
         self.filters = (
             Q()
         )  # Utilizamos un objeto Q para construir los filtros dinámicamente
+        self.textos = []  # Filtros de texto completo: (campo, valor, negacion)
+        self.relaciones = []  # Filtros por nombre: (relacion, valores, negacion)
+        self.disyunciones = []  # Alternativas (QueryBuilder) de las que se cumple una
 
     def add_filter(self, **kwargs):
         # Agrega un filtro basado en los argumentos recibidos
@@ -22,9 +33,145 @@ class QueryBuilder:
         self.filters &= ~Q(**kwargs)
         return self
 
+    def add_texto(self, campo, valor, negacion=False):
+        # Agrega un filtro de texto completo, resuelto por el backend de busqueda.
+        # El valor puede ser una tupla de alternativas (se debe cumplir alguna).
+        self.textos.append((campo, valor, negacion))
+        return self
+
+    def add_relacion(self, relacion, valores, negacion=False):
+        # Agrega un filtro por el nombre de la categoria, del autor o de un tag. Se
+        # debe cumplir alguno de los valores (tupla).
+        self.relaciones.append((relacion, tuple(valores), negacion))
+        return self
+
+    def add_disyuncion(self, alternativas):
+        # Agrega una lista de QueryBuilder de los que se debe cumplir al menos uno
+        self.disyunciones.append(tuple(alternativas))
+        return self
+
+    def copia(self):
+        # Retorna un QueryBuilder equivalente que puede ser modificado sin alterar
+        # a este (las alternativas de las disyunciones se comparten)
+        qb = QueryBuilder(self.model)
+        qb.filters = self.filters
+        qb.textos = list(self.textos)
+        qb.relaciones = list(self.relaciones)
+        qb.disyunciones = list(self.disyunciones)
+        return qb
+
+    def terminos(self) -> list[str]:
+        # Palabras (normalizadas) de los filtros de texto no negados, incluyendo los
+        # de las disyunciones. Se utilizan para resaltar las coincidencias.
+        terminos = []
+        for _, valor, negacion in self.textos:
+            if not negacion:
+                for v in valor if isinstance(valor, tuple) else (valor,):
+                    terminos += normalizar(v).replace(",", " ").split()
+
+        for alternativas in self.disyunciones:
+            for alternativa in alternativas:
+                terminos += alternativa.terminos()
+
+        return list(dict.fromkeys(terminos))
+
+    def _filtro_relacion(self, relacion, valores) -> Q:
+        # Los nombres se buscan por prefijo, sin acentos ni mayusculas, y se resuelven
+        # a ids antes de ejecutar la consulta ("categoria: a | categoria: b" genera
+        # un unico IN sobre la clave foranea, sin JOIN con la tabla de categorias)
+        modelo, nombre, columna = RELACIONES[relacion]
+
+        ids = nombres.resolver(relacion, valores)
+        if ids is not None:
+            filtro = Q(**{f"{columna}__in": ids})
+        else:
+            # demasiadas coincidencias: se resuelven en una subconsulta
+            coincidencias = reduce(
+                or_, (filtro_prefijo(nombre, normalizar(v)) for v in valores)
+            )
+            filtro = Q(
+                **{f"{columna}__in": modelo.objects.filter(coincidencias).values("id")}
+            )
+
+        if relacion == RELACION_TAG:
+            # posts de la tabla intermedia, utilizando su indice (tag, post)
+            return Q(id__in=PostTag.objects.filter(filtro).values("post_id"))
+
+        return filtro
+
+    def _condicion(self, backend) -> Q:
+        # Todos los filtros del builder expresados como un unico objeto Q
+        condicion = self.filters
+
+        for relacion, valores, negacion in self.relaciones:
+            filtro = self._filtro_relacion(relacion, valores)
+            condicion &= ~filtro if negacion else filtro
+
+        for campo, valor, negacion in self.textos:
+            filtro = backend.filtro(campo, valor)
+            condicion &= ~filtro if negacion else filtro
+
+        for alternativas in self.disyunciones:
+            condicion &= reduce(or_, (a._condicion(backend) for a in alternativas))
+
+        return condicion
+
+    def _base(self, backend, relaciones=None):
+        # Queryset con todos los filtros excepto los de texto completo
+        qs = self.model.objects.filter(self.filters, active=True)
+
+        for relacion, valores, negacion in (
+            self.relaciones if relaciones is None else relaciones
+        ):
+            filtro = self._filtro_relacion(relacion, valores)
+            qs = qs.exclude(filtro) if negacion else qs.filter(filtro)
+
+        for alternativas in self.disyunciones:
+            qs = qs.filter(reduce(or_, (a._condicion(backend) for a in alternativas)))
+
+        return qs
+
     def execute(self):
-        # Ejecuta la consulta sobre el modelo
-        return self.model.objects.filter(self.filters, active=True)
+        # Ejecuta la consulta sobre el modelo. Si existen filtros de texto, los
+        # resultados se ordenan por relevancia.
+        backend = get_backend()
+        qs = self._base(backend)
+        if self.textos:
+            qs = backend.aplicar(qs, self.textos)
+        return qs
+
+    def execute_aproximado(self):
+        # Ejecuta la consulta de forma tolerante a errores de tipeo en el titulo y los
+        # tags, ordenando por similitud. Retorna None si la consulta no tiene filtros
+        # positivos (con un unico valor) sobre esos campos.
+        def aproximable(relacion, valores, negacion):
+            return relacion == RELACION_TAG and len(valores) == 1 and not negacion
+
+        # los filtros por tag se comparan con el texto de los tags de cada post
+        textos = self.textos + [
+            (TerminoIndice.CAMPO_TAGS, r[1][0], False)
+            for r in self.relaciones
+            if aproximable(*r)
+        ]
+
+        if not any(
+            campo in (TerminoIndice.CAMPO_TITULO, TerminoIndice.CAMPO_TAGS)
+            and isinstance(valor, str)
+            and not negacion
+            for campo, valor, negacion in textos
+        ):
+            return None
+
+        backend = get_backend()
+        base = self._base(backend, [r for r in self.relaciones if not aproximable(*r)])
+        return backend.aplicar_aproximado(base, textos)
+
+    def __repr__(self) -> str:
+        # Representacion deterministica, utilizada como clave de los caches
+        return (
+            f"QueryBuilder({self.filters}, {self.textos!r}, {self.relaciones!r}, "
+            f"{self.disyunciones!r})"
+        )
 
 
 # The base Node class
@@ -36,6 +183,15 @@ class Node:
     def _generate_query(self, qb: QueryBuilder):
         pass
 
+    @classmethod
+    def _generate_disyuncion(cls, qb: QueryBuilder, nodes: list["Node"]) -> bool:
+        """
+        Genera un unico filtro equivalente a la disyuncion de varios nodos de esta
+        clase (sin negacion), de modo que la base de datos pueda resolverla con un
+        indice. Retorna False si la clase no lo soporta.
+        """
+        return False
+
     def __init__(self, value: str, negation: bool = False) -> None:
         self.value = value.strip()
         self.negation = negation
@@ -48,52 +204,67 @@ class NodeCategoria(Node):
     n_type = "categoria"
 
     def _generate_query(self, qb: QueryBuilder):
-        if self.negation:
-            qb.add_exclude(category__name__icontains=self.value)
-        else:
-            qb.add_filter(category__name__icontains=self.value)
+        qb.add_relacion(RELACION_CATEGORIA, [self.value], self.negation)
+
+    @classmethod
+    def _generate_disyuncion(cls, qb, nodes):
+        qb.add_relacion(RELACION_CATEGORIA, [n.value for n in nodes])
+        return True
 
 
 class NodeTitulo(Node):
     n_type = "titulo"
 
     def _generate_query(self, qb: QueryBuilder):
-        if self.negation:
-            qb.add_exclude(title__icontains=self.value)
-        else:
-            qb.add_filter(title__icontains=self.value)
+        qb.add_texto(TerminoIndice.CAMPO_TITULO, self.value, self.negation)
+
+    @classmethod
+    def _generate_disyuncion(cls, qb, nodes):
+        qb.add_texto(TerminoIndice.CAMPO_TITULO, tuple(n.value for n in nodes))
+        return True
 
 
 class NodeContenido(Node):
     n_type = "contenido"
 
     def _generate_query(self, qb: QueryBuilder):
-        if self.negation:
-            qb.add_exclude(content__icontains=self.value)
-        else:
-            qb.add_filter(content__icontains=self.value)
+        qb.add_texto(TerminoIndice.CAMPO_CONTENIDO, self.value, self.negation)
+
+    @classmethod
+    def _generate_disyuncion(cls, qb, nodes):
+        qb.add_texto(TerminoIndice.CAMPO_CONTENIDO, tuple(n.value for n in nodes))
+        return True
 
 
 class NodeAutor(Node):
     n_type = "autor"
 
     def _generate_query(self, qb: QueryBuilder):
-        if self.negation:
-            qb.add_exclude(author__username__icontains=self.value)
-        else:
-            qb.add_filter(author__username__icontains=self.value)
+        qb.add_relacion(RELACION_AUTOR, [self.value], self.negation)
+
+    @classmethod
+    def _generate_disyuncion(cls, qb, nodes):
+        qb.add_relacion(RELACION_AUTOR, [n.value for n in nodes])
+        return True
 
 
 class NodeTags(Node):
     n_type = "tags"
 
     def _generate_query(self, qb: QueryBuilder):
-        tags = self.value.split(",")
-        for tag in tags:
-            if self.negation:
-                qb.add_exclude(tags__icontains=tag)
-            else:
-                qb.add_filter(tags__icontains=tag)
+        # "#tags: a,b" requiere ambos tags
+        for tag in self.value.split(","):
+            if tag.strip():
+                qb.add_relacion(RELACION_TAG, [tag.strip()], self.negation)
+
+    @classmethod
+    def _generate_disyuncion(cls, qb, nodes):
+        # "#tags: a,b" requiere ambos tags, por lo que no es un unico valor
+        if any("," in n.value for n in nodes):
+            return False
+
+        qb.add_relacion(RELACION_TAG, [n.value.strip() for n in nodes])
+        return True
 
 
 class NodeAfter(Node):
@@ -123,6 +294,47 @@ class NodeBefore(Node):
             return None
 
 
+class NodeOr(Node):
+    """
+    Disyuncion: se debe cumplir al menos una de las alternativas. Cada alternativa es
+    una lista de nodos que se deben cumplir a la vez.
+    """
+
+    n_type = "or"
+    alternativas: list[list[Node]]
+
+    def __init__(self, alternativas: list[list[Node]], negation: bool = False) -> None:
+        super().__init__("", negation)
+        self.alternativas = alternativas
+
+    def _generate_query(self, qb: QueryBuilder):
+        # alternativas de un solo filtro sobre el mismo campo (ej: "#tags: a | #tags:
+        # b") se combinan en un solo filtro que puede utilizar los indices
+        nodes = [a[0] for a in self.alternativas if len(a) == 1]
+        if (
+            len(nodes) == len(self.alternativas)
+            and len({type(n) for n in nodes}) == 1
+            and not any(n.negation for n in nodes)
+            and type(nodes[0])._generate_disyuncion(qb, nodes)
+        ):
+            return
+
+        alternativas = []
+        for alternativa in self.alternativas:
+            sub_qb = QueryBuilder(qb.model)
+            for n in alternativa:
+                n._generate_query(sub_qb)
+            alternativas.append(sub_qb)
+
+        qb.add_disyuncion(alternativas)
+
+    def __str__(self) -> str:
+        alternativas = " | ".join(
+            "(" + ", ".join(str(n) for n in a) + ")" for a in self.alternativas
+        )
+        return f"<or {alternativas}>"
+
+
 NODES_TABLE = {
     TOKEN_CATEGORIA: NodeCategoria,
     TOKEN_TAGS: NodeTags,
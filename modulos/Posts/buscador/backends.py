@@ -0,0 +1,438 @@
+"""
+Backends de busqueda de texto completo.
+
+Los filtros de texto del buscador (titulo, contenido y tags) se resuelven a traves de
+un backend, elegido a partir del motor configurado en `DATABASES`:
+
+- SQLite: tabla virtual FTS5, ordenada por BM25.
+- PostgreSQL: columnas `tsvector` con indices GIN (configuracion "spanish", con
+  stemming), ordenada por `ts_rank`.
+- Cualquier otro motor: el indice invertido de `modulos.Posts.buscador.indice`.
+
+Se puede forzar un backend en particular con el setting `BUSCADOR_BACKEND`
+("sqlite", "postgresql" o "indice").
+
+Cuando una busqueda no tiene resultados se puede repetir de forma aproximada
+(`aplicar_aproximado`): el titulo y los tags se comparan por similitud de trigramas,
+con `pg_trgm` en PostgreSQL y con el indice de `modulos.Posts.buscador.trigramas` en el
+resto de los motores.
+"""
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import OuterRef, Q, Subquery, Value
+from django.db.models.expressions import RawSQL
+
+from modulos.normalizacion import normalizar
+from modulos.Posts.buscador import indice, trigramas
+from modulos.Posts.models import Post, TerminoIndice
+
+# Columna del modelo Post que corresponde a cada campo de busqueda
+COLUMNAS = {
+    TerminoIndice.CAMPO_TITULO: "title",
+    TerminoIndice.CAMPO_CONTENIDO: "content",
+    TerminoIndice.CAMPO_TAGS: "tags",
+}
+
+# Columna normalizada (sin acentos ni mayusculas) que corresponde a cada campo
+COLUMNAS_NORMALIZADAS = {
+    campo: Post.COLUMNAS_NORMALIZADAS[columna] for campo, columna in COLUMNAS.items()
+}
+
+TABLA_FTS = "posts_busqueda"
+
+
+def _filtro_subcadena(campo: str, valor: str) -> Q:
+    # valores sin terminos indexables (ej: solo simbolos). Se compara con la columna
+    # normalizada, sin aplicar UPPER() sobre cada fila como `icontains`
+    return Q(**{f"{COLUMNAS_NORMALIZADAS[campo]}__contains": normalizar(valor)})
+
+
+def _alternativas(valor: str | tuple[str, ...]) -> tuple[str, ...]:
+    # el valor de un filtro de texto puede ser una tupla de alternativas
+    return valor if isinstance(valor, tuple) else (valor,)
+
+
+class BackendIndiceInvertido:
+    """
+    Backend generico basado en el indice invertido. No ordena por relevancia.
+    """
+
+    nombre = "indice"
+
+    # Mantener el indice de trigramas utilizado por la busqueda aproximada
+    usa_trigramas = True
+
+    def indexar(self, post: Post) -> None:
+        indice.indexar_post(post)
+        trigramas.indexar_post(post)
+
+    def indexar_lote(self, posts: list[Post]) -> None:
+        TerminoIndice.objects.bulk_create(
+            [
+                TerminoIndice(post_id=post.id, campo=campo, termino=termino)
+                for post in posts
+                for campo, termino in indice.terminos_de_post(post)
+            ],
+            batch_size=5000,
+        )
+        trigramas.indexar_lote(posts)
+
+    def eliminar(self, post_id: int) -> None:
+        # las entradas se eliminan en cascada junto con el post
+        pass
+
+    def reindexar(self) -> int:
+        trigramas.reindexar_todo()
+        return indice.reindexar_todo()
+
+    def _filtro_terminos(self, campo: str, alternativas: list[set[str]]) -> Q:
+        # posts que contienen todos los terminos de alguna de las alternativas
+        return Q(id__in=indice.posts_con_alguno(campo, alternativas))
+
+    def filtro(self, campo: str, valor: str | tuple[str, ...]) -> Q:
+        """
+        Retorna el filtro de texto como un objeto Q, para ser combinado con otros
+        filtros (ej: dentro de una disyuncion).
+
+        Args:
+            campo (str): Campo de busqueda.
+            valor (str | tuple): Texto buscado, o tupla de textos de los que se debe
+                encontrar alguno.
+        """
+        filtro = Q()
+        con_terminos = []
+
+        for alternativa in _alternativas(valor):
+            terminos = indice.extraer_terminos(alternativa)
+            if terminos:
+                con_terminos.append(terminos)
+            else:
+                filtro |= _filtro_subcadena(campo, alternativa)
+
+        if con_terminos:
+            filtro |= self._filtro_terminos(campo, con_terminos)
+
+        return filtro
+
+    def aplicar(self, qs, textos: list[tuple[str, str | tuple[str, ...], bool]]):
+        """
+        Aplica los filtros de texto al queryset.
+
+        Args:
+            qs (QuerySet): Queryset de posts sobre el que se aplican los filtros.
+            textos (list): Lista de tuplas (campo, valor, negacion).
+        """
+        for campo, valor, negation in textos:
+            filtro = self.filtro(campo, valor)
+            qs = qs.exclude(filtro) if negation else qs.filter(filtro)
+
+        return qs.order_by("-creation_date")
+
+    def _similitud(self, qs, aproximados: list[tuple[str, str]]):
+        """
+        Filtra los posts similares a cada texto y anota la similitud total.
+        """
+        similitud = Value(0.0)
+
+        for campo, valor in aproximados:
+            similares = trigramas.similares(campo, valor)
+            qs = qs.filter(id__in=similares.values("post"))
+            similitud += Subquery(
+                similares.filter(post=OuterRef("pk")).values("similitud")[:1]
+            )
+
+        return qs.annotate(similitud=similitud)
+
+    def aplicar_aproximado(self, qs, textos: list[tuple[str, str, bool]]):
+        """
+        Version tolerante a errores de tipeo de `aplicar`.
+
+        Los filtros positivos sobre el titulo y los tags se resuelven por similitud y
+        los resultados se ordenan de mayor a menor similitud. El resto de los filtros
+        (incluidas las disyunciones) se aplican de forma exacta.
+        """
+        aproximados, exactos = [], []
+        for campo, valor, negation in textos:
+            if campo in trigramas.CAMPOS and isinstance(valor, str) and not negation:
+                aproximados.append((campo, valor))
+            else:
+                exactos.append((campo, valor, negation))
+
+        if exactos:
+            qs = self.aplicar(qs, exactos)
+
+        return self._similitud(qs, aproximados).order_by("-similitud", "-creation_date")
+
+
+class _BackendTablaTexto(BackendIndiceInvertido):
+    """
+    Base para los backends que guardan una fila por post en la tabla `TABLA_FTS`,
+    con una columna de texto por campo de busqueda.
+    """
+
+    # SQL que vincula la tabla de busqueda con la tabla de posts
+    join = ""
+
+    def _consulta(self, terminos: set[str]) -> str:
+        raise NotImplementedError
+
+    def _condiciones(self, positivos: list[tuple[str, str]]) -> tuple[list, list]:
+        raise NotImplementedError
+
+    def _relevancia(self, positivos: list[tuple[str, str]]) -> tuple[str, list]:
+        raise NotImplementedError
+
+    def _subconsulta(self, campo: str, consulta: str) -> RawSQL:
+        raise NotImplementedError
+
+    def _unir(self, consultas: list[str]) -> str:
+        # expresion que se cumple si se cumple alguna de las consultas
+        raise NotImplementedError
+
+    def _indexar_texto(self, post: Post) -> None:
+        # guarda (o actualiza) la fila del post en la tabla de busqueda
+        raise NotImplementedError
+
+    def _indexar_texto_lote(self, posts: list[Post]) -> None:
+        for post in posts:
+            self._indexar_texto(post)
+
+    def indexar(self, post: Post) -> None:
+        self._indexar_texto(post)
+        if self.usa_trigramas:
+            trigramas.indexar_post(post)
+
+    def indexar_lote(self, posts: list[Post]) -> None:
+        self._indexar_texto_lote(posts)
+        if self.usa_trigramas:
+            trigramas.indexar_lote(posts)
+
+    def reindexar(self) -> int:
+        total = 0
+        lote = []
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {TABLA_FTS}")
+
+            columnas = ["id", *COLUMNAS.values(), *COLUMNAS_NORMALIZADAS.values()]
+            for post in Post.objects.only(*columnas).iterator():
+                lote.append(post)
+                total += 1
+                if len(lote) >= 1000:
+                    self._indexar_texto_lote(lote)
+                    lote = []
+
+            self._indexar_texto_lote(lote)
+
+            if self.usa_trigramas:
+                trigramas.reindexar_todo()
+
+        return total
+
+    def _filtro_terminos(self, campo, alternativas):
+        # una disyuncion sobre un campo es una sola consulta de texto completo
+        consulta = self._unir([self._consulta(t) for t in alternativas])
+        return Q(id__in=self._subconsulta(campo, consulta))
+
+    def aplicar(self, qs, textos):
+        positivos = []
+
+        for campo, valor, negation in textos:
+            alternativas = [indice.extraer_terminos(a) for a in _alternativas(valor)]
+            if negation or not all(alternativas):
+                filtro = self.filtro(campo, valor)
+                qs = qs.exclude(filtro) if negation else qs.filter(filtro)
+            else:
+                consulta = self._unir([self._consulta(t) for t in alternativas])
+                positivos.append((campo, consulta))
+
+        if not positivos:
+            return qs.order_by("-creation_date")
+
+        where, params = self._condiciones(positivos)
+        relevancia, relevancia_params = self._relevancia(positivos)
+
+        return qs.extra(
+            tables=[TABLA_FTS],
+            where=[self.join, *where],
+            params=params,
+            select={"relevancia": relevancia},
+            select_params=relevancia_params,
+        ).order_by("-relevancia", "-creation_date")
+
+
+class BackendSQLite(_BackendTablaTexto):
+    """
+    Backend sobre una tabla virtual FTS5 de SQLite.
+
+    SQLite no incluye un stemmer para español, por lo que los terminos se buscan por
+    prefijo ("publica" encuentra "publicacion" y "publicaciones") y el tokenizer
+    elimina los acentos.
+    """
+
+    nombre = "sqlite"
+    join = f'{TABLA_FTS}.rowid = "Posts_post"."id"'
+
+    def _indexar_texto(self, post: Post) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT titulo, contenido, tags FROM {TABLA_FTS} WHERE rowid = %s",
+                [post.id],
+            )
+            actual = cursor.fetchone()
+            nuevo = (post.title, post.content, post.tags)
+
+            # un cambio de estado no modifica el texto indexado
+            if actual == nuevo:
+                return
+
+            if actual is not None:
+                self._eliminar(cursor, post.id)
+
+            cursor.execute(
+                f"INSERT INTO {TABLA_FTS}(rowid, titulo, contenido, tags) "
+                "VALUES (%s, %s, %s, %s)",
+                [post.id, *nuevo],
+            )
+
+    def _indexar_texto_lote(self, posts: list[Post]) -> None:
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {TABLA_FTS}(rowid, titulo, contenido, tags) "
+                "VALUES (%s, %s, %s, %s)",
+                [(p.id, p.title, p.content, p.tags) for p in posts],
+            )
+
+    def eliminar(self, post_id: int) -> None:
+        with connection.cursor() as cursor:
+            self._eliminar(cursor, post_id)
+
+    def _eliminar(self, cursor, post_id: int) -> None:
+        cursor.execute(f"DELETE FROM {TABLA_FTS} WHERE rowid = %s", [post_id])
+
+    def _consulta(self, terminos):
+        return " AND ".join(f'"{t}"*' for t in sorted(terminos))
+
+    def _unir(self, consultas):
+        return " OR ".join(f"({c})" for c in consultas)
+
+    def _condiciones(self, positivos):
+        # FTS5 solo admite un MATCH por consulta, por lo que todos los filtros se
+        # combinan en una sola expresion
+        expresion = " AND ".join(f"({campo} : ({c}))" for campo, c in positivos)
+        return [f"{TABLA_FTS} MATCH %s"], [expresion]
+
+    def _relevancia(self, positivos):
+        # bm25 es menor mientras mas relevante sea el resultado. Pesos por columna:
+        # titulo, contenido, tags
+        return f"-bm25({TABLA_FTS}, 10.0, 1.0, 5.0)", []
+
+    def _subconsulta(self, campo, consulta):
+        return RawSQL(
+            f"SELECT rowid FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH %s",
+            [f"{campo} : ({consulta})"],
+        )
+
+
+class BackendPostgres(_BackendTablaTexto):
+    """
+    Backend sobre columnas `tsvector` de PostgreSQL con la configuracion "spanish".
+
+    Los `tsvector` se generan a partir de las columnas normalizadas (sin acentos),
+    al igual que los terminos buscados.
+    """
+
+    nombre = "postgresql"
+    join = f'{TABLA_FTS}.post_id = "Posts_post"."id"'
+
+    # la similitud se calcula con pg_trgm directamente sobre la tabla de posts
+    usa_trigramas = False
+
+    def _indexar_texto(self, post: Post) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {TABLA_FTS} (post_id, titulo, contenido, tags) VALUES "
+                "(%s, to_tsvector('spanish', %s), to_tsvector('spanish', %s), "
+                "to_tsvector('spanish', %s)) "
+                "ON CONFLICT (post_id) DO UPDATE SET titulo = EXCLUDED.titulo, "
+                "contenido = EXCLUDED.contenido, tags = EXCLUDED.tags",
+                [
+                    post.id,
+                    post.title_normalizado,
+                    post.content_normalizado,
+                    post.tags_normalizado,
+                ],
+            )
+
+    def eliminar(self, post_id: int) -> None:
+        # las filas se eliminan en cascada (ON DELETE CASCADE)
+        pass
+
+    def _consulta(self, terminos):
+        return " & ".join(f"{t}:*" for t in sorted(terminos))
+
+    def _unir(self, consultas):
+        return " | ".join(f"({c})" for c in consultas)
+
+    def _condiciones(self, positivos):
+        return (
+            [
+                f"{TABLA_FTS}.{campo} @@ to_tsquery('spanish', %s)"
+                for campo, _ in positivos
+            ],
+            [consulta for _, consulta in positivos],
+        )
+
+    def _relevancia(self, positivos):
+        # suma de la relevancia de cada campo filtrado, con mayor peso para el titulo
+        pesos = {
+            TerminoIndice.CAMPO_TITULO: 1.0,
+            TerminoIndice.CAMPO_TAGS: 0.5,
+            TerminoIndice.CAMPO_CONTENIDO: 0.1,
+        }
+        sql = " + ".join(
+            f"{pesos[campo]} * ts_rank({TABLA_FTS}.{campo}, to_tsquery('spanish', %s))"
+            for campo, _ in positivos
+        )
+        return sql, [consulta for _, consulta in positivos]
+
+    def _subconsulta(self, campo, consulta):
+        return RawSQL(
+            f"SELECT post_id FROM {TABLA_FTS} "
+            f"WHERE {campo} @@ to_tsquery('spanish', %s)",
+            [consulta],
+        )
+
+    def _similitud(self, qs, aproximados):
+        # el operador "<%" utiliza los indices GIN (gin_trgm_ops) de las columnas
+        # normalizadas de titulo y tags, con el umbral configurado en
+        # pg_trgm.word_similarity_threshold
+        where, params, similitud = [], [], []
+
+        for campo, valor in aproximados:
+            columna = f'"Posts_post"."{COLUMNAS_NORMALIZADAS[campo]}"'
+            where.append(f"%s <%% {columna}")
+            params.append(normalizar(valor))
+            similitud.append(f"word_similarity(%s, {columna})")
+
+        return qs.extra(
+            where=where,
+            params=params,
+            select={"similitud": " + ".join(similitud)},
+            select_params=params,
+        )
+
+
+BACKENDS = {
+    b.nombre: b for b in (BackendIndiceInvertido, BackendSQLite, BackendPostgres)
+}
+
+
+def get_backend():
+    """
+    Retorna el backend de busqueda correspondiente al motor de base de datos.
+    """
+    nombre = getattr(settings, "BUSCADOR_BACKEND", None) or connection.vendor
+    return BACKENDS.get(nombre, BackendIndiceInvertido)()
@@ -0,0 +1,100 @@
+"""
+Utilidades para medir la latencia del buscador sobre un corpus sintetico (ver
+`modulos.Posts.corpus`).
+
+Se utilizan desde el comando `python manage.py benchmark`.
+"""
+
+import math
+import statistics
+import time
+import timeit
+
+from modulos.Posts.buscador import buscador
+from modulos.Posts.buscador.legacy import LegacyLexer
+from modulos.Posts.buscador.tokenizer import Lexer
+
+CONSULTAS = [
+    "zafiro",
+    "#contenido: obsidiana turmalina",
+    "#tags: zafiro",
+    "zafiro #contenido!: turmalina",
+]
+
+# Entradas largas para el micro-benchmark del lexer. Incluyen casos adversariales:
+# muchos filtros, filtros invalidos y cadenas formadas solo por caracteres especiales.
+ENTRADAS_LEXER = {
+    "texto plano": "programacion en python " * 500,
+    "filtros validos": "#titulo: django #tags!: web, api " * 500,
+    "filtros invalidos": "# nada : texto #titulo " * 500,
+    "caracteres especiales": "#!:" * 3000,
+    "sin separador": "#" + "titulo" * 2000,
+}
+
+
+def medir(funcion, repeticiones: int = 20, preparar=None) -> dict:
+    """
+    Ejecuta `funcion` la cantidad de veces indicada y retorna la mediana y el
+    percentil 95 de su duracion, en milisegundos.
+
+    Si se indica, `preparar` se ejecuta antes de cada repeticion, fuera de la
+    medicion (por ejemplo, para vaciar el cache).
+    """
+    tiempos = []
+
+    for _ in range(repeticiones):
+        if preparar is not None:
+            preparar()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    tiempos.sort()
+    return {
+        "mediana_ms": statistics.median(tiempos),
+        "p95_ms": tiempos[math.ceil(len(tiempos) * 0.95) - 1],
+    }
+
+
+def medir_consulta(consulta: str, repeticiones: int = 20) -> dict:
+    """
+    Mide la latencia de resolver la primera pagina (10 resultados) de una busqueda.
+
+    Returns:
+        dict: Mediana y percentil 95 en milisegundos, junto con la cantidad de
+        resultados de la primera pagina.
+    """
+    resultados = []
+
+    def consultar():
+        resultados[:] = buscador.generate_query_set(consulta).execute()[:10]
+
+    return {
+        "consulta": consulta,
+        **medir(consultar, repeticiones),
+        "resultados": len(resultados),
+    }
+
+
+def medir_lexer(repeticiones: int = 20) -> list[dict]:
+    """
+    Compara el tiempo de `Lexer.tokenize` con el de la implementacion original
+    (`legacy.LegacyLexer`) sobre cada una de las `ENTRADAS_LEXER`.
+
+    Returns:
+        list[dict]: Por cada entrada, el mejor tiempo (en milisegundos) de cada
+        implementacion.
+    """
+    resultados = []
+
+    for nombre, entrada in ENTRADAS_LEXER.items():
+        tiempos = {}
+        for clave, lexer in (("actual_ms", Lexer), ("legacy_ms", LegacyLexer)):
+            mediciones = timeit.repeat(
+                lambda: lexer(entrada).tokenize(), number=1, repeat=repeticiones
+            )
+            tiempos[clave] = min(mediciones) * 1000
+
+        resultados.append({"entrada": nombre, "largo": len(entrada), **tiempos})
+
+    return resultados
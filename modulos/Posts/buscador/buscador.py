@@ -1,17 +1,73 @@
+import hashlib
+from functools import lru_cache
+
+from django.conf import settings
+
 from modulos.Posts.buscador.Nodes import QueryBuilder
 from modulos.Posts.buscador.parser import Parser
 from modulos.Posts.buscador.tokenizer import Lexer
 from modulos.Posts.models import Post
 
+# Cantidad maxima de consultas compiladas que se mantienen en memoria (por proceso)
+CACHE_CONSULTAS = getattr(settings, "BUSCADOR_CACHE_CONSULTAS", 512)
 
-def generate_query_set(input: str):
-    tokens = Lexer(input).tokenize()
+
+def normalizar_consulta(input: str) -> str:
+    """
+    Normaliza una consulta para ser utilizada como clave del cache. Los espacios
+    repetidos no modifican el resultado de una busqueda.
+    """
+    return " ".join(input.split())
+
+
+@lru_cache(maxsize=CACHE_CONSULTAS)
+def _compilar(consulta: str) -> QueryBuilder:
+    """
+    Ejecuta el pipeline Lexer -> Parser -> Q sobre una consulta ya normalizada.
+
+    El resultado se guarda en un cache LRU (seguro de compartir entre threads). Los
+    objetos Q son inmutables para el QueryBuilder (cada filtro nuevo genera un objeto
+    nuevo), por lo que se pueden reutilizar entre busquedas. El QueryBuilder guardado
+    no debe ser modificado, `generate_query_set` retorna una copia.
+    """
+    tokens = Lexer(consulta).tokenize()
     nodes = Parser(tokens).parse()
 
-    query_list = []
     qb = QueryBuilder(Post)
-
     for n in nodes:
-        query_list.append(n._generate_query(qb))
+        n._generate_query(qb)
 
     return qb
+
+
+def generate_query_set(input: str):
+    return _compilar(normalizar_consulta(input)).copia()
+
+
+def clave_consulta(input: str) -> str:
+    """
+    Retorna un identificador del arbol de filtros de una consulta. Dos consultas que
+    generan los mismos filtros comparten la misma clave.
+    """
+    qb = _compilar(normalizar_consulta(input))
+    return hashlib.sha1(repr(qb).encode()).hexdigest()
+
+
+def estadisticas_cache() -> dict:
+    """
+    Retorna los contadores del cache de consultas compiladas.
+    """
+    info = _compilar.cache_info()
+    return {
+        "aciertos": info.hits,
+        "fallos": info.misses,
+        "tamano": info.currsize,
+        "tamano_maximo": info.maxsize,
+    }
+
+
+def limpiar_cache() -> None:
+    """
+    Descarta todas las consultas compiladas.
+    """
+    _compilar.cache_clear()
@@ -0,0 +1,112 @@
+"""
+Fragmentos del contenido de los resultados de una busqueda.
+
+Para cada resultado se muestra una ventana corta del contenido alrededor de la
+primera coincidencia de los terminos buscados, con las coincidencias resaltadas
+(`<mark>`). La ventana se recorta en la base de datos (`SUBSTR` a partir de la
+posicion del termino en `content_normalizado`), por lo que las paginas de resultados
+no cargan el contenido completo de los posts.
+
+La posicion se calcula sobre la columna normalizada y se aplica sobre el contenido
+original; ambas difieren solo en caracteres que se expanden al normalizar (ej: "ß"),
+por lo que la ventana puede quedar levemente desplazada. El resaltado se realiza en
+Python sobre el fragmento, sin depender de esa posicion.
+"""
+
+import re
+
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest, StrIndex, Substr
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from modulos.normalizacion import normalizar
+
+# Caracteres del contenido mostrados antes de la primera coincidencia
+ANTES = 60
+
+# Largo maximo (en caracteres) del fragmento
+LARGO = 200
+
+ELIPSIS = "…"
+
+# Marcas de markdown que no se muestran en el fragmento (titulos, enfasis, codigo,
+# citas, tablas y la sintaxis de los enlaces e imagenes)
+_MARKDOWN = re.compile(r"[#*_`>~|]+|!?\[|\]\([^)]*\)?|\]")
+_ESPACIOS = re.compile(r"\s+")
+
+
+def anotar(qs, terminos: list[str]):
+    """
+    Agrega al queryset el fragmento del contenido (`fragmento_texto`) que comienza
+    `ANTES` caracteres antes de la primera coincidencia del primer termino presente en
+    el contenido, y su posicion (`fragmento_inicio`, desde 1). Si ningun termino esta
+    en el contenido, el fragmento es el comienzo del contenido.
+    """
+    posicion = Case(
+        *[
+            When(
+                content_normalizado__contains=t,
+                then=StrIndex("content_normalizado", Value(t)),
+            )
+            for t in terminos
+        ],
+        default=Value(1),
+        output_field=IntegerField(),
+    )
+
+    return qs.annotate(fragmento_inicio=Greatest(posicion - ANTES, Value(1))).annotate(
+        fragmento_texto=Substr("content", F("fragmento_inicio"), LARGO)
+    )
+
+
+def _texto_plano(texto: str) -> str:
+    return _ESPACIOS.sub(" ", _MARKDOWN.sub("", texto))
+
+
+def resaltar(texto: str, terminos: list[str]) -> str:
+    """
+    Escapa el texto y encierra las apariciones de los terminos (sin distinguir
+    mayusculas ni acentos) en `<mark>`.
+    """
+    terminos = sorted({t for t in terminos if t}, key=len, reverse=True)
+    if not terminos:
+        return escape(texto)
+
+    # texto normalizado caracter por caracter, junto con la posicion de cada
+    # caracter normalizado en el texto original
+    normal, origen = [], []
+    for i, c in enumerate(texto):
+        n = c if c.isspace() else normalizar(c)
+        normal.append(n)
+        origen.extend([i] * len(n))
+    normal = "".join(normal)
+
+    partes, fin = [], 0
+    for m in re.finditer("|".join(map(re.escape, terminos)), normal):
+        inicio = origen[m.start()]
+        if inicio < fin:
+            continue
+        partes.append(escape(texto[fin:inicio]))
+        fin = origen[m.end() - 1] + 1
+        partes.append(f"<mark>{escape(texto[inicio:fin])}</mark>")
+    partes.append(escape(texto[fin:]))
+
+    return "".join(partes)
+
+
+def fragmento(post, terminos: list[str]) -> str:
+    """
+    Retorna el fragmento resaltado (HTML seguro) de un post anotado con `anotar`.
+    """
+    texto = post.fragmento_texto or ""
+    recortado_final = len(texto) >= LARGO
+    texto = _texto_plano(texto).strip()
+
+    # se descartan las palabras cortadas en los extremos de la ventana
+    if post.fragmento_inicio > 1:
+        texto = ELIPSIS + " " + texto.partition(" ")[2]
+    if recortado_final:
+        texto = texto.rpartition(" ")[0] + " " + ELIPSIS
+
+    return mark_safe(resaltar(texto, terminos))
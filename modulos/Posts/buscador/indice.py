@@ -0,0 +1,157 @@
+"""
+Indice invertido del buscador.
+
+Para cada post se guardan los terminos (palabras en minuscula y sin acentos) de su
+titulo, contenido y tags dentro de la tabla `TerminoIndice`. Las busquedas de texto se
+responden intersectando las "posting lists" de los terminos buscados en lugar de
+recorrer la tabla de posts completa con `icontains`.
+
+El indice se actualiza de forma incremental cada vez que un post es guardado
+(ver `modulos.Posts.signals`).
+"""
+
+import re
+
+from django.db import transaction
+from django.db.models import Count
+
+from modulos.normalizacion import normalizar
+from modulos.Posts.models import Post, TerminoIndice
+
+# Longitud maxima de un termino (mismo valor que `TerminoIndice.termino`)
+MAX_LARGO_TERMINO = 80
+
+_PALABRA = re.compile(r"\w+")
+
+
+def extraer_terminos(texto: str | None) -> set[str]:
+    """
+    Separa un texto en el conjunto de terminos que se almacenan en el indice.
+
+    Args:
+        texto (str): Texto a separar.
+
+    Returns:
+        set[str]: Terminos normalizados (ver `modulos.normalizacion`), sin repetir.
+    """
+    return {
+        t for t in _PALABRA.findall(normalizar(texto)) if len(t) <= MAX_LARGO_TERMINO
+    }
+
+
+def terminos_de_post(post: Post) -> set[tuple[str, str]]:
+    """
+    Retorna todos los pares (campo, termino) que corresponden a un post.
+    """
+    campos = {
+        TerminoIndice.CAMPO_TITULO: post.title,
+        TerminoIndice.CAMPO_CONTENIDO: post.content,
+        TerminoIndice.CAMPO_TAGS: post.tags,
+    }
+
+    return {
+        (campo, termino)
+        for campo, texto in campos.items()
+        for termino in extraer_terminos(texto)
+    }
+
+
+def indexar_post(post: Post) -> None:
+    """
+    Actualiza las entradas del indice para un post.
+
+    Solo se insertan los terminos nuevos y se eliminan los que ya no aparecen, de esta
+    forma un cambio de estado (que no modifica el texto) no genera escrituras.
+    """
+    nuevos = terminos_de_post(post)
+
+    with transaction.atomic():
+        actuales = set(
+            TerminoIndice.objects.filter(post=post).values_list("campo", "termino")
+        )
+
+        eliminados = actuales - nuevos
+        for campo in {c for c, _ in eliminados}:
+            TerminoIndice.objects.filter(
+                post=post,
+                campo=campo,
+                termino__in=[t for c, t in eliminados if c == campo],
+            ).delete()
+
+        TerminoIndice.objects.bulk_create(
+            [
+                TerminoIndice(post=post, campo=campo, termino=termino)
+                for campo, termino in nuevos - actuales
+            ]
+        )
+
+
+def reindexar_todo(batch_size: int = 500) -> int:
+    """
+    Reconstruye el indice completo. Retorna la cantidad de posts indexados.
+    """
+    total = 0
+
+    with transaction.atomic():
+        TerminoIndice.objects.all().delete()
+
+        entradas = []
+        for post in Post.objects.only("id", "title", "content", "tags").iterator(
+            chunk_size=batch_size
+        ):
+            entradas.extend(
+                TerminoIndice(post_id=post.id, campo=campo, termino=termino)
+                for campo, termino in terminos_de_post(post)
+            )
+            total += 1
+
+            if len(entradas) >= batch_size * 20:
+                TerminoIndice.objects.bulk_create(entradas, batch_size=batch_size)
+                entradas = []
+
+        TerminoIndice.objects.bulk_create(entradas, batch_size=batch_size)
+
+    return total
+
+
+def posts_con_terminos(campo: str, terminos: set[str]):
+    """
+    Retorna un queryset con los ids de los posts que contienen TODOS los terminos
+    dentro del campo indicado (interseccion de las posting lists).
+
+    El queryset no se evalua, esta pensado para ser utilizado como subconsulta
+    (`id__in=...`).
+    """
+    return (
+        TerminoIndice.objects.filter(campo=campo, termino__in=terminos)
+        .values("post")
+        .annotate(coincidencias=Count("termino"))
+        .filter(coincidencias=len(terminos))
+        .values("post")
+    )
+
+
+def posts_con_alguno(campo: str, alternativas: list[set[str]]):
+    """
+    Retorna un queryset con los ids de los posts que contienen todos los terminos de
+    al menos una de las alternativas (union de las intersecciones).
+
+    Las alternativas de un solo termino se resuelven con un unico `IN` sobre el
+    indice, el resto se agregan a la consulta con `UNION`.
+    """
+    unicos = {t for terminos in alternativas if len(terminos) == 1 for t in terminos}
+    compuestos = [terminos for terminos in alternativas if len(terminos) > 1]
+
+    consultas = [posts_con_terminos(campo, terminos) for terminos in compuestos]
+    if unicos:
+        consultas.insert(
+            0,
+            TerminoIndice.objects.filter(campo=campo, termino__in=unicos).values(
+                "post"
+            ),
+        )
+
+    if len(consultas) == 1:
+        return consultas[0]
+
+    return consultas[0].union(*consultas[1:])
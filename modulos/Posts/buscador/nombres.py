@@ -0,0 +1,181 @@
+"""
+Resolucion de los filtros por nombre (categoria, autor y tags) a claves primarias.
+
+Antes de ejecutar una busqueda, los valores de los filtros "#categoria:", "#autor:" y
+"#tags:" se convierten en los ids de las categorias, usuarios y tags cuyo nombre
+normalizado comienza con el valor buscado. La consulta sobre los posts queda como
+`category_id IN (...)` / `author_id IN (...)`, sin JOIN con esas tablas, y los tags
+como una subconsulta sobre el indice (tag, post) de la tabla intermedia.
+
+Las categorias y los tags se resuelven sobre un mapa nombre -> id en memoria (un
+arreglo ordenado con busqueda binaria por prefijo). Cada proceso mantiene su propio
+mapa y lo reconstruye cuando cambia la version guardada en el cache compartido (ver
+`modulos.cache_compartido`), que se reemplaza por una nueva y unica cada vez que se
+crea, renombra o elimina una categoria o un tag (ver `modulos.Posts.signals` y
+`modulos.Posts.etiquetas`), o cuando pasan `NOMBRES_TIEMPO` segundos desde su carga.
+
+Los usuarios pueden ser muchos mas, por lo que no se cargan en memoria: los autores se
+resuelven con una consulta por prefijo sobre el indice de `username_normalizado`.
+"""
+
+import bisect
+import threading
+import time
+import uuid
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.cache import cache
+
+from modulos.Categories.models import Category
+from modulos.normalizacion import filtro_prefijo, normalizar
+from modulos.Posts.models import Tag
+from modulos.UserProfile.models import UserProfile
+
+CLAVE_VERSION = "buscador:nombres:{relacion}:version"
+
+RELACION_CATEGORIA = "categoria"
+RELACION_AUTOR = "autor"
+RELACION_TAG = "tags"
+
+# Relaciones filtradas por nombre: (modelo, nombre normalizado, columna del post).
+# La columna de los tags pertenece a la tabla intermedia `PostTag`.
+RELACIONES = {
+    RELACION_CATEGORIA: (Category, "name_normalizado", "category_id"),
+    RELACION_AUTOR: (UserProfile, "username_normalizado", "author_id"),
+    RELACION_TAG: (Tag, "name_normalizado", "tag_id"),
+}
+
+# Cantidad maxima de ids de una resolucion. Prefijos muy cortos (ej: "#autor: a")
+# pueden coincidir con demasiados nombres, en ese caso se utiliza una subconsulta.
+MAX_IDS = getattr(settings, "BUSCADOR_MAX_IDS_RESOLUCION", 500)
+
+# Tiempo (en segundos) luego del cual un mapa se recarga aunque su version no cambie.
+# Acota la antiguedad de un mapa si se pierde una invalidacion (ej: por una falla del
+# cache)
+NOMBRES_TIEMPO = getattr(settings, "BUSCADOR_NOMBRES_TIEMPO", 60 * 5)
+
+
+def version(relacion: str) -> str:
+    """
+    Retorna la version actual de los nombres de una relacion (categorias o tags).
+    Si la version fue expulsada del cache, la nueva no coincide con ninguna anterior.
+    """
+    clave = CLAVE_VERSION.format(relacion=relacion)
+    actual = cache.get(clave)
+    if actual is None:
+        cache.add(clave, uuid.uuid4().hex, timeout=None)
+        actual = cache.get(clave)
+    return actual
+
+
+def invalidar(relacion: str) -> None:
+    """
+    Obliga a todos los procesos a reconstruir su mapa de nombres de una relacion,
+    escribiendo una version nueva (una sola escritura, sin `cache.incr`).
+    """
+    cache.set(CLAVE_VERSION.format(relacion=relacion), uuid.uuid4().hex, timeout=None)
+
+
+class MapaNombres:
+    """
+    Mapa ordenado de nombres normalizados a ids de una relacion.
+    """
+
+    def __init__(self, relacion: str) -> None:
+        self.relacion = relacion
+        self.modelo, self.columna, _ = RELACIONES[relacion]
+        self.version = None
+        self.cargado = 0.0
+        self._claves: list[str] = []
+        self._ids: list[int] = []
+        self._lock = threading.Lock()
+
+    def cargar(self, version=None) -> None:
+        entradas = sorted(self.modelo.objects.values_list(self.columna, "id"))
+
+        # las listas se reemplazan (no se modifican), por lo que una resolucion en
+        # curso en otro thread no se ve afectada
+        self._claves = [nombre for nombre, _ in entradas]
+        self._ids = [id for _, id in entradas]
+        self.version = version
+        self.cargado = time.monotonic()
+
+    def resolver(self, prefijos: list[str]) -> list[int] | None:
+        """
+        Retorna los ids ordenados de los nombres que comienzan con alguno de los
+        prefijos, o None si superan `MAX_IDS`.
+        """
+        claves, ids = self._claves, self._ids
+        encontrados = set()
+
+        for prefijo in prefijos:
+            i = bisect.bisect_left(claves, prefijo)
+            while i < len(claves) and claves[i].startswith(prefijo):
+                encontrados.add(ids[i])
+                if len(encontrados) > MAX_IDS:
+                    return None
+                i += 1
+
+        return sorted(encontrados)
+
+    def _vigente(self, actual) -> bool:
+        return (
+            self.version == actual and time.monotonic() - self.cargado <= NOMBRES_TIEMPO
+        )
+
+    def actualizar(self) -> None:
+        """
+        Recarga el mapa si la version del cache cambio o si expiro.
+        """
+        actual = version(self.relacion)
+        if self._vigente(actual):
+            return
+
+        with self._lock:
+            if not self._vigente(actual):
+                self.cargar(actual)
+
+
+_mapas = {
+    relacion: MapaNombres(relacion) for relacion in (RELACION_CATEGORIA, RELACION_TAG)
+}
+
+
+def _resolver_consulta(relacion: str, prefijos: list[str]) -> list[int] | None:
+    # resolucion sin mapa en memoria: una consulta por prefijo sobre el indice de la
+    # columna normalizada
+    modelo, columna, _ = RELACIONES[relacion]
+    if not prefijos:
+        return []
+
+    ids = list(
+        modelo.objects.filter(
+            reduce(or_, (filtro_prefijo(columna, p) for p in prefijos))
+        )
+        .order_by("id")
+        .values_list("id", flat=True)[: MAX_IDS + 1]
+    )
+    return None if len(ids) > MAX_IDS else ids
+
+
+def resolver(relacion: str, valores) -> list[int] | None:
+    """
+    Convierte los valores de un filtro por nombre en los ids que lo satisfacen.
+
+    Args:
+        relacion (str): `RELACION_CATEGORIA`, `RELACION_AUTOR` o `RELACION_TAG`.
+        valores (iterable): Nombres (o prefijos) buscados, se debe cumplir alguno.
+
+    Returns:
+        list[int] | None: Ids ordenados, o None si son demasiados (ver `MAX_IDS`).
+    """
+    prefijos = [normalizar(v) for v in valores]
+
+    mapa = _mapas.get(relacion)
+    if mapa is None:
+        return _resolver_consulta(relacion, prefijos)
+
+    mapa.actualizar()
+    return mapa.resolver(prefijos)
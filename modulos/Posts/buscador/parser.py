@@ -1,58 +1,131 @@
-from modulos.Posts.buscador.Nodes import (NODES_TABLE, Node, NodeTitulo,
-                                          QueryBuilder)
-from modulos.Posts.buscador.tokenizer import TOKEN_NEGACION, TOKEN_TEXT, Token
+from modulos.Posts.buscador.Nodes import (NODES_TABLE, Node, NodeOr,
+                                          NodeTitulo, QueryBuilder)
+from modulos.Posts.buscador.tokenizer import (TOKEN_ABRE_GRUPO,
+                                              TOKEN_CIERRA_GRUPO,
+                                              TOKEN_NEGACION, TOKEN_OR,
+                                              TOKEN_TEXT, Token)
 from modulos.Posts.models import Post
 
 
 class Parser(object):
+    """
+    Genera el arbol de nodos de una consulta a partir de sus tokens.
+
+    Gramatica (los filtros consecutivos se combinan con AND):
+
+        disyuncion := conjuncion ("|" conjuncion)*
+        conjuncion := (grupo | filtro | texto)*
+        grupo      := "(" disyuncion ")"
+        filtro     := palabra_clave ["!"] [texto]
+
+    Un texto que no es el valor de un filtro genera un nodo titulo. Los filtros sin
+    valor y los parentesis sin cerrar (o sin abrir) se ignoran.
+    """
+
     tokens: list[Token]
     qb: QueryBuilder
 
     curr_position = -1
     next_position = 0
-    curr_token: Token
+    curr_token: Token | None
 
     ast: list[Node]
 
     def __init__(self, tokens: list[Token]) -> None:
         self.tokens = tokens
+        self.curr_token = None
         self._advance_parser()
         self.ast = []
 
-    def parse(self):
+    def parse(self) -> list[Node]:
+        """
+        Return:
+            La lista de nodos que deben cumplirse a la vez. Las disyunciones se
+            representan con un nodo `NodeOr`.
+        """
         if len(self.tokens) == 0:
             return self.ast
 
-        # cuando el primero token es un texto, entonces debemos generar un nodo titulo
-        if self.curr_token.t_type == TOKEN_TEXT:
-            self.ast.append(NodeTitulo(self.curr_token.t_value))
+        self.ast = self._disyuncion()
+
+        # un ")" sin su "(" correspondiente se ignora
+        while self.curr_token is not None:
             self._advance_parser()
+            self.ast += self._disyuncion()
+
+        return self.ast
 
-        # ahora el resto de tokens
-        while self.curr_position < len(self.tokens):
-            node_type = NODES_TABLE[self.curr_token.t_type]
-            negacion = False
+    # ----------------
+    # - Producciones -
+    # ----------------
 
-            # si el siguiente token es una negacion entonces avanzar
-            next_token = self._pick_token()
-            if next_token != None and next_token.t_type == TOKEN_NEGACION:
-                self._advance_parser()
-                negacion = True
+    def _disyuncion(self) -> list[Node]:
+        alternativas = []
 
-            # extraemos el valor del token que precede a un filtro
+        while True:
+            conjuncion = self._conjuncion()
+
+            # "a | (b | c)" es equivalente a "a | b | c"
+            if len(conjuncion) == 1 and isinstance(conjuncion[0], NodeOr):
+                alternativas.extend(conjuncion[0].alternativas)
+            elif conjuncion:
+                alternativas.append(conjuncion)
+
+            if not self._es(TOKEN_OR):
+                break
             self._advance_parser()
-            if self.curr_token != None and self.curr_token.t_type == TOKEN_TEXT:
-                node = node_type(self.curr_token.t_value, negacion)
-                self.ast.append(node)
 
+        if len(alternativas) == 0:
+            return []
+
+        if len(alternativas) == 1:
+            return alternativas[0]
+
+        return [NodeOr(alternativas)]
+
+    def _conjuncion(self) -> list[Node]:
+        nodes = []
+
+        while self.curr_token is not None and not (
+            self._es(TOKEN_OR) or self._es(TOKEN_CIERRA_GRUPO)
+        ):
+            token = self.curr_token
             self._advance_parser()
 
-        return self.ast
+            if token.t_type == TOKEN_ABRE_GRUPO:
+                nodes += self._disyuncion()
+                if self._es(TOKEN_CIERRA_GRUPO):
+                    self._advance_parser()
+
+            # un texto que no es el valor de un filtro se busca en el titulo
+            elif token.t_type == TOKEN_TEXT:
+                if token.t_value.strip():
+                    nodes.append(NodeTitulo(token.t_value))
+
+            elif token.t_type in NODES_TABLE:
+                node_type = NODES_TABLE[token.t_type]
+
+                negacion = self._es(TOKEN_NEGACION)
+                if negacion:
+                    self._advance_parser()
+
+                # extraemos el valor del token que precede a un filtro
+                if self._es(TOKEN_TEXT):
+                    nodes.append(node_type(self.curr_token.t_value, negacion))
+                    self._advance_parser()
+
+        return nodes
 
     # -------------
     # - Utilities -
     # -------------
 
+    def _es(self, t_type: str) -> bool:
+        """
+        Indica si el token actual es del tipo indicado.
+        """
+        return self.curr_token is not None and self.curr_token.t_type == t_type
+
     def _pick_token(self) -> Token | None:
         """
         Devuelve los siguientes "n" tokens dentro de la lista de tokens proveidas
@@ -71,6 +144,7 @@ class Parser(object):
         self.next_position += 1
 
         if self.curr_position >= len(self.tokens):
+            self.curr_token = None
             return
 
         self.curr_token = self.tokens[self.curr_position]
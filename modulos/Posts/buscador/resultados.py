@@ -0,0 +1,127 @@
+"""
+Cache de resultados del buscador.
+
+Para cada consulta se guarda (en el cache volatil, ver
+`modulos.cache_compartido.volatil`) la lista ordenada de ids de los posts que la
+satisfacen. Cambiar de pagina solo requiere obtener los posts de la pagina por clave
+primaria, sin volver a ejecutar la busqueda ni un `COUNT`.
+
+Las entradas se invalidan escribiendo una generacion nueva y unica cada vez que un
+post es publicado, editado, inactivado, expirado o eliminado (ver
+`modulos.Posts.signals`). La generacion forma parte de la clave, por lo que las
+entradas anteriores simplemente dejan de ser utilizadas hasta que expiran; si la
+generacion es expulsada del cache, la nueva tampoco coincide con ninguna anterior.
+La generacion debe estar en un cache compartido por todos los procesos (ver
+`modulos.cache_compartido`).
+
+Se guardan como maximo `MAX_RESULTADOS` ids por consulta; las paginas de una lista
+truncada lo indican (`truncado`) para que el usuario refine la busqueda.
+"""
+
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from modulos.cache_compartido import volatil
+from modulos.paginacion import CursorPage, paginar_lista
+from modulos.Posts.buscador import buscador, fragmentos
+from modulos.Posts.models import Post
+
+CLAVE_GENERACION = "buscador:generacion"
+
+# Tiempo de vida (en segundos) de una lista de resultados
+TIEMPO_RESULTADOS = getattr(settings, "BUSCADOR_TIEMPO_RESULTADOS", 60 * 10)
+
+# Cantidad maxima de resultados que se guardan por consulta
+MAX_RESULTADOS = getattr(settings, "BUSCADOR_MAX_RESULTADOS", 1000)
+
+
+def generacion() -> str:
+    """
+    Retorna la generacion actual de los resultados de busqueda.
+    """
+    actual = cache.get(CLAVE_GENERACION)
+    if actual is None:
+        cache.add(CLAVE_GENERACION, uuid.uuid4().hex, timeout=None)
+        actual = cache.get(CLAVE_GENERACION)
+    return actual
+
+
+def invalidar() -> None:
+    """
+    Invalida todos los resultados guardados escribiendo una generacion nueva (una
+    sola escritura, sin `cache.incr`).
+    """
+    cache.set(CLAVE_GENERACION, uuid.uuid4().hex, timeout=None)
+
+
+def _primeros_ids(qs) -> tuple[list[int], bool]:
+    # se obtiene un id de mas para saber si la lista se trunca
+    ids = list(qs.values_list("id", flat=True)[: MAX_RESULTADOS + 1])
+    return ids[:MAX_RESULTADOS], len(ids) > MAX_RESULTADOS
+
+
+def _resultados(input: str) -> tuple[list[int], bool, bool]:
+    clave = f"buscador:resultados:{generacion()}:{buscador.clave_consulta(input)}"
+
+    guardado = volatil().get(clave)
+    if guardado is None:
+        qb = buscador.generate_query_set(input)
+        ids, truncado = _primeros_ids(qb.execute())
+        aproximado = False
+
+        if not ids:
+            qs = qb.execute_aproximado()
+            if qs is not None:
+                ids, truncado = _primeros_ids(qs)
+                aproximado = bool(ids)
+
+        guardado = (ids, aproximado, truncado)
+        volatil().set(clave, guardado, TIEMPO_RESULTADOS)
+
+    return guardado
+
+
+def ids_resultados(input: str) -> tuple[list[int], bool]:
+    """
+    Retorna la lista ordenada de ids de los posts que satisfacen la consulta (como
+    maximo `MAX_RESULTADOS`).
+
+    Si la busqueda exacta no tiene resultados se realiza una busqueda aproximada
+    (tolerante a errores de tipeo). El segundo valor retornado indica si los
+    resultados son aproximados.
+    """
+    ids, aproximado, _ = _resultados(input)
+    return ids, aproximado
+
+
+def paginar(input: str, cursor: str | None, per_page: int = 10) -> CursorPage:
+    """
+    Retorna la pagina indicada por el cursor de los resultados de la consulta.
+
+    La pagina contiene los posts en el mismo orden que los resultados de la busqueda.
+    El atributo `aproximado` indica si se trata de resultados aproximados, y
+    `truncado` si existen mas de `MAX_RESULTADOS` resultados (solo se recorren los
+    primeros, ver `limite`). El
+    contenido de los posts no se carga, cada post tiene en `fragmento` una ventana
+    del contenido con las coincidencias resaltadas (ver `fragmentos`).
+    """
+    ids, aproximado, truncado = _resultados(input)
+    pagina = paginar_lista(ids, cursor, per_page)
+    pagina.aproximado = aproximado
+    pagina.truncado = truncado
+    pagina.limite = MAX_RESULTADOS
+
+    ids = pagina.object_list
+    terminos = buscador.generate_query_set(input).terminos()
+    posts = fragmentos.anotar(
+        Post.objects.tarjetas(),
+        terminos,
+    ).in_bulk(ids)
+    pagina.object_list = [posts[id] for id in ids if id in posts]
+
+    for post in pagina.object_list:
+        post.fragmento = fragmentos.fragmento(post, terminos)
+
+    return pagina
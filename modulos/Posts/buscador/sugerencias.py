@@ -0,0 +1,249 @@
+"""
+Sugerencias de busqueda (autocompletado) para el buscador.
+
+Las sugerencias se responden desde un indice de prefijos en memoria: un arreglo
+ordenado de entradas `(clave, valor, id)` por cada tipo de sugerencia, sobre el que se
+realiza una busqueda binaria. La clave es el texto normalizado (minusculas y sin
+acentos), por lo que "prog" sugiere tanto "Programación" como "programas".
+
+Cada proceso mantiene su propio indice. Se construye la primera vez que se utiliza,
+se actualiza de forma incremental cada vez que un post es publicado (ver
+`modulos.Posts.signals`) y se reconstruye por completo cada `SUGERENCIAS_TIEMPO`
+segundos, lo que descarta los posts inactivados, vencidos o eliminados. Las
+reconstrucciones periodicas se realizan en un thread en segundo plano: mientras tanto
+las consultas se responden con el indice anterior.
+"""
+
+import bisect
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+
+from modulos.Categories.models import Category
+from modulos.normalizacion import normalizar
+from modulos.Posts.models import Post
+
+TIPO_TITULO = "titulos"
+TIPO_TAG = "tags"
+TIPO_CATEGORIA = "categorias"
+TIPO_AUTOR = "autores"
+
+TIPOS = (TIPO_TITULO, TIPO_TAG, TIPO_CATEGORIA, TIPO_AUTOR)
+
+# Tiempo (en segundos) luego del cual el indice se reconstruye por completo
+SUGERENCIAS_TIEMPO = getattr(settings, "BUSCADOR_SUGERENCIAS_TIEMPO", 60 * 10)
+
+# Cantidad maxima de entradas de cada tipo que se revisan por consulta
+MAX_ENTRADAS_REVISADAS = 500
+
+
+def _vigente(post: Post) -> bool:
+    return post.expiration_date is None or post.expiration_date > timezone.now()
+
+
+def _entradas_de_post(post: Post) -> list[tuple]:
+    entradas = [(TIPO_TITULO, post.title, post.id)]
+    entradas.extend((TIPO_TAG, tag.strip(), None) for tag in post.tags.split(","))
+
+    if post.category_id is not None:
+        entradas.append((TIPO_CATEGORIA, post.category.name, None))
+    if post.author_id is not None:
+        entradas.append((TIPO_AUTOR, post.author.username, None))
+
+    return [(t, normalizar(v), v, id) for t, v, id in entradas if v and v.strip()]
+
+
+def _iniciar_hilo(funcion) -> None:
+    threading.Thread(target=funcion, daemon=True).start()
+
+
+class IndicePrefijos:
+    """
+    Indice de prefijos basado en un arreglo ordenado por tipo de sugerencia.
+
+    Las lecturas no toman el lock: las reconstrucciones reemplazan los arreglos
+    completos y las inserciones se realizan sobre una copia, de forma que un thread
+    nunca observa un arreglo a medio modificar. Las inserciones realizadas durante una
+    reconstruccion se guardan como pendientes y se agregan al indice reconstruido.
+    """
+
+    def __init__(self) -> None:
+        self._entradas: dict[str, list[tuple]] = {tipo: [] for tipo in TIPOS}
+        self._claves: set[tuple] = set()
+        self._pendientes: list[tuple] | None = None
+        self._lock = threading.Lock()
+        self._reconstruccion = threading.Lock()
+        self.construido = 0.0
+
+    def __len__(self) -> int:
+        return sum(len(entradas) for entradas in self._entradas.values())
+
+    def reconstruir(self) -> None:
+        """
+        Construye el indice a partir de los posts publicados y vigentes y las
+        categorias activas.
+        """
+        with self._reconstruccion:
+            self._reconstruir()
+
+    def reconstruir_en_segundo_plano(self) -> bool:
+        """
+        Inicia la reconstruccion del indice en un thread, salvo que ya haya una en
+        curso.
+
+        Returns:
+            bool: True si se inicio la reconstruccion.
+        """
+        if not self._reconstruccion.acquire(blocking=False):
+            return False
+
+        def reconstruir():
+            try:
+                self._reconstruir()
+            finally:
+                self._reconstruccion.release()
+                # el thread no es atendido por el ciclo de requests de Django
+                connections.close_all()
+
+        try:
+            _iniciar_hilo(reconstruir)
+        except BaseException:
+            self._reconstruccion.release()
+            raise
+        return True
+
+    def _reconstruir(self) -> None:
+        with self._lock:
+            self._pendientes = []
+
+        entradas = set()
+        try:
+            posts = (
+                Post.objects.filter(
+                    Q(expiration_date__isnull=True)
+                    | Q(expiration_date__gt=timezone.now()),
+                    status=Post.PUBLISHED,
+                    active=True,
+                )
+                .select_related("category", "author")
+                .only(
+                    "id",
+                    "title",
+                    "tags",
+                    "expiration_date",
+                    "category__name",
+                    "author__username",
+                )
+            )
+            for post in posts.iterator(chunk_size=2000):
+                entradas.update(_entradas_de_post(post))
+
+            for nombre in Category.objects.filter(status=Category.ACTIVO).values_list(
+                "name", flat=True
+            ):
+                entradas.add((TIPO_CATEGORIA, normalizar(nombre), nombre, None))
+        except BaseException:
+            with self._lock:
+                self._pendientes = None
+            raise
+
+        with self._lock:
+            entradas.update(self._pendientes)
+            por_tipo = {tipo: [] for tipo in TIPOS}
+            for tipo, clave, valor, id in entradas:
+                por_tipo[tipo].append((clave, valor, id))
+
+            self._entradas = {tipo: sorted(lista) for tipo, lista in por_tipo.items()}
+            self._claves = entradas
+            self._pendientes = None
+            self.construido = time.monotonic()
+
+    def agregar_post(self, post: Post) -> None:
+        """
+        Agrega las entradas de un post (recien publicado) al indice.
+        """
+        with self._lock:
+            entradas_post = _entradas_de_post(post)
+            if self._pendientes is not None:
+                self._pendientes.extend(entradas_post)
+
+            nuevas = [e for e in entradas_post if e not in self._claves]
+            if not nuevas:
+                return
+
+            entradas = dict(self._entradas)
+            for tipo in {e[0] for e in nuevas}:
+                entradas[tipo] = list(entradas[tipo])
+
+            for tipo, clave, valor, id in nuevas:
+                bisect.insort(entradas[tipo], (clave, valor, id))
+                self._claves.add((tipo, clave, valor, id))
+
+            self._entradas = entradas
+
+    def sugerir(self, prefijo: str, limite: int = 5) -> dict[str, list]:
+        """
+        Retorna hasta `limite` sugerencias de cada tipo para un prefijo.
+
+        Returns:
+            dict: Un listado por tipo. Los titulos incluyen el id del post.
+        """
+        resultado = {tipo: [] for tipo in TIPOS}
+
+        prefijo = normalizar(prefijo)
+        if not prefijo:
+            return resultado
+
+        for tipo, entradas in self._entradas.items():
+            inicio = bisect.bisect_left(entradas, (prefijo,))
+            fin = min(inicio + MAX_ENTRADAS_REVISADAS, len(entradas))
+            vistos = set()
+
+            for clave, valor, id in entradas[inicio:fin]:
+                if not clave.startswith(prefijo) or len(resultado[tipo]) >= limite:
+                    break
+
+                if clave in vistos:
+                    continue
+                vistos.add(clave)
+
+                if tipo == TIPO_TITULO:
+                    resultado[tipo].append({"valor": valor, "id": id})
+                else:
+                    resultado[tipo].append({"valor": valor})
+
+        return resultado
+
+
+_indice = IndicePrefijos()
+
+
+def get_indice() -> IndicePrefijos:
+    """
+    Retorna el indice de sugerencias del proceso.
+
+    La primera construccion se realiza en el momento. Cuando el indice esta
+    desactualizado se inicia su reconstruccion en segundo plano y se retorna el
+    indice anterior.
+    """
+    if not _indice.construido:
+        with _indice._reconstruccion:
+            if not _indice.construido:
+                _indice._reconstruir()
+    elif time.monotonic() - _indice.construido > SUGERENCIAS_TIEMPO:
+        _indice.reconstruir_en_segundo_plano()
+
+    return _indice
+
+
+def post_publicado(post: Post) -> None:
+    """
+    Actualiza el indice luego de la publicacion de un post. Si el indice aun no fue
+    construido no se realiza ninguna accion (se construira en el primer uso).
+    """
+    if _indice.construido and _vigente(post):
+        _indice.agregar_post(post)
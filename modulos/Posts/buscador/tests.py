@@ -1,16 +1,28 @@
+import random
+from datetime import timedelta
+
 import pytest
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
 
 from modulos.Categories.models import Category
-from modulos.Posts.buscador import buscador
-from modulos.Posts.buscador.Nodes import (Node, NodeCategoria, NodeTags,
-                                          NodeTitulo, QueryBuilder)
+from modulos.normalizacion import normalizar
+from modulos.Posts.buscador import (backends, buscador, fragmentos, indice,
+                                    nombres, resultados, sugerencias,
+                                    trigramas)
+from modulos.Posts.buscador.legacy import LegacyLexer
+from modulos.Posts.buscador.Nodes import (Node, NodeCategoria, NodeOr,
+                                          NodeTags, NodeTitulo, QueryBuilder)
 from modulos.Posts.buscador.parser import Parser
-from modulos.Posts.buscador.tokenizer import (TOKEN_BEFORE, TOKEN_CATEGORIA,
-                                              TOKEN_FILTER, TOKEN_NEGACION,
-                                              TOKEN_SEPARATOR, TOKEN_TAGS,
-                                              TOKEN_TEXT, TOKEN_TITULO, Lexer,
-                                              Token)
-from modulos.Posts.models import Post
+from modulos.Posts.buscador.tokenizer import (CARACTERES_ESPECIALES,
+                                              PALABRAS_CLAVE, TOKEN_BEFORE,
+                                              TOKEN_CATEGORIA, TOKEN_FILTER,
+                                              TOKEN_NEGACION, TOKEN_SEPARATOR,
+                                              TOKEN_TAGS, TOKEN_TEXT,
+                                              TOKEN_TITULO, Lexer, Token,
+                                              resolve_type)
+from modulos.Posts.models import Post, TerminoIndice
 from modulos.UserProfile.models import UserProfile
 
 # ------------------------
@@ -18,250 +30,127 @@ from modulos.UserProfile.models import UserProfile
 # ------------------------
 
 
+def _tokens(input_text):
+    return [(t.t_type, t.t_value) for t in Lexer(input_text).tokenize()]
+
+
 def test_raw_token_generation():
-    # Define los casos de prueba
+    # casos de la generacion de tokens del lexer original (de tres pasadas): el lexer
+    # actual no tiene etapas intermedias, se verifican los tokens finales
     test_cases = [
-        (
-            " titulo vacio",
-            [Token(TOKEN_TEXT, " titulo vacio")],
-        ),
+        (" titulo vacio", [(TOKEN_TEXT, " titulo vacio")]),
         (
             "#categoria:#titulo:",
-            [
-                Token(TOKEN_FILTER, "#"),
-                Token(TOKEN_CATEGORIA, "categoria"),
-                Token(TOKEN_SEPARATOR, ":"),
-                Token(TOKEN_FILTER, "#"),
-                Token(TOKEN_TITULO, "titulo"),
-                Token(TOKEN_SEPARATOR, ":"),
-            ],
+            [(TOKEN_CATEGORIA, "categoria"), (TOKEN_TITULO, "titulo")],
         ),
         (
             "titulo # categoria  : nada",
             [
-                Token(TOKEN_TITULO, "titulo "),
-                Token(TOKEN_FILTER, "#"),
-                Token(TOKEN_CATEGORIA, " categoria  "),
-                Token(TOKEN_SEPARATOR, ":"),
-                Token(TOKEN_TEXT, " nada"),
+                (TOKEN_TEXT, "titulo "),
+                (TOKEN_CATEGORIA, " categoria  "),
+                (TOKEN_TEXT, " nada"),
             ],
         ),
         (
             "Golang #tags: 1,2,3",
-            [
-                Token(TOKEN_TEXT, "Golang "),
-                Token(TOKEN_FILTER, "#"),
-                Token(TOKEN_TAGS, "tags"),
-                Token(TOKEN_SEPARATOR, ":"),
-                Token(TOKEN_TEXT, " 1,2,3"),
-            ],
+            [(TOKEN_TEXT, "Golang "), (TOKEN_TAGS, "tags"), (TOKEN_TEXT, " 1,2,3")],
         ),
         (
             "#titulo: nuevo #tags: 1,2,3 #before: 12/12/12",
             [
-                Token(TOKEN_FILTER, "#"),
-                Token(TOKEN_TITULO, "titulo"),
-                Token(TOKEN_SEPARATOR, ":"),
-                Token(TOKEN_TEXT, " nuevo "),
-                Token(TOKEN_FILTER, "#"),
-                Token(TOKEN_TAGS, "tags"),
-                Token(TOKEN_SEPARATOR, ":"),
-                Token(TOKEN_TEXT, " 1,2,3 "),
-                Token(TOKEN_FILTER, "#"),
-                Token(TOKEN_BEFORE, "before"),
-                Token(TOKEN_SEPARATOR, ":"),
-                Token(TOKEN_TEXT, " 12/12/12"),
+                (TOKEN_TITULO, "titulo"),
+                (TOKEN_TEXT, " nuevo "),
+                (TOKEN_TAGS, "tags"),
+                (TOKEN_TEXT, " 1,2,3 "),
+                (TOKEN_BEFORE, "before"),
+                (TOKEN_TEXT, " 12/12/12"),
             ],
         ),
         (
             "#titulo!: nuevo",
-            [
-                Token(TOKEN_FILTER, "#"),
-                Token(TOKEN_TITULO, "titulo"),
-                Token(TOKEN_NEGACION, "!"),
-                Token(TOKEN_SEPARATOR, ":"),
-                Token(TOKEN_TEXT, " nuevo"),
-            ],
+            [(TOKEN_TITULO, "titulo"), (TOKEN_NEGACION, "!"), (TOKEN_TEXT, " nuevo")],
         ),
     ]
 
-    # Recorre cada caso de prueba
-    count = 0
     for input_text, expected_tokens in test_cases:
-        lexer = Lexer(input_text)
-        lexer._generate_raw_tokens()
-
-        result = lexer.tokens
-
-        # Verifica que el número de tokens coincida
-        if len(result) != len(expected_tokens):
-            for t in result:
-                print(t)
-            assert f"TC: {count} \tExpected {len(expected_tokens)} tokens, but got {len(result)}."
-
-        # Verifica que cada token coincida con el esperado
-        for i in range(len(result)):
-            if result[i].t_type != expected_tokens[i].t_type:
-                print(f"\nExpected token {i}: \n{expected_tokens[i]}\n")
-                print(f"Got: \n{result[i]}\n")
-
-                assert (
-                    False
-                ), f"TC: {count} \tExpected token type {expected_tokens[i].t_type}, but got {result[i].t_type}."
-
-            if result[i].t_value != expected_tokens[i].t_value:
-                print(f"\nExpected token {i}: \n{expected_tokens[i]}\n")
-                print(f"Got: \n{result[i]}")
-
-                assert (
-                    False
-                ), f"TC: {count} \tExpected token type {expected_tokens[i].t_value}, but got {result[i].t_value}."
-
-        count += 1
+        assert _tokens(input_text) == expected_tokens, f"Entrada: {input_text!r}"
 
 
 def test_token_sanitization():
-    # Define los casos de prueba
+    # los filtros con una sintaxis invalida forman parte del texto
     test_cases = [
-        (
-            " titulo vacio",
-            [Token(TOKEN_TEXT, " titulo vacio")],
-        ),
+        (" titulo vacio", [(TOKEN_TEXT, " titulo vacio")]),
         (
             "#categoria:#titulo:",
-            [
-                Token(TOKEN_CATEGORIA, "categoria"),
-                Token(TOKEN_TITULO, "titulo"),
-            ],
-        ),
-        (
-            "titulo # categoria nada",
-            [
-                Token(TOKEN_TEXT, "titulo "),
-                Token(TOKEN_TEXT, "# categoria nada"),
-            ],
+            [(TOKEN_CATEGORIA, "categoria"), (TOKEN_TITULO, "titulo")],
         ),
+        ("titulo # categoria nada", [(TOKEN_TEXT, "titulo # categoria nada")]),
+        ("#nada: x", [(TOKEN_TEXT, "#nada: x")]),
+        ("#titulo!!: x", [(TOKEN_TEXT, "#titulo!!: x")]),
         (
             "Golang #tags: 1,2,3",
-            [
-                Token(TOKEN_TEXT, "Golang "),
-                Token(TOKEN_TAGS, "tags"),
-                Token(TOKEN_TEXT, " 1,2,3"),
-            ],
+            [(TOKEN_TEXT, "Golang "), (TOKEN_TAGS, "tags"), (TOKEN_TEXT, " 1,2,3")],
         ),
         (
             "#titulo!: nuevo",
-            [
-                Token(TOKEN_TITULO, "titulo"),
-                Token(TOKEN_NEGACION, "!"),
-                Token(TOKEN_TEXT, " nuevo"),
-            ],
+            [(TOKEN_TITULO, "titulo"), (TOKEN_NEGACION, "!"), (TOKEN_TEXT, " nuevo")],
         ),
     ]
 
-    # Recorre cada caso de prueba
-    count = 0
     for input_text, expected_tokens in test_cases:
-        lexer = Lexer(input_text)
-        lexer._generate_raw_tokens()
-        lexer._sanitize_tokens()
-
-        result = lexer.tokens
-
-        # Verifica que el número de tokens coincida
-        if len(result) != len(expected_tokens):
-            for t in result:
-                print(t)
-            assert f"TC: {count} \tExpected {len(expected_tokens)} tokens, but got {len(result)}."
-
-        # Verifica que cada token coincida con el esperado
-        for i in range(len(result)):
-            if result[i].t_type != expected_tokens[i].t_type:
-                print(f"\nExpected token {i}: \n{expected_tokens[i]}\n")
-                print(f"Got: \n{result[i]}\n")
-
-                assert (
-                    False
-                ), f"TC: {count} \tExpected token type {expected_tokens[i].t_type}, but got {result[i].t_type}."
-
-            if result[i].t_value != expected_tokens[i].t_value:
-                print(f"\nExpected token {i}: \n{expected_tokens[i]}\n")
-                print(f"Got: \n{result[i]}")
-
-                assert (
-                    False
-                ), f"TC: {count} \tExpected token type {expected_tokens[i].t_value}, but got {result[i].t_value}."
-
-        count += 1
+        assert _tokens(input_text) == expected_tokens, f"Entrada: {input_text!r}"
 
 
 def test_text_squashing():
-    # Define los casos de prueba
+    # el texto entre dos filtros validos es un unico token
     test_cases = [
-        (
-            " titulo vacio",
-            [Token(TOKEN_TEXT, " titulo vacio")],
-        ),
-        (
-            "titulo # categoria nada",
-            [
-                Token(TOKEN_TEXT, "titulo # categoria nada"),
-            ],
-        ),
+        (" titulo vacio", [(TOKEN_TEXT, " titulo vacio")]),
+        ("titulo # categoria nada", [(TOKEN_TEXT, "titulo # categoria nada")]),
         (
             "Golang #tags: 1,2,3",
-            [
-                Token(TOKEN_TEXT, "Golang "),
-                Token(TOKEN_TAGS, "tags"),
-                Token(TOKEN_TEXT, " 1,2,3"),
-            ],
+            [(TOKEN_TEXT, "Golang "), (TOKEN_TAGS, "tags"), (TOKEN_TEXT, " 1,2,3")],
         ),
         (
             "#titulo!: nuevo # nuevo personal",
             [
-                Token(TOKEN_TITULO, "titulo"),
-                Token(TOKEN_NEGACION, "!"),
-                Token(TOKEN_TEXT, " nuevo # nuevo personal"),
+                (TOKEN_TITULO, "titulo"),
+                (TOKEN_NEGACION, "!"),
+                (TOKEN_TEXT, " nuevo # nuevo personal"),
             ],
         ),
+        ("#!:" * 3, [(TOKEN_TEXT, "#!:" * 3)]),
     ]
 
-    # Recorre cada caso de prueba
-    count = 0
     for input_text, expected_tokens in test_cases:
-        lexer = Lexer(input_text)
-
-        lexer._generate_raw_tokens()
-        lexer._sanitize_tokens()
-        lexer._squash_text_tokens()
-
-        result = lexer.tokens
-
-        # Verifica que el número de tokens coincida
-        if len(result) != len(expected_tokens):
-            for t in result:
-                print(t)
-            assert f"TC: {count} \tExpected {len(expected_tokens)} tokens, but got {len(result)}."
+        assert _tokens(input_text) == expected_tokens, f"Entrada: {input_text!r}"
 
-        # Verifica que cada token coincida con el esperado
-        for i in range(len(result)):
-            if result[i].t_type != expected_tokens[i].t_type:
-                print(f"\nExpected token {i}: \n{expected_tokens[i]}\n")
-                print(f"Got: \n{result[i]}\n")
 
-                assert (
-                    False
-                ), f"TC: {count} \tExpected token type {expected_tokens[i].t_type}, but got {result[i].t_type}."
+def test_lexer_equivalente_al_legacy():
+    # casos de los tests anteriores junto con entradas adversariales
+    test_cases = [
+        " titulo vacio",
+        "#categoria:#titulo:",
+        "titulo # categoria  : nada",
+        "Golang #tags: 1,2,3",
+        "#titulo: nuevo #tags: 1,2,3 #before: 12/12/12",
+        "#titulo!: nuevo # nuevo personal",
+        "#titulo!!: a #titulo :: b #:#!:",
+        "## titulo !: x #autor!:#contenido: y!:",
+        "#" * 50 + "!:" * 50,
+        "",
+    ]
 
-            if result[i].t_value != expected_tokens[i].t_value:
-                print(f"\nExpected token {i}: \n{expected_tokens[i]}\n")
-                print(f"Got: \n{result[i]}")
+    rnd = random.Random(0)
+    fragmentos = ["#", "!", ":", " ", "titulo", " tags ", "nada", "x,y"]
+    test_cases += [
+        "".join(rnd.choices(fragmentos, k=rnd.randint(1, 15))) for _ in range(2000)
+    ]
 
-                assert (
-                    False
-                ), f"TC: {count} \tExpected token type {expected_tokens[i].t_value}, but got {result[i].t_value}."
+    for input_text in test_cases:
+        esperado = [(t.t_type, t.t_value) for t in LegacyLexer(input_text).tokenize()]
+        result = [(t.t_type, t.t_value) for t in Lexer(input_text).tokenize()]
 
-        count += 1
+        assert result == esperado, f"Entrada: {input_text!r}"
 
 
 # ----------------------
@@ -473,3 +362,575 @@ def test_ast_to_query_generator(prepare):
     assert post3 in results
     assert not post2 in results
     assert not post1 in results
+
+
+# -----------------------------
+# Test del indice invertido
+# -----------------------------
+
+
+def test_extraer_terminos():
+    assert indice.extraer_terminos("Django, para Principiantes!") == {
+        "django",
+        "para",
+        "principiantes",
+    }
+    assert indice.extraer_terminos("") == set()
+    assert indice.extraer_terminos(None) == set()
+
+
+@pytest.fixture
+def backend_indice(settings):
+    settings.BUSCADOR_BACKEND = "indice"
+
+
+def test_indice_se_actualiza_al_guardar(backend_indice, prepare):
+    post1, post2, post3 = prepare
+
+    terminos = set(
+        TerminoIndice.objects.filter(
+            post=post1, campo=TerminoIndice.CAMPO_TITULO
+        ).values_list("termino", flat=True)
+    )
+    assert terminos == {"django", "for", "beginners"}
+
+    # al editar el titulo se deben eliminar los terminos viejos
+    post1.title = "Flask for Beginners"
+    post1.tags = "python, web"
+    post1.save()
+
+    terminos = set(
+        TerminoIndice.objects.filter(
+            post=post1, campo=TerminoIndice.CAMPO_TITULO
+        ).values_list("termino", flat=True)
+    )
+    assert terminos == {"flask", "for", "beginners"}
+
+    results = buscador.generate_query_set("Django").execute()
+    assert post1 not in results
+    assert len(results) == 2
+
+    results = buscador.generate_query_set("#tags: web").execute()
+    assert list(results) == [post1]
+
+
+def test_interseccion_de_posting_lists(backend_indice, prepare):
+    post1, post2, post3 = prepare
+
+    # todos los terminos deben aparecer, sin importar el orden
+    results = buscador.generate_query_set("beginners django").execute()
+    assert list(results) == [post1]
+
+    results = buscador.generate_query_set("django #titulo!: advanced").execute()
+    assert post2 not in results
+    assert len(results) == 2
+
+    # los valores sin terminos indexables se resuelven por subcadena
+    results = buscador.generate_query_set("#titulo: ???").execute()
+    assert len(results) == 0
+
+
+# ----------------------------------
+# Test del backend de texto completo
+# ----------------------------------
+
+
+def test_seleccion_de_backend(settings):
+    settings.BUSCADOR_BACKEND = None
+    assert isinstance(backends.get_backend(), backends.BackendSQLite)
+
+    settings.BUSCADOR_BACKEND = "indice"
+    assert isinstance(backends.get_backend(), backends.BackendIndiceInvertido)
+
+
+def test_fts_ordena_por_relevancia(prepare):
+    post1, post2, post3 = prepare
+    post3.content = "Consejos sobre publicación de aplicaciones"
+    post3.save()
+    post4 = Post.objects.create(
+        title="Publicaciones en Django",
+        author=post1.author,
+        category=post1.category,
+    )
+
+    # sin acentos y por prefijo, el titulo pesa mas que el contenido
+    results = list(buscador.generate_query_set("#contenido: publicacion").execute())
+    assert results == [post3]
+
+    results = list(buscador.generate_query_set("publicacion").execute())
+    assert results == [post4]
+
+    # mas apariciones del termino implican mayor relevancia
+    post1.content = "django, django y mas django"
+    post1.save()
+    post2.content = "Un articulo largo que menciona django una sola vez"
+    post2.save()
+
+    results = list(buscador.generate_query_set("#contenido: django").execute())
+    assert results == [post1, post2]
+
+    results = buscador.generate_query_set("django #contenido!: django").execute()
+    assert set(results) == {post3, post4}
+
+
+def test_fts_se_actualiza_al_eliminar(prepare):
+    post1, post2, post3 = prepare
+
+    post1.delete()
+    results = buscador.generate_query_set("beginners").execute()
+    assert len(results) == 0
+
+
+# ----------------------------------
+# Test del cache de consultas
+# ----------------------------------
+
+
+def test_cache_de_consultas_compiladas(prepare):
+    post1, post2, post3 = prepare
+    buscador.limpiar_cache()
+
+    buscador.generate_query_set("Tips #autor!: alice")
+    qb = buscador.generate_query_set("  Tips   #autor!:  alice ")
+
+    stats = buscador.estadisticas_cache()
+    assert stats["fallos"] == 1
+    assert stats["aciertos"] == 1
+    assert stats["tamano"] == 1
+
+    assert list(qb.execute()) == [post3]
+
+    # modificar un builder no debe alterar la consulta guardada en el cache
+    qb.add_filter(author__username="alice")
+    qb.add_texto(TerminoIndice.CAMPO_TITULO, "advanced")
+    assert len(qb.execute()) == 0
+
+    qb = buscador.generate_query_set("Tips #autor!: alice")
+    assert list(qb.execute()) == [post3]
+    assert buscador.estadisticas_cache()["aciertos"] == 2
+
+
+# ----------------------------------
+# Test del cache de resultados
+# ----------------------------------
+
+
+def test_cache_de_resultados(prepare, django_assert_num_queries):
+    post1, post2, post3 = prepare
+    resultados.invalidar()
+
+    pagina = resultados.paginar("django", None, 2)
+    assert len(pagina) == 2
+    assert pagina.has_next() and not pagina.has_previous()
+
+    # la segunda pagina solo obtiene los posts por clave primaria
+    with django_assert_num_queries(1):
+        siguiente = resultados.paginar("  django ", pagina.next_cursor, 2)
+        assert len(siguiente) == 1
+        assert not siguiente.has_next() and siguiente.has_previous()
+
+    assert list(resultados.paginar("django", siguiente.previous_cursor, 2)) == list(
+        pagina
+    )
+
+    # editar un post invalida los resultados guardados
+    post2.title = "Advanced Flask"
+    post2.save()
+
+    pagina = resultados.paginar("django", None, 2)
+    assert len(pagina) == 2
+    assert not pagina.has_next()
+    assert post2 not in pagina
+
+    # una generacion expulsada del cache no vuelve a un valor anterior
+    anterior = resultados.generacion()
+    cache.delete(resultados.CLAVE_GENERACION)
+    assert resultados.generacion() != anterior
+
+
+def test_resultados_truncados(prepare, monkeypatch):
+    resultados.invalidar()
+    monkeypatch.setattr(resultados, "MAX_RESULTADOS", 2)
+
+    # solo se recorren los primeros resultados, y la ultima pagina lo indica
+    pagina = resultados.paginar("django", None, 1)
+    assert pagina.truncado and pagina.limite == 2
+    ultima = resultados.paginar("django", pagina.next_cursor, 1)
+    assert not ultima.has_next()
+    assert len(resultados.ids_resultados("django")[0]) == 2
+
+    assert not resultados.paginar("flask", None, 1).truncado
+
+
+# ----------------------------------
+# Test de las sugerencias
+# ----------------------------------
+
+
+def test_sugerencias_por_prefijo(prepare):
+    post1, post2, post3 = prepare
+    post1.tags = "django, web"
+    post1.save()
+
+    indice_prefijos = sugerencias.IndicePrefijos()
+    indice_prefijos.reconstruir()
+
+    # solo los posts publicados
+    result = indice_prefijos.sugerir("DJAN")
+    assert result["titulos"] == [{"valor": "Django for Beginners", "id": post1.id}]
+    assert result["tags"] == [{"valor": "django"}]
+    assert result["categorias"] == [{"valor": "Django"}]
+    assert indice_prefijos.sugerir("al")["autores"] == [{"valor": "alice"}]
+    assert indice_prefijos.sugerir("")["titulos"] == []
+
+    # actualizacion incremental al publicar
+    post2.title = "Árboles en Django"
+    post2.status = Post.PUBLISHED
+    post2.save()
+    indice_prefijos.agregar_post(post2)
+
+    result = indice_prefijos.sugerir("arbol")
+    assert result["titulos"] == [{"valor": "Árboles en Django", "id": post2.id}]
+    assert indice_prefijos.sugerir("b")["autores"] == [{"valor": "bob"}]
+
+
+def test_sugerencias_limite_por_tipo(prepare, monkeypatch):
+    post1, post2, post3 = prepare
+    post1.tags = ", ".join(f"django{i:03}" for i in range(20))
+    post1.save()
+    monkeypatch.setattr(sugerencias, "MAX_ENTRADAS_REVISADAS", 10)
+
+    indice_prefijos = sugerencias.IndicePrefijos()
+    indice_prefijos.reconstruir()
+
+    # las entradas de un tipo no agotan las revisadas de los demas
+    result = indice_prefijos.sugerir("django")
+    assert len(result["tags"]) == 5
+    assert result["titulos"] == [{"valor": "Django for Beginners", "id": post1.id}]
+    assert result["categorias"] == [{"valor": "Django"}]
+
+
+def test_sugerencias_sin_posts_vencidos(prepare):
+    post1, post2, post3 = prepare
+    post1.expiration_date = timezone.now() - timedelta(days=1)
+    post1.save()
+
+    indice_prefijos = sugerencias.IndicePrefijos()
+    indice_prefijos.reconstruir()
+
+    assert indice_prefijos.sugerir("django")["titulos"] == []
+
+
+def test_sugerencias_reconstruccion_en_segundo_plano(prepare, monkeypatch):
+    post1, post2, post3 = prepare
+    hilos = []
+    monkeypatch.setattr(sugerencias, "_iniciar_hilo", hilos.append)
+    monkeypatch.setattr(sugerencias, "_indice", sugerencias.IndicePrefijos())
+
+    indice_prefijos = sugerencias.get_indice()
+    assert indice_prefijos.sugerir("djan")["titulos"]
+
+    post1.title = "Flask avanzado"
+    post1.save()
+    indice_prefijos.construido -= sugerencias.SUGERENCIAS_TIEMPO + 1
+
+    # el indice desactualizado se sigue usando mientras se reconstruye
+    assert sugerencias.get_indice() is indice_prefijos
+    assert indice_prefijos.sugerir("djan")["titulos"]
+    assert len(hilos) == 1
+
+    # no se inicia otra reconstruccion mientras haya una en curso
+    sugerencias.get_indice()
+    assert len(hilos) == 1
+
+    # los posts publicados durante la reconstruccion no se pierden
+    post2.status = Post.PUBLISHED
+    post2.save()
+    indice_prefijos.agregar_post(post2)
+
+    hilos[0]()
+    assert indice_prefijos.sugerir("djan")["titulos"] == []
+    assert indice_prefijos.sugerir("flask")["titulos"] == [
+        {"valor": "Flask avanzado", "id": post1.id}
+    ]
+    assert indice_prefijos.sugerir("b")["autores"] == [{"valor": "bob"}]
+    assert indice_prefijos.reconstruir_en_segundo_plano()
+
+
+# ----------------------------------
+# Test de la busqueda aproximada
+# ----------------------------------
+
+
+def test_extraer_trigramas():
+    assert trigramas.extraer_trigramas("Él") == {"  e", " el", "el "}
+    assert trigramas.extraer_trigramas("") == set()
+
+
+@pytest.mark.parametrize("backend", ["indice", "sqlite"])
+def test_busqueda_aproximada(prepare, settings, backend):
+    settings.BUSCADOR_BACKEND = backend
+    post1, post2, post3 = prepare
+    post1.tags = "python, web"
+    post1.save()
+    backends.get_backend().reindexar()
+
+    # la busqueda exacta tiene prioridad
+    ids, aproximado = resultados.ids_resultados("django")
+    assert not aproximado and len(ids) == 3
+
+    ids, aproximado = resultados.ids_resultados("begginers")
+    assert aproximado
+    assert ids == [post1.id]
+
+    # ordenado por similitud
+    ids, aproximado = resultados.ids_resultados("advanced djngo")
+    assert aproximado
+    assert ids[0] == post2.id
+
+    ids, aproximado = resultados.ids_resultados("#tags: pyton")
+    assert aproximado and ids == [post1.id]
+
+    # las negaciones se aplican de forma exacta
+    ids, _ = resultados.ids_resultados("djnago #autor!: alice #titulo!: tips")
+    assert ids == [post2.id]
+
+    # sin similitud suficiente
+    ids, aproximado = resultados.ids_resultados("kubernetes")
+    assert ids == [] and not aproximado
+
+
+# ----------------------------------
+# Test de las disyunciones
+# ----------------------------------
+
+
+def test_parser_disyunciones():
+    def parse(input_text):
+        return Parser(Lexer(input_text).tokenize()).parse()
+
+    # sin operadores el resultado es una lista plana de nodos
+    assert [str(n) for n in parse("Golang #tags: 1,2,3")] == [
+        str(NodeTitulo("Golang")),
+        str(NodeTags("1,2,3")),
+    ]
+
+    (nodo,) = parse("django | flask")
+    assert isinstance(nodo, NodeOr)
+    assert [[n.value for n in a] for a in nodo.alternativas] == [["django"], ["flask"]]
+
+    nodo, autor = parse("(#titulo: a | #tags!: b | (c | d)) #autor: e")
+    assert [[(n.n_type, n.value, n.negation) for n in a] for a in nodo.alternativas] == [
+        [("titulo", "a", False)],
+        [("tags", "b", True)],
+        [("titulo", "c", False)],
+        [("titulo", "d", False)],
+    ]
+    assert (autor.n_type, autor.value) == ("autor", "e")
+
+    # filtros sin valor, alternativas vacias y parentesis sin cerrar se ignoran
+    assert [(n.n_type, n.value) for n in parse("#titulo:#categoria: x")] == [
+        ("categoria", "x")
+    ]
+    assert [(n.n_type, n.value) for n in parse("| a | ) (b")] == [
+        ("titulo", "a"),
+        ("titulo", "b"),
+    ]
+
+
+def test_disyuncion_sobre_un_campo_genera_un_solo_filtro():
+    qb = buscador.generate_query_set("#tags: web | #tags: api")
+    assert qb.relaciones == [("tags", ("web", "api"), False)]
+    assert qb.textos == [] and qb.disyunciones == []
+
+    qb = buscador.generate_query_set("#categoria: a | #categoria: b")
+    assert qb.relaciones == [("categoria", ("a", "b"), False)]
+    assert qb.filters == Q()
+
+    # campos distintos requieren una disyuncion general
+    qb = buscador.generate_query_set("#titulo: a | #autor: b")
+    assert qb.textos == [] and len(qb.disyunciones) == 1
+
+
+@pytest.mark.parametrize("backend", ["indice", "sqlite"])
+def test_busqueda_con_disyunciones(prepare, settings, backend):
+    settings.BUSCADOR_BACKEND = backend
+    post1, post2, post3 = prepare
+    backends.get_backend().reindexar()
+
+    def buscar(input_text):
+        return set(buscador.generate_query_set(input_text).execute())
+
+    assert buscar("Beginners | Tips") == {post1, post3}
+    assert buscar("beginners | advanced django") == {post1, post2}
+    assert buscar("#autor: alice | #autor: bob") == {post1, post2}
+    assert buscar("(Beginners | Advanced) #autor!: alice") == {post2}
+    assert buscar("#titulo: tips | #autor: alice") == {post1, post3}
+    assert buscar("#categoria: nada | (#titulo!: tips #autor: bob)") == {post2}
+    assert buscar("kubernetes | docker") == set()
+
+
+# ----------------------------------
+# Test de las columnas normalizadas
+# ----------------------------------
+
+
+def test_columnas_normalizadas(prepare):
+    post1, post2, post3 = prepare
+
+    assert normalizar("  Publicación ÁRBOL ") == "publicacion arbol"
+    assert post1.title_normalizado == "django for beginners"
+    assert post1.author.username_normalizado == "alice"
+    assert post1.category.name_normalizado == "django"
+
+    # save(update_fields=...) tambien actualiza la columna normalizada
+    post1.title = "Programación Básica"
+    post1.save(update_fields=["title"])
+    post1.refresh_from_db()
+    assert post1.title_normalizado == "programacion basica"
+
+    # la normalizacion puede alargar el texto: se recorta al largo de la columna
+    post1.title = "\ufdfa" * 80
+    post1.save()
+    assert len(normalizar(post1.title)) > 255
+    assert len(post1.title_normalizado) == 255
+
+
+@pytest.mark.parametrize("backend", ["indice", "sqlite"])
+def test_busqueda_sin_acentos(prepare, settings, backend):
+    settings.BUSCADOR_BACKEND = backend
+    post1, post2, post3 = prepare
+    post1.title = "Publicación en Django"
+    post1.tags = "programación, ¿?"
+    post1.save()
+    post2.category = Category.objects.create(name="Programación")
+    post2.save()
+    backends.get_backend().reindexar()
+
+    def buscar(input_text):
+        return set(buscador.generate_query_set(input_text).execute())
+
+    assert buscar("publicacion") == {post1}
+    assert buscar("PUBLICACIÓN") == {post1}
+    assert buscar("#tags: Programacion") == {post1}
+    assert buscar("#tags: ¿?") == {post1}
+
+    # categoria y autor se buscan por prefijo
+    assert buscar("#categoria: programacion") == {post2}
+    assert buscar("#categoria: PROG") == {post2}
+    assert buscar("#categoria: gramacion") == set()
+    assert buscar("#autor: ALI") == {post1}
+
+
+# ----------------------------------
+# Test de la resolucion de nombres
+# ----------------------------------
+
+
+def test_resolucion_de_nombres(prepare, django_assert_num_queries, monkeypatch):
+    post1, post2, post3 = prepare
+    categoria = post1.category
+
+    # los filtros por nombre se resuelven a ids, sin JOIN con categorias ni usuarios
+    qb = buscador.generate_query_set("#categoria: DJ #autor: alice | #autor: bob")
+    qs = qb.execute()
+    sql = str(qs.query)
+    assert "Categories_category" not in sql and "UserProfile_userprofile" not in sql
+    assert set(qs) == {post1, post2}
+
+    # una vez cargado el mapa no se realizan consultas
+    with django_assert_num_queries(0):
+        assert nombres.resolver(nombres.RELACION_CATEGORIA, ["django"]) == [
+            categoria.id
+        ]
+
+    # los autores se resuelven con una consulta por prefijo, sin mapa en memoria
+    with django_assert_num_queries(1):
+        assert nombres.resolver(nombres.RELACION_AUTOR, ["ALI"]) == [post1.author_id]
+    assert nombres.resolver(nombres.RELACION_AUTOR, ["nadie"]) == []
+
+    # crear (o renombrar) una categoria actualiza el mapa
+    otra = Category.objects.create(name="Djangonautas")
+    assert nombres.resolver(nombres.RELACION_CATEGORIA, ["dj"]) == sorted(
+        [categoria.id, otra.id]
+    )
+
+    # otros cambios no invalidan el mapa
+    version = nombres.version(nombres.RELACION_CATEGORIA)
+    post1.author.save(update_fields=["last_login"])
+    assert nombres.version(nombres.RELACION_CATEGORIA) == version
+
+    # crear un tag solo invalida el mapa de los tags
+    post1.tags = "nuevo"
+    post1.save()
+    assert nombres.version(nombres.RELACION_CATEGORIA) == version
+
+    # el mapa se recarga al expirar, aunque no cambie la version
+    Category.objects.filter(id=otra.id).update(name_normalizado="otra")
+    assert nombres.resolver(nombres.RELACION_CATEGORIA, ["dj"]) == sorted(
+        [categoria.id, otra.id]
+    )
+    monkeypatch.setattr(nombres, "NOMBRES_TIEMPO", 0)
+    assert nombres.resolver(nombres.RELACION_CATEGORIA, ["dj"]) == [categoria.id]
+    Category.objects.filter(id=otra.id).update(name_normalizado="djangonautas")
+
+    # una version expulsada del cache no vuelve a un valor anterior
+    version = nombres.version(nombres.RELACION_CATEGORIA)
+    cache.delete(nombres.CLAVE_VERSION.format(relacion=nombres.RELACION_CATEGORIA))
+    assert nombres.version(nombres.RELACION_CATEGORIA) != version
+
+    # demasiadas coincidencias: se resuelven con una subconsulta
+    monkeypatch.setattr(nombres, "MAX_IDS", 1)
+    assert nombres.resolver(nombres.RELACION_CATEGORIA, ["dj"]) is None
+    assert nombres.resolver(nombres.RELACION_AUTOR, [""]) is None
+    assert set(buscador.generate_query_set("#categoria: dj").execute()) == {
+        post1,
+        post2,
+        post3,
+    }
+
+
+# ----------------------------------
+# Test de los fragmentos de resultados
+# ----------------------------------
+
+
+def test_resaltar_coincidencias():
+    assert (
+        fragmentos.resaltar("Introducción a <Django> y DJANGO", ["introduccion", "django"])
+        == "<mark>Introducción</mark> a &lt;<mark>Django</mark>&gt; y <mark>DJANGO</mark>"
+    )
+    assert fragmentos.resaltar("sin <b>terminos</b>", []) == "sin &lt;b&gt;terminos&lt;/b&gt;"
+
+
+def test_fragmentos_de_resultados(prepare, django_assert_num_queries):
+    post1, post2, post3 = prepare
+    post1.content = (
+        "## Introducción\n\n"
+        + "palabra " * 50
+        + "Las **migraciones** de Django se aplican con `migrate`. "
+        + "relleno " * 50
+    )
+    post1.save()
+
+    pagina = resultados.paginar("#contenido: migraciones", None, 10)
+    assert [p.id for p in pagina] == [post1.id]
+
+    post = pagina[0]
+    # el contenido completo no se carga
+    assert "content" in post.get_deferred_fields()
+    assert len(post.fragmento_texto) == fragmentos.LARGO
+
+    assert post.fragmento.startswith(fragmentos.ELIPSIS + " palabra")
+    assert post.fragmento.endswith(fragmentos.ELIPSIS)
+    assert "<mark>migraciones</mark> de <mark>Django</mark>" not in post.fragmento
+    assert "Las <mark>migraciones</mark> de Django se aplican con migrate." in (
+        post.fragmento
+    )
+
+    # sin coincidencias en el contenido se muestra su comienzo. Con los resultados
+    # en cache, los posts y sus fragmentos se obtienen en una sola consulta.
+    resultados.paginar("#titulo: beginners", None, 10)
+    with django_assert_num_queries(1):
+        pagina = resultados.paginar("#titulo: beginners", None, 10)
+    assert pagina[0].fragmento.startswith("Introducción palabra")
@@ -1,3 +1,5 @@
+import re
+
 ### TOKEN TYPES ###
 
 # Palabras clave
@@ -13,6 +15,9 @@ TOKEN_BEFORE = "before"
 TOKEN_FILTER = "#"
 TOKEN_NEGACION = "!"
 TOKEN_SEPARATOR = ":"
+TOKEN_OR = "|"
+TOKEN_ABRE_GRUPO = "("
+TOKEN_CIERRA_GRUPO = ")"
 
 # Tipos de tokens
 TOKEN_TEXT = "text"  # Texto que puede tener múltiples palabras
@@ -36,6 +41,14 @@ CARACTERES_ESPECIALES = {
 }
 
 
+# Operadores que combinan filtros. Se reconocen en cualquier parte del texto
+OPERADORES = {
+    TOKEN_OR: TOKEN_OR,
+    TOKEN_ABRE_GRUPO: TOKEN_ABRE_GRUPO,
+    TOKEN_CIERRA_GRUPO: TOKEN_CIERRA_GRUPO,
+}
+
+
 def resolve_type(text: str):
     """
     Determina el tipo de token según el texto proporcionado.
@@ -58,20 +71,16 @@ def resolve_type(text: str):
     return TOKEN_TEXT
 
 
-def is_letter(ch):
-    """
-    Comprueba si un carácter es una letra o un guion bajo.
-
-    Args:
-        ch (str): Carácter a verificar.
+# Sintaxis de un filtro: "# identificador [!]:". El identificador no puede contener
+# caracteres especiales, por lo que un filtro nunca se solapa con el siguiente.
+_FILTRO = re.compile(r"#([^#!:]*)(!?):")
 
-    Returns:
-        bool: True si el carácter es una letra o un guion bajo, False en caso contrario.
-    """
-    return not ch in CARACTERES_ESPECIALES and ch != ""
+_OPERADOR = re.compile(r"[|()]")
 
 
 class Token:
+    __slots__ = ("t_type", "t_value")
+
     t_type: str
     t_value: str
 
@@ -91,116 +100,20 @@ class Token:
 
 
 class Lexer:
-    curr_position = -1  # Posición actual del lexer en la cadena
-    next_position = 0  # Próxima posición del lexer en la cadena
-
-    curr_char = ""  # Carácter actual procesado
-    parsing_string = ""  # Cadena que se está analizando
-
-    tokens: list[Token]
+    """
+    Separa una consulta del buscador en tokens.
 
-    def _generate_raw_tokens(self):
-        """
-        Analiza la cadena completa y genera una lista de tokens.
+    El resultado es una secuencia de tokens de texto (con el texto original, sin
+    modificar) y de palabras clave, opcionalmente seguidas de un token de negacion.
+    Los filtros con una sintaxis invalida ("#nada:", "# titulo") forman parte del
+    texto que los rodea. Los operadores "|", "(" y ")" separan el texto en el que
+    aparecen.
 
-        Returns:
-            list[Token]: Lista de tokens encontrados en la cadena de entrada.
-        """
+    La consulta se recorre una sola vez: se buscan los filtros con una expresion
+    regular y el texto entre dos filtros validos se toma como un unico slice.
+    """
 
-        result: list[Token] = []
-
-        while self.curr_char != "":
-            # Caracteres especiales
-            if self.curr_char in CARACTERES_ESPECIALES:
-                t = Token(resolve_type(self.curr_char), self.curr_char)
-                result.append(t)
-                self._advance_lexer()
-
-            # Tokens multi carácter
-            else:
-                t = self._parse_text()
-                result.append(t)
-
-        self.tokens = result
-
-    def _squash_text_tokens(self):
-        token_count = -1
-        new_list: list[Token] = []
-
-        for token in self.tokens:
-            if token.t_type != TOKEN_TEXT:
-                new_list.append(token)
-                token_count += 1
-
-                # si contamos con 2 tokens de texto seguidos
-            elif (
-                token_count > -1  # revisar que ya se haya insertado un token
-                and new_list[token_count].t_type == TOKEN_TEXT
-                and token.t_type == TOKEN_TEXT
-            ):
-                new_list[token_count].t_value += token.t_value
-
-                # si es el primer token de texto en ser insertado depues de un filtro o al inicio
-            else:
-                new_list.append(token)
-                token_count += 1
-
-        self.tokens = new_list
-
-    def _sanitize_tokens(self):
-        curr_position = 0
-        new_list: list[Token] = []
-
-        while curr_position < len(self.tokens):
-            # si encontramos un token de filtro revisar que tenga la sintaxis correcta.
-            # Transformar a token de texto si es que no se sigue la sintaxis
-            # "# identificador [!]:"
-            if self.tokens[curr_position].t_type == TOKEN_FILTER:
-                if (
-                    curr_position + 2 < len(self.tokens)
-                    and self.tokens[curr_position + 2].t_type == TOKEN_SEPARATOR
-                    and self.tokens[curr_position + 1].t_type in PALABRAS_CLAVE
-                ):
-                    # solo anadir el token de "palabra clave"
-                    new_list.append(self.tokens[curr_position + 1])
-                    curr_position += 3
-                    continue
-
-                if (
-                    curr_position + 3 < len(self.tokens)
-                    and self.tokens[curr_position + 2].t_type == TOKEN_NEGACION
-                    and self.tokens[curr_position + 3].t_type == TOKEN_SEPARATOR
-                    and self.tokens[curr_position + 1].t_type in PALABRAS_CLAVE
-                ):
-                    # solo anadir el token de "palabra clave" y el de negacion
-                    new_list.append(self.tokens[curr_position + 1])
-                    new_list.append(self.tokens[curr_position + 2])
-                    curr_position += 4
-                    continue
-
-                # si la sintaxis NO fue correcta, cambiamos el token a
-                # un token de tipo texto
-                self.tokens[curr_position].t_type = TOKEN_TEXT
-
-            # Unir los tokens en un solo token de texto hasta el siguiente token de filtro
-            value = ""
-            while (
-                curr_position < len(self.tokens)
-                and self.tokens[curr_position].t_type != TOKEN_FILTER
-            ):
-                value += self.tokens[curr_position].t_value
-                curr_position += 1
-
-            new_list.append(Token(TOKEN_TEXT, value))
-
-        self.tokens = new_list
-
-    def tokenize(self):
-        self._generate_raw_tokens()
-        self._sanitize_tokens()
-        self._squash_text_tokens()
-
-        return self.tokens
+    __slots__ = ("parsing_string",)
 
     def __init__(self, s) -> None:
         """
@@ -210,57 +123,44 @@ class Lexer:
             s (str): Cadena que se va a analizar.
         """
         self.parsing_string = s
-        self._advance_lexer()
 
-    # -------------------
-    # -    Utilities    -
-    # -------------------
+    def tokenize(self) -> list[Token]:
+        s = self.parsing_string
+        tokens: list[Token] = []
+        inicio = 0  # comienzo del texto que aun no fue agregado
 
-    def _pick_char(self):
-        """
-        Obtiene el siguiente carácter a procesar sin avanzar el lexer.
+        for filtro in _FILTRO.finditer(s):
+            identificador, negacion = filtro.groups()
 
-        Returns:
-            str: Próximo carácter de la cadena.
-        """
-        if self.curr_position >= len(self.parsing_string):
-            return 0
+            tipo = PALABRAS_CLAVE.get(identificador.strip())
+            if tipo is None:
+                continue
 
-        return self.parsing_string[self.curr_position + 1]
+            self._texto(tokens, inicio, filtro.start())
 
-    def _advance_lexer(self):
-        """
-        Avanza el lexer a la siguiente posición de la cadena.
-        """
-        if self.next_position >= len(self.parsing_string):
-            self.curr_char = ""
-        else:
-            self.curr_char = self.parsing_string[self.next_position]
+            tokens.append(Token(tipo, identificador))
+            if negacion:
+                tokens.append(Token(TOKEN_NEGACION, negacion))
 
-        self.curr_position = self.next_position
-        self.next_position = self.next_position + 1
+            inicio = filtro.end()
 
-    def _parse_text(self) -> Token:
-        """
-        Analiza y crea un token de texto (multicaracter) desde la posición actual del lexer.
+        self._texto(tokens, inicio, len(s))
 
-        Returns:
-            Token: El token creado con su tipo y valor.
-        """
-        start = self.curr_position
+        return tokens
+
+    def _texto(self, tokens: list[Token], inicio: int, fin: int) -> None:
+        # agrega el texto entre `inicio` y `fin`, separado por los operadores
+        s = self.parsing_string
 
-        while is_letter(self.curr_char):
-            self._advance_lexer()
+        for operador in _OPERADOR.finditer(s, inicio, fin):
+            if operador.start() > inicio:
+                tokens.append(Token(TOKEN_TEXT, s[inicio : operador.start()]))
 
-        value = self.parsing_string[start : self.curr_position]
+            tokens.append(Token(OPERADORES[operador.group()], operador.group()))
+            inicio = operador.end()
 
-        return Token(resolve_type(value), value)
+        if fin > inicio:
+            tokens.append(Token(TOKEN_TEXT, s[inicio:fin]))
 
     def __str__(self):
-        return (
-            f"Lexer State:\n"
-            f"  Current Position: {self.curr_position}\n"
-            f"  Next Position: {self.next_position}\n"
-            f"  Current Char: '{self.curr_char}'\n"
-            f"  Parsing String: '{self.parsing_string}'"
-        )
+        return f"Lexer State:\n  Parsing String: '{self.parsing_string}'"
@@ -0,0 +1,145 @@
+"""
+Indice de trigramas del buscador (busqueda tolerante a errores de tipeo).
+
+Para el titulo y los tags de cada post se guardan los trigramas de sus palabras
+(secuencias de tres caracteres, con la misma convencion que `pg_trgm`: las palabras
+se normalizan y se rellenan con dos espacios al inicio y uno al final) dentro de la
+tabla `TrigramaIndice`.
+
+La similitud entre un texto buscado y un post es la proporcion de trigramas del texto
+que aparecen en el post, de modo que "begginers" encuentra "Django for Beginners".
+
+En PostgreSQL no se utiliza esta tabla, la similitud se calcula con `pg_trgm` (ver
+`modulos.Posts.buscador.backends.BackendPostgres`).
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, FloatField
+from django.db.models.functions import Cast
+
+from modulos.normalizacion import normalizar
+from modulos.Posts.models import Post, TerminoIndice, TrigramaIndice
+
+# Campos sobre los que se realiza la busqueda aproximada
+CAMPOS = {
+    TerminoIndice.CAMPO_TITULO: "title",
+    TerminoIndice.CAMPO_TAGS: "tags",
+}
+
+# Proporcion minima de trigramas en comun para considerar una coincidencia
+UMBRAL_SIMILITUD = getattr(settings, "BUSCADOR_UMBRAL_SIMILITUD", 0.4)
+
+
+def extraer_trigramas(texto: str | None) -> set[str]:
+    """
+    Retorna el conjunto de trigramas de las palabras de un texto.
+    """
+    if not texto:
+        return set()
+
+    texto = "".join(c if c.isalnum() else " " for c in normalizar(texto))
+
+    trigramas = set()
+    for palabra in texto.split():
+        palabra = f"  {palabra} "
+        trigramas.update(palabra[i : i + 3] for i in range(len(palabra) - 2))
+
+    return trigramas
+
+
+def trigramas_de_post(post: Post) -> set[tuple[str, str]]:
+    """
+    Retorna todos los pares (campo, trigrama) que corresponden a un post.
+    """
+    return {
+        (campo, trigrama)
+        for campo, columna in CAMPOS.items()
+        for trigrama in extraer_trigramas(getattr(post, columna))
+    }
+
+
+def indexar_post(post: Post) -> None:
+    """
+    Actualiza los trigramas de un post. Solo se escriben las diferencias.
+    """
+    nuevos = trigramas_de_post(post)
+
+    with transaction.atomic():
+        actuales = set(
+            TrigramaIndice.objects.filter(post=post).values_list("campo", "trigrama")
+        )
+
+        eliminados = actuales - nuevos
+        for campo in {c for c, _ in eliminados}:
+            TrigramaIndice.objects.filter(
+                post=post,
+                campo=campo,
+                trigrama__in=[t for c, t in eliminados if c == campo],
+            ).delete()
+
+        TrigramaIndice.objects.bulk_create(
+            [
+                TrigramaIndice(post=post, campo=campo, trigrama=trigrama)
+                for campo, trigrama in nuevos - actuales
+            ]
+        )
+
+
+def indexar_lote(posts: list[Post]) -> None:
+    """
+    Inserta los trigramas de posts recien creados.
+    """
+    TrigramaIndice.objects.bulk_create(
+        [
+            TrigramaIndice(post_id=post.id, campo=campo, trigrama=trigrama)
+            for post in posts
+            for campo, trigrama in trigramas_de_post(post)
+        ],
+        batch_size=5000,
+    )
+
+
+def reindexar_todo(batch_size: int = 500) -> int:
+    """
+    Reconstruye el indice de trigramas. Retorna la cantidad de posts indexados.
+    """
+    total = 0
+
+    with transaction.atomic():
+        TrigramaIndice.objects.all().delete()
+
+        lote = []
+        for post in Post.objects.only("id", "title", "tags").iterator(
+            chunk_size=batch_size
+        ):
+            lote.append(post)
+            total += 1
+
+            if len(lote) >= batch_size:
+                indexar_lote(lote)
+                lote = []
+
+        indexar_lote(lote)
+
+    return total
+
+
+def similares(campo: str, texto: str):
+    """
+    Retorna un queryset con los posts (`post`) cuyo campo es similar al texto, junto
+    con su similitud (`similitud`, entre 0 y 1). El queryset no se evalua.
+    """
+    trigramas = extraer_trigramas(texto)
+
+    qs = TrigramaIndice.objects.filter(campo=campo, trigrama__in=trigramas)
+    if not trigramas:
+        qs = qs.none()
+
+    return (
+        qs.values("post")
+        .annotate(
+            similitud=Cast(Count("trigrama"), FloatField()) / max(len(trigramas), 1),
+        )
+        .filter(similitud__gte=UMBRAL_SIMILITUD)
+    )
@@ -0,0 +1,270 @@
+"""
+Generacion de un corpus sintetico para medir el rendimiento del sitio.
+
+Se generan usuarios, categorias, posts (con contenido markdown de largo realista),
+tags, favoritos, versiones y reportes utilizando `bulk_create`. Las palabras siguen
+una distribucion de Zipf aproximada (pocas palabras muy comunes y muchas raras) y
+los primeros posts generados contienen las palabras "aguja" (`AGUJAS`), de modo que
+las busquedas que las utilizan tienen la misma cantidad de resultados sin importar
+el tamano del corpus.
+
+Se utiliza desde los comandos `generar_corpus` y `benchmark`.
+"""
+
+import itertools
+import random
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from modulos.Categories.models import Category
+from modulos.normalizacion import normalizar_columnas
+from modulos.Posts import etiquetas, extractos, favoritos
+from modulos.Posts.buscador import resultados
+from modulos.Posts.buscador.backends import get_backend
+from modulos.Posts.models import Post, Version
+from modulos.Reports.models import Report
+from modulos.UserProfile.models import UserProfile
+
+AGUJAS = ["zafiro", "obsidiana", "turmalina"]
+CANTIDAD_AGUJAS = 10
+
+# Distribucion de los estados de los posts generados
+ESTADOS = [
+    (Post.PUBLISHED, 0.7),
+    (Post.DRAFT, 0.1),
+    (Post.PENDING_REVIEW, 0.1),
+    (Post.PENDING_PUBLICATION, 0.1),
+]
+
+_SILABAS = ["ma", "ke", "ro", "ti", "sa", "lu", "pe", "do", "ca", "ne", "vi", "go"]
+
+
+def _vocabulario(tamano: int, rnd: random.Random) -> list[str]:
+    palabras = set()
+    while len(palabras) < tamano:
+        palabras.add("".join(rnd.choices(_SILABAS, k=rnd.randint(2, 4))))
+    return sorted(palabras)
+
+
+def _pesos_zipf(tamano: int) -> list[float]:
+    # pesos acumulados, para ser utilizados con `random.choices(cum_weights=...)`
+    return list(itertools.accumulate(1 / (i + 1) for i in range(tamano)))
+
+
+class _Generador:
+    def __init__(self, semilla: int) -> None:
+        self.rnd = random.Random(semilla)
+        self.vocabulario = _vocabulario(5000, self.rnd)
+        self.pesos = _pesos_zipf(len(self.vocabulario))
+        self.tags = self.vocabulario[:300]
+
+    def texto(self, largo: int) -> str:
+        return " ".join(
+            self.rnd.choices(self.vocabulario, cum_weights=self.pesos, k=largo)
+        )
+
+    def markdown(self) -> str:
+        """
+        Contenido markdown con titulos, parrafos, listas y bloques de codigo (entre
+        300 y 1500 palabras aproximadamente).
+        """
+        bloques = []
+        for _ in range(self.rnd.randint(3, 10)):
+            bloques.append(f"## {self.texto(self.rnd.randint(2, 6)).capitalize()}")
+
+            for _ in range(self.rnd.randint(1, 3)):
+                bloques.append(self.texto(self.rnd.randint(40, 120)).capitalize() + ".")
+
+            eleccion = self.rnd.random()
+            if eleccion < 0.3:
+                bloques.append(
+                    "\n".join(
+                        f"- {self.texto(self.rnd.randint(3, 10))}"
+                        for _ in range(self.rnd.randint(2, 6))
+                    )
+                )
+            elif eleccion < 0.4:
+                bloques.append(f"```\n{self.texto(15)}\n```")
+
+        return "\n\n".join(bloques)
+
+    def estado(self) -> str:
+        return self.rnd.choices(
+            [e for e, _ in ESTADOS], weights=[p for _, p in ESTADOS]
+        )[0]
+
+
+def _normalizar(objetos: list) -> list:
+    # bulk_create no llama a `save`, que actualiza las columnas normalizadas
+    for objeto in objetos:
+        normalizar_columnas(objeto, objeto.COLUMNAS_NORMALIZADAS)
+    return objetos
+
+
+def generar_corpus(
+    usuarios: int = 100,
+    categorias: int = 10,
+    posts: int = 1000,
+    semilla: int = 0,
+    batch_size: int = 1000,
+) -> None:
+    """
+    Inserta un corpus sintetico en la base de datos.
+
+    Los usuarios y categorias se agregan a los ya existentes (los nombres generados
+    no se repiten entre ejecuciones). Los posts se reparten entre todos los usuarios
+    y categorias generados en esta ejecucion.
+
+    Args:
+        usuarios (int): Cantidad de usuarios a generar (al menos 1).
+        categorias (int): Cantidad de categorias a generar (al menos 1).
+        posts (int): Cantidad de posts a generar.
+        semilla (int): Semilla del generador de numeros aleatorios.
+        batch_size (int): Cantidad de posts insertados por transaccion.
+    """
+    gen = _Generador(semilla)
+    rnd = gen.rnd
+    ahora = timezone.now()
+
+    # usuarios y categorias
+    inicio = UserProfile.objects.count()
+    nuevos_usuarios = UserProfile.objects.bulk_create(
+        _normalizar(
+            [
+                UserProfile(
+                    username=f"usuario_{inicio + i}",
+                    email=f"usuario_{inicio + i}@example.com",
+                    password="!",  # contrasena no utilizable
+                )
+                for i in range(max(usuarios, 1))
+            ]
+        ),
+        batch_size=batch_size,
+    )
+    ids_usuarios = list(
+        UserProfile.objects.filter(
+            username__in=[u.username for u in nuevos_usuarios]
+        ).values_list("id", flat=True)
+    )
+
+    inicio = Category.objects.count()
+    nuevas_categorias = Category.objects.bulk_create(
+        _normalizar(
+            [
+                Category(
+                    name=f"Categoria {inicio + i}",
+                    description=gen.texto(20),
+                    moderacion=rnd.choice([Category.MODERADA, Category.LIBRE]),
+                )
+                for i in range(max(categorias, 1))
+            ]
+        )
+    )
+    ids_categorias = list(
+        Category.objects.filter(
+            name__in=[c.name for c in nuevas_categorias]
+        ).values_list("id", flat=True)
+    )
+    # las categorias siguen una distribucion de Zipf: pocas categorias muy grandes
+    pesos_categorias = _pesos_zipf(len(ids_categorias))
+
+    agujas_actuales = Post.objects.filter(title__contains=AGUJAS[0]).count()
+
+    creados = 0
+    while creados < posts:
+        lote = []
+        for _ in range(min(batch_size, posts - creados)):
+            titulo = gen.texto(rnd.randint(3, 8)).capitalize()
+            contenido = gen.markdown()
+            tags = ", ".join(rnd.sample(gen.tags, rnd.randint(1, 4)))
+
+            if agujas_actuales < CANTIDAD_AGUJAS:
+                titulo = f"{titulo} {AGUJAS[0]}"
+                contenido = f"{contenido}\n\n{' '.join(AGUJAS[1:])}"
+                tags = f"{tags}, {AGUJAS[0]}"
+                agujas_actuales += 1
+
+            estado = gen.estado()
+            creacion = ahora - timedelta(minutes=rnd.randint(0, 60 * 24 * 365))
+
+            lote.append(
+                Post(
+                    title=titulo[:80],
+                    content=contenido,
+                    tags=tags[:80],
+                    category_id=rnd.choices(
+                        ids_categorias, cum_weights=pesos_categorias
+                    )[0],
+                    author_id=rnd.choice(ids_usuarios),
+                    status=estado,
+                    creation_date=creacion,
+                    publication_date=creacion if estado == Post.PUBLISHED else None,
+                    version=rnd.randint(1, 3),
+                )
+            )
+
+        for post in lote:
+            extractos.actualizar(post)
+
+        with transaction.atomic():
+            Post.objects.bulk_create(_normalizar(lote))
+
+            # bulk_create no dispara post_save, por lo que el indice y los tags se
+            # cargan aqui
+            get_backend().indexar_lote(lote)
+            etiquetas.sincronizar_lote(lote)
+
+            _generar_relaciones(gen, lote, ids_usuarios)
+
+        creados += len(lote)
+
+    # bulk_create no dispara m2m_changed
+    favoritos.reconciliar()
+    resultados.invalidar()
+
+
+def _generar_relaciones(gen: _Generador, posts: list[Post], ids_usuarios) -> None:
+    """
+    Genera los favoritos, versiones anteriores y reportes de un lote de posts.
+    """
+    rnd = gen.rnd
+    Favorito = Post.favorites.through
+
+    favoritos, versiones, reportes = [], [], []
+    for post in posts:
+        # pocos posts concentran la mayoria de los favoritos
+        cantidad = min(int(rnd.paretovariate(1.5)) - 1, len(ids_usuarios))
+        favoritos.extend(
+            Favorito(post_id=post.id, userprofile_id=usuario)
+            for usuario in rnd.sample(ids_usuarios, cantidad)
+        )
+
+        versiones.extend(
+            Version(
+                post_id=post.id,
+                title=post.title,
+                content=post.content,
+                category_id=post.category_id,
+                status=Post.DRAFT,
+                author_id=post.author_id,
+                tags=post.tags,
+                version=v,
+            )
+            for v in range(1, post.version)
+        )
+
+        if rnd.random() < 0.02:
+            reportes.append(
+                Report(
+                    content_id=post.id,
+                    user_id=rnd.choice(ids_usuarios),
+                    reason=rnd.choice(Report.REASON_CHOICES)[0],
+                    description=gen.texto(15),
+                )
+            )
+
+    Favorito.objects.bulk_create(favoritos, batch_size=5000, ignore_conflicts=True)
+    Version.objects.bulk_create(versiones, batch_size=1000)
+    Report.objects.bulk_create(reportes)
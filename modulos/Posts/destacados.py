@@ -0,0 +1,116 @@
+"""
+Post destacado del home.
+
+Los administradores destacan posts agregando filas a `Destacado`. El post destacado
+del momento es el del destacado vigente (comenzado y no terminado) agregado mas
+recientemente, siempre que el post este publicado, activo y no haya expirado. Un
+destacado puede programarse con una fecha de comienzo futura y una fecha de fin.
+
+El post destacado se resuelve una vez y se guarda en el cache compartido (ver
+`modulos.cache_compartido`) junto con la generacion de los destacados y el momento
+hasta el que es valido (el proximo comienzo o fin de un destacado, o la expiracion
+del post). La generacion cambia cuando se guarda o elimina un destacado o un post
+(ver `modulos.Posts.signals`), y el valor guardado vence a los `TIEMPO` segundos
+aunque no cambie nada, por lo que una invalidacion perdida no muestra un post
+indefinidamente. Cada visita al home solo lee del cache, en vez de consultar la
+tabla de destacados.
+"""
+
+import math
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from modulos.Posts.models import Destacado, Post
+
+_CLAVE_GENERACION = "destacados:generacion"
+_CLAVE_ACTUAL = "destacados:actual"
+
+# Tiempo maximo (en segundos) que se guarda el post destacado resuelto
+TIEMPO = getattr(settings, "DESTACADOS_TIEMPO", 60 * 5)
+
+
+def _generacion() -> str:
+    generacion = cache.get(_CLAVE_GENERACION)
+    if generacion is None:
+        # si la clave es expulsada del cache, la nueva generacion no coincide con
+        # las resueltas anteriormente
+        cache.add(_CLAVE_GENERACION, uuid.uuid4().hex, timeout=None)
+        generacion = cache.get(_CLAVE_GENERACION)
+    return generacion
+
+
+def resolver(ahora=None):
+    """
+    Consulta el post destacado en el momento indicado.
+
+    Returns:
+        tuple: El post destacado (o None) y el momento hasta el que es valido (o None
+        si no cambia mientras no se modifiquen los destacados o los posts).
+    """
+    ahora = ahora or timezone.now()
+
+    vigente = (
+        Destacado.objects.filter(
+            Q(end_date__isnull=True) | Q(end_date__gt=ahora),
+            Q(post__expiration_date__isnull=True) | Q(post__expiration_date__gt=ahora),
+            date__lte=ahora,
+            post__status=Post.PUBLISHED,
+            post__active=True,
+        )
+        .order_by("-date", "-id")
+        .values_list("post_id", "end_date", "post__expiration_date")
+        .first()
+    )
+
+    # el proximo destacado programado puede reemplazar al vigente
+    limites = [
+        Destacado.objects.filter(date__gt=ahora).aggregate(proximo=Min("date"))[
+            "proximo"
+        ]
+    ]
+
+    post = None
+    if vigente is not None:
+        post_id, fin, expiracion = vigente
+        post = Post.objects.tarjetas().filter(id=post_id).first()
+        limites += [fin, expiracion]
+
+    limites = [limite for limite in limites if limite is not None]
+    return post, min(limites, default=None)
+
+
+def actual():
+    """
+    Retorna el post destacado del momento (o None), resolviendolo solo si los
+    destacados cambiaron o si el valor guardado dejo de ser valido.
+    """
+    guardados = cache.get_many([_CLAVE_GENERACION, _CLAVE_ACTUAL])
+    generacion = guardados.get(_CLAVE_GENERACION) or _generacion()
+    ahora = timezone.now()
+
+    if _CLAVE_ACTUAL in guardados:
+        generacion_actual, hasta, post = guardados[_CLAVE_ACTUAL]
+        if generacion_actual == generacion and (hasta is None or ahora < hasta):
+            return post
+
+    # la generacion se leyo antes de resolver: un cambio durante la consulta deja
+    # el valor invalidado
+    post, hasta = resolver(ahora)
+    tiempo = TIEMPO
+    if hasta is not None:
+        tiempo = max(1, min(TIEMPO, math.ceil((hasta - ahora).total_seconds())))
+    cache.set(_CLAVE_ACTUAL, (generacion, hasta, post), tiempo)
+    return post
+
+
+def invalidar() -> None:
+    """
+    Invalida el post destacado resuelto en todos los procesos.
+    """
+    # una generacion nueva y unica, escrita de una vez (ver `modulos.secciones`)
+    cache.set(_CLAVE_GENERACION, uuid.uuid4().hex, timeout=None)
+    cache.delete(_CLAVE_ACTUAL)
@@ -0,0 +1,201 @@
+"""
+Tags de los posts.
+
+Los tags se editan como texto separado por comas (`Post.tags`). Cada vez que un post
+es guardado, sus tags se sincronizan con las tablas `Tag` y `PostTag` (ver
+`modulos.Posts.signals`), que permiten filtrar por tag con un indice y obtener la
+nube de tags sin recorrer los posts.
+
+`Tag.cantidad` (cantidad de posts publicados y activos con el tag) se mantiene de
+forma incremental: cada fila de `PostTag` indica si el post se contaba en la ultima
+sincronizacion (`visible`), por lo que solo se actualizan los contadores de los tags
+agregados, quitados o cuyo post cambio de visibilidad.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from modulos.normalizacion import normalizar
+from modulos.Posts.buscador import nombres
+from modulos.Posts.models import Post, PostTag, Tag
+
+# Largo maximo del nombre de un tag (mismo valor que `Tag.name` y
+# `Tag.name_normalizado`)
+MAX_LARGO = 80
+
+
+def clave(nombre: str) -> str:
+    """
+    Retorna el nombre normalizado de un tag (`Tag.name_normalizado`). Se recorta
+    luego de normalizar, ya que la normalizacion puede alargar el texto (ej: "ß" se
+    convierte en "ss").
+    """
+    return normalizar(nombre)[:MAX_LARGO]
+
+
+def separar(tags: str | None) -> list[str]:
+    """
+    Separa el texto de los tags de un post en la lista de nombres, sin repetir (sin
+    distinguir mayusculas ni acentos) y en el orden en que aparecen.
+
+    Ejemplo:
+        >>> separar(" Python, web,,python ")
+        ['Python', 'web']
+    """
+    vistos = {}
+    for nombre in (tags or "").split(","):
+        nombre = nombre.strip()[:MAX_LARGO]
+        if nombre and clave(nombre) not in vistos:
+            vistos[clave(nombre)] = nombre
+    return list(vistos.values())
+
+
+def _visible(post: Post) -> bool:
+    return post.status == Post.PUBLISHED and post.active
+
+
+def _obtener_tags(nombres_tags: list[str]) -> dict[str, int]:
+    """
+    Retorna los ids de los tags (por nombre normalizado), creando los que no existen.
+    """
+    normalizados = {clave(n): n for n in nombres_tags}
+    if not normalizados:
+        return {}
+
+    ids = dict(
+        Tag.objects.filter(name_normalizado__in=normalizados).values_list(
+            "name_normalizado", "id"
+        )
+    )
+
+    faltantes = [n for n in normalizados if n not in ids]
+    if faltantes:
+        # bulk_create no llama a `save`, por lo que el nombre normalizado se asigna aqui
+        Tag.objects.bulk_create(
+            [Tag(name=normalizados[n], name_normalizado=n) for n in faltantes],
+            ignore_conflicts=True,
+        )
+        ids.update(
+            Tag.objects.filter(name_normalizado__in=faltantes).values_list(
+                "name_normalizado", "id"
+            )
+        )
+        nombres.invalidar(nombres.RELACION_TAG)
+
+    return ids
+
+
+def _sumar(ids, cantidad: int) -> None:
+    if ids:
+        Tag.objects.filter(id__in=ids).update(cantidad=F("cantidad") + cantidad)
+
+
+def sincronizar(post: Post) -> None:
+    """
+    Actualiza los tags de un post a partir de su campo `tags`, y los contadores de
+    los tags afectados.
+    """
+    visible = _visible(post)
+
+    with transaction.atomic():
+        actuales = {pt.tag_id: pt for pt in PostTag.objects.filter(post=post)}
+        nombres_tags = separar(post.tags)
+        ids = _obtener_tags(nombres_tags)
+        ids = [ids[clave(nombre)] for nombre in nombres_tags]
+
+        agregados = [id for id in ids if id not in actuales]
+        quitados = [pt for id, pt in actuales.items() if id not in ids]
+        cambiados = [
+            pt for id, pt in actuales.items() if id in ids and pt.visible != visible
+        ]
+
+        # se crean en el orden en que aparecen en `tags`
+        PostTag.objects.bulk_create(
+            [PostTag(post=post, tag_id=id, visible=visible) for id in agregados]
+        )
+        PostTag.objects.filter(id__in=[pt.id for pt in quitados]).delete()
+        PostTag.objects.filter(id__in=[pt.id for pt in cambiados]).update(
+            visible=visible
+        )
+
+        restados = [pt.tag_id for pt in quitados if pt.visible]
+        if visible:
+            _sumar(agregados + [pt.tag_id for pt in cambiados], 1)
+        else:
+            # los tags cambiados pertenecen a un post que dejo de estar visible
+            restados += [pt.tag_id for pt in cambiados]
+        _sumar(restados, -1)
+
+
+def eliminar(post: Post) -> None:
+    """
+    Descuenta un post que sera eliminado de los contadores de sus tags (las filas de
+    `PostTag` se eliminan en cascada).
+    """
+    _sumar(
+        list(
+            PostTag.objects.filter(post=post, visible=True).values_list(
+                "tag_id", flat=True
+            )
+        ),
+        -1,
+    )
+
+
+def sincronizar_lote(posts: list[Post]) -> None:
+    """
+    Crea los tags de posts nuevos insertados con `bulk_create` (que no dispara las
+    senales de guardado).
+    """
+    tags = {post.id: separar(post.tags) for post in posts}
+    ids = _obtener_tags(
+        [nombre for nombres_tags in tags.values() for nombre in nombres_tags]
+    )
+
+    PostTag.objects.bulk_create(
+        [
+            PostTag(post_id=post.id, tag_id=ids[clave(nombre)], visible=_visible(post))
+            for post in posts
+            for nombre in tags[post.id]
+        ],
+        batch_size=5000,
+    )
+    recalcular_cantidades(set(ids.values()))
+
+
+def recalcular_cantidades(ids=None) -> None:
+    """
+    Recalcula los contadores de los tags indicados (de todos si no se indican).
+    """
+    cantidad = (
+        PostTag.objects.filter(tag=OuterRef("pk"), visible=True)
+        .values("tag")
+        .annotate(cantidad=Count("id"))
+        .values("cantidad")
+    )
+    tags = Tag.objects.all() if ids is None else Tag.objects.filter(id__in=ids)
+    tags.update(
+        cantidad=Coalesce(Subquery(cantidad), Value(0), output_field=IntegerField())
+    )
+
+
+def nube(cantidad: int = 20) -> list[Tag]:
+    """
+    Retorna los tags con mas posts publicados, ordenados por nombre.
+    """
+    populares = Tag.objects.filter(cantidad__gt=0).order_by("-cantidad", "id")[
+        :cantidad
+    ]
+    return sorted(populares, key=lambda tag: tag.name_normalizado)
+
+
+def tags_de_post(post: Post) -> list[str]:
+    """
+    Retorna los nombres de los tags de un post, en el orden en que fueron agregados.
+    """
+    return list(
+        PostTag.objects.filter(post=post)
+        .order_by("id")
+        .values_list("tag__name", flat=True)
+    )
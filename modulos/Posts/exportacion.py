@@ -0,0 +1,101 @@
+"""
+Exportacion de los resultados de una busqueda en formato CSV o JSONL.
+
+Las filas se generan a medida que se envian al cliente (`StreamingHttpResponse`) y
+los posts se leen de la base de datos por bloques (`QuerySet.iterator`), por lo que
+la memoria utilizada no depende de la cantidad de resultados.
+"""
+
+import csv
+import json
+
+from django.urls import reverse
+
+from modulos.Posts.buscador import buscador
+
+FORMATO_CSV = "csv"
+FORMATO_JSONL = "jsonl"
+
+CONTENT_TYPES = {
+    FORMATO_CSV: "text/csv; charset=utf-8",
+    FORMATO_JSONL: "application/x-ndjson; charset=utf-8",
+}
+
+# Cantidad de posts leidos de la base de datos por bloque
+CHUNK_SIZE = 500
+
+COLUMNAS = [
+    "id",
+    "titulo",
+    "estado",
+    "categoria",
+    "autor",
+    "tags",
+    "fecha_creacion",
+    "fecha_publicacion",
+    "url",
+]
+
+
+class _Eco:
+    """
+    Objeto con la interfaz de un archivo que retorna lo que se escribe en el, para
+    utilizar `csv.writer` sin acumular las filas en memoria.
+    """
+
+    def write(self, valor):
+        return valor
+
+
+def _posts(input: str):
+    qs = buscador.generate_query_set(input).execute()
+    return (
+        qs.select_related("category", "author")
+        .only(
+            "id",
+            "title",
+            "status",
+            "tags",
+            "creation_date",
+            "publication_date",
+            "category__name",
+            "author__username",
+        )
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+def _fila(post, build_absolute_uri) -> dict:
+    return {
+        "id": post.id,
+        "titulo": post.title,
+        "estado": post.status,
+        "categoria": post.category.name,
+        "autor": post.author.username if post.author_id else None,
+        "tags": post.tags,
+        "fecha_creacion": post.creation_date.isoformat(),
+        "fecha_publicacion": (
+            post.publication_date.isoformat() if post.publication_date else None
+        ),
+        "url": build_absolute_uri(reverse("post_detail", args=[post.id])),
+    }
+
+
+def filas(input: str, formato: str, build_absolute_uri):
+    """
+    Generador de las lineas del archivo exportado con los resultados de la busqueda.
+
+    Args:
+        input (str): Consulta del buscador.
+        formato (str): `FORMATO_CSV` o `FORMATO_JSONL`.
+        build_absolute_uri (callable): Funcion que convierte una ruta en una URL
+            absoluta (`request.build_absolute_uri`).
+    """
+    if formato == FORMATO_CSV:
+        writer = csv.DictWriter(_Eco(), fieldnames=COLUMNAS)
+        yield writer.writeheader()
+        for post in _posts(input):
+            yield writer.writerow(_fila(post, build_absolute_uri))
+    else:
+        for post in _posts(input):
+            yield json.dumps(_fila(post, build_absolute_uri), ensure_ascii=False) + "\n"
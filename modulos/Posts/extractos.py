@@ -0,0 +1,81 @@
+"""
+Extracto, cantidad de palabras y tiempo de lectura de los posts.
+
+Las listas de posts (home, categorias, favoritos, kanban) muestran un extracto en
+texto plano del contenido. Para no cargar el contenido completo (markdown) de cada
+post en cada pagina, el extracto se calcula al guardar el post y se guarda en
+`Post.excerpt`, junto con `Post.word_count` y `Post.reading_time`. Las listas
+cargan los posts sin el contenido (`defer("content")`).
+
+Ejemplo:
+    >>> texto_plano("# Titulo\\n\\nUn **enlace** a [MakeX](https://makex.com)")
+    'Titulo Un enlace a MakeX'
+"""
+
+import re
+
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+# Largo maximo (en caracteres) del extracto
+LARGO = 280
+
+# Velocidad de lectura utilizada para estimar el tiempo de lectura
+PALABRAS_POR_MINUTO = 200
+
+# Columnas calculadas a partir de `content`
+COLUMNAS = ["excerpt", "word_count", "reading_time"]
+
+_BLOQUES_CODIGO = re.compile(r"^(```|~~~).*?^\1[^\n]*$", re.MULTILINE | re.DOTALL)
+_IMAGENES = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_ENLACES = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_MARCAS = re.compile(r"^\s{0,3}(#{1,6}|>+|[-*+]|\d+\.)\s+|[*_`~|]+", re.MULTILINE)
+_ESPACIOS = re.compile(r"\s+")
+_PALABRAS = re.compile(r"\w+")
+
+
+def texto_plano(markdown: str) -> str:
+    """
+    Retorna el contenido markdown como texto plano, en una sola linea: sin bloques de
+    codigo, imagenes, etiquetas html ni marcas de formato. De los enlaces solo se
+    conserva el texto.
+    """
+    texto = _BLOQUES_CODIGO.sub(" ", markdown or "")
+    texto = _IMAGENES.sub(" ", texto)
+    texto = _ENLACES.sub(r"\1", texto)
+    texto = _MARCAS.sub("", strip_tags(texto))
+    return _ESPACIOS.sub(" ", texto).strip()
+
+
+def tiempo_lectura(palabras: int) -> int:
+    """
+    Tiempo de lectura estimado (en minutos, como minimo 1) de una cantidad de
+    palabras.
+    """
+    return max(1, round(palabras / PALABRAS_POR_MINUTO))
+
+
+def actualizar(post, update_fields=None):
+    """
+    Actualiza el extracto, la cantidad de palabras y el tiempo de lectura de un post
+    a partir de su contenido. Se utiliza desde `Post.save`.
+
+    Args:
+        post (Post): Post a actualizar.
+        update_fields (iterable): `update_fields` recibido por `save`.
+
+    Returns:
+        `update_fields` junto con las columnas calculadas si contiene `content` (None
+        si no se indico).
+    """
+    if update_fields is not None and "content" not in update_fields:
+        return update_fields
+
+    texto = texto_plano(post.content)
+    post.word_count = len(_PALABRAS.findall(texto))
+    post.reading_time = tiempo_lectura(post.word_count)
+    post.excerpt = Truncator(texto).chars(LARGO)
+
+    if update_fields is None:
+        return None
+    return set(update_fields) | set(COLUMNAS)
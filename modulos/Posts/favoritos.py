@@ -0,0 +1,175 @@
+"""
+Contadores de favoritos.
+
+`Post.favorite_count` guarda la cantidad de favoritos de cada post y
+`Category.favorite_count` la suma de los favoritos de los posts publicados y activos
+de cada categoria. Los "populares" del home se obtienen ordenando por esas columnas
+(con un indice), sin agregar la tabla de favoritos en cada pagina.
+
+Los contadores se actualizan con expresiones `F()` (sin leer el valor anterior)
+cuando se agregan o quitan favoritos y cuando un post cambia de categoria o de
+visibilidad (ver `modulos.Posts.signals`). El comando `reconciliar_favoritos`
+los recalcula a partir de la tabla de favoritos.
+"""
+
+from collections import Counter
+
+from django.db.models import (Count, F, IntegerField, OuterRef, Subquery, Sum,
+                              Value)
+from django.db.models.functions import Coalesce
+
+from modulos.Categories.models import Category
+from modulos.Posts.models import Post
+
+Favorito = Post.favorites.through
+
+
+def _visible(status: str, active: bool) -> bool:
+    return status == Post.PUBLISHED and active
+
+
+def _sumar_categorias(cantidades: Counter) -> None:
+    for category_id, cantidad in cantidades.items():
+        if cantidad:
+            Category.objects.filter(id=category_id).update(
+                favorite_count=F("favorite_count") + cantidad
+            )
+
+
+def sumar(cantidades: Counter) -> None:
+    """
+    Suma a los contadores de los posts (y de sus categorias) la cantidad de
+    favoritos agregados (o quitados, si es negativa).
+
+    Args:
+        cantidades (Counter): Id del post -> cantidad de favoritos.
+    """
+    por_cantidad = {}
+    for post_id, cantidad in cantidades.items():
+        if cantidad:
+            por_cantidad.setdefault(cantidad, []).append(post_id)
+
+    # normalmente todos los posts suman lo mismo (1 o -1): una sola actualizacion
+    for cantidad, ids in por_cantidad.items():
+        Post.objects.filter(id__in=ids).update(
+            favorite_count=F("favorite_count") + cantidad
+        )
+
+    categorias = Counter()
+    for post_id, category_id in Post.objects.filter(
+        id__in=cantidades.keys(), status=Post.PUBLISHED, active=True
+    ).values_list("id", "category_id"):
+        categorias[category_id] += cantidades[post_id]
+    _sumar_categorias(categorias)
+
+
+def existentes(instance, reverse: bool, pk_set) -> Counter:
+    """
+    Retorna la cantidad de favoritos por post de las filas existentes de la tabla de
+    favoritos afectadas por un `remove` o `clear` (`pk_set` None).
+
+    Args:
+        instance: Post (o usuario si `reverse`) cuya relacion se modifica.
+        reverse (bool): La relacion se modifica desde el usuario.
+        pk_set (set): Ids de los usuarios (o posts si `reverse`) quitados.
+    """
+    if reverse:
+        filas = Favorito.objects.filter(userprofile_id=instance.pk)
+        if pk_set is not None:
+            filas = filas.filter(post_id__in=pk_set)
+        return Counter(filas.values_list("post_id", flat=True))
+
+    filas = Favorito.objects.filter(post_id=instance.pk)
+    if pk_set is not None:
+        filas = filas.filter(userprofile_id__in=pk_set)
+    return Counter({instance.pk: filas.count()})
+
+
+def estado_guardado(post: Post):
+    """
+    Retorna (categoria, visible, favoritos) de un post tal como esta guardado, o
+    None si el post es nuevo.
+    """
+    if post.pk is None:
+        return None
+
+    guardado = (
+        Post.objects.filter(pk=post.pk)
+        .values_list("category_id", "status", "active", "favorite_count")
+        .first()
+    )
+    if guardado is None:
+        return None
+
+    category_id, status, active, favoritos = guardado
+    return category_id, _visible(status, active), favoritos
+
+
+def post_guardado(post: Post, anterior) -> None:
+    """
+    Actualiza los contadores de las categorias cuando un post cambia de categoria o
+    de visibilidad.
+
+    Args:
+        post (Post): Post guardado.
+        anterior: Estado previo al guardado (ver `estado_guardado`).
+    """
+    if anterior is None:
+        return
+
+    category_id, visible, favoritos = anterior
+    if not favoritos:
+        return
+
+    categorias = Counter()
+    if visible:
+        categorias[category_id] -= favoritos
+    if _visible(post.status, post.active):
+        categorias[post.category_id] += favoritos
+    _sumar_categorias(categorias)
+
+
+def post_eliminado(post: Post) -> None:
+    """
+    Descuenta los favoritos de un post que sera eliminado del contador de su
+    categoria (las filas de favoritos se eliminan en cascada, sin `m2m_changed`).
+    """
+    anterior = estado_guardado(post)
+    if anterior is not None and anterior[1]:
+        _sumar_categorias(Counter({anterior[0]: -anterior[2]}))
+
+
+def reconciliar() -> tuple[int, int]:
+    """
+    Recalcula todos los contadores a partir de la tabla de favoritos.
+
+    Returns:
+        tuple[int, int]: Cantidad de posts y de categorias actualizados.
+    """
+    favoritos = (
+        Favorito.objects.filter(post_id=OuterRef("pk"))
+        .values("post_id")
+        .annotate(cantidad=Count("id"))
+        .values("cantidad")
+    )
+    posts = Post.objects.update(
+        favorite_count=Coalesce(
+            Subquery(favoritos), Value(0), output_field=IntegerField()
+        )
+    )
+
+    totales = (
+        Post.objects.filter(
+            category_id=OuterRef("pk"), status=Post.PUBLISHED, active=True
+        )
+        .values("category_id")
+        .annotate(total=Sum("favorite_count"))
+        .values("total")
+    )
+    categorias = Category.objects.update(
+        favorite_count=Coalesce(
+            Subquery(totales), Value(0), output_field=IntegerField()
+        )
+    )
+
+    return posts, categorias
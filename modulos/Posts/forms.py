@@ -4,7 +4,7 @@ from django.forms import CharField, Form, ModelForm
 
 from modulos.Categories.models import Category
 
-from .models import Post  # Ensure you have imported the Post model
+from .models import Destacado, Post  # Ensure you have imported the Post model
 
 
 # Formulario para modales de confirmacion con mensaje
@@ -87,3 +87,32 @@ class SearchPostForm(forms.Form):
         ),
         label="Buscar",
     )
+
+
+class DestacadoForm(forms.ModelForm):
+    """
+    Formulario para destacar un post desde una fecha (por defecto, en el momento) y,
+    opcionalmente, hasta una fecha de fin.
+    """
+
+    class Meta:
+        model = Destacado
+        fields = ["date", "end_date"]
+        widgets = {
+            "date": forms.DateTimeInput(
+                attrs={"type": "datetime-local", "class": "custom-date-input"}
+            ),
+            "end_date": forms.DateTimeInput(
+                attrs={"type": "datetime-local", "class": "custom-date-input"}
+            ),
+        }
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date = cleaned_data.get("date")
+        end_date = cleaned_data.get("end_date")
+        if date and end_date and end_date <= date:
+            raise ValidationError(
+                "La fecha de fin debe ser posterior a la fecha de destacado."
+            )
+        return cleaned_data
@@ -0,0 +1,212 @@
+import json
+import subprocess
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import RequestFactory, override_settings
+from django.utils import timezone
+
+from modulos.Categories.models import Category
+from modulos.Categories.views import CategoryDetailView
+from modulos.Posts.buscador import buscador
+from modulos.Posts.buscador.backends import BACKENDS, get_backend
+from modulos.Posts.buscador.benchmark import (CONSULTAS, medir, medir_consulta,
+                                              medir_lexer)
+from modulos.Posts.corpus import generar_corpus
+from modulos.Posts.models import Post
+from modulos.Posts.views import home_view, kanban_board
+from modulos.UserProfile.models import UserProfile
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _commit_actual() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia del buscador y de las vistas principales (home, detalle de "
+        "categoria y tablero kanban) a distintos tamanos de corpus y guarda un reporte "
+        "JSON para comparar entre commits. Las vistas se miden con el cache vacio "
+        "(se vacia antes de cada repeticion) y con el cache cargado. El corpus "
+        "sintetico se elimina al terminar salvo que se use --conservar. Por defecto "
+        "se mide hasta 1.000.000 de posts, para verificar que la latencia del "
+        "buscador se mantiene plana a medida que crece el corpus."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tamanos",
+            nargs="+",
+            type=int,
+            default=[1_000, 10_000, 100_000, 1_000_000],
+            help="Cantidades de posts sobre las que se realizan las mediciones.",
+        )
+        parser.add_argument("--repeticiones", type=int, default=20)
+        parser.add_argument(
+            "--salida",
+            default="benchmark.json",
+            help="Archivo en el que se guarda el reporte.",
+        )
+        parser.add_argument(
+            "--conservar",
+            action="store_true",
+            help="No eliminar el corpus sintetico generado.",
+        )
+        parser.add_argument(
+            "--backend",
+            choices=sorted(BACKENDS),
+            help=(
+                "Backend de busqueda a medir (por defecto, el del motor de base de "
+                "datos). Con 'indice' se mide el indice invertido tambien en SQLite "
+                "y PostgreSQL. El corpus sintetico se indexa con este backend; los "
+                "posts existentes deben estar indexados (ver reindexar_buscador)."
+            ),
+        )
+        parser.add_argument(
+            "--lexer",
+            action="store_true",
+            help="Solo comparar el lexer actual con la implementacion original.",
+        )
+
+    def handle(self, *args, **options):
+        if options["lexer"]:
+            self._medir_lexer(options["repeticiones"])
+            return
+
+        backend = options["backend"] or get_backend().nombre
+        reporte = {
+            "commit": _commit_actual(),
+            "fecha": timezone.now().isoformat(),
+            "base_de_datos": connection.vendor,
+            "backend": backend,
+            "repeticiones": options["repeticiones"],
+            "mediciones": [],
+        }
+
+        with override_settings(BUSCADOR_BACKEND=backend):
+            # las consultas compiladas no deben mezclar backends
+            buscador.limpiar_cache()
+            try:
+                with transaction.atomic():
+                    for tamano in sorted(options["tamanos"]):
+                        reporte["mediciones"].append(
+                            self._medir(tamano, options["repeticiones"])
+                        )
+
+                    if not options["conservar"]:
+                        raise _Rollback()
+            except _Rollback:
+                self.stdout.write("Corpus sintetico descartado.")
+
+        with open(options["salida"], "w") as archivo:
+            json.dump(reporte, archivo, indent=2)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Reporte guardado en {options['salida']}")
+        )
+
+    def _medir(self, tamano, repeticiones):
+        faltantes = tamano - Post.objects.count()
+        if faltantes > 0:
+            self.stdout.write(f"Generando {faltantes} posts...")
+            generar_corpus(
+                usuarios=max(faltantes // 100, 1),
+                categorias=10,
+                posts=faltantes,
+                semilla=tamano,
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"\n{tamano} posts"))
+        medicion = {"posts": tamano, "busquedas": [], "vistas": {}}
+
+        for consulta in CONSULTAS:
+            r = medir_consulta(consulta, repeticiones)
+            medicion["busquedas"].append(r)
+            self._imprimir(r["consulta"], r, f" resultados={r['resultados']}")
+
+        for nombre, vista in self._vistas():
+            # las secciones de las vistas se guardan en el cache: con el cache vacio
+            # se mide el costo de calcularlas, con el cache cargado el de leerlas
+            fria = medir(vista, repeticiones, preparar=cache.clear)
+            vista()
+            caliente = medir(vista, repeticiones)
+            medicion["vistas"][nombre] = {
+                "cache_vacio": fria,
+                "cache_cargado": caliente,
+            }
+            self._imprimir(f"{nombre} (cache vacio)", fria)
+            self._imprimir(f"{nombre} (cache cargado)", caliente)
+
+        return medicion
+
+    def _vistas(self):
+        """
+        Retorna las vistas a medir, listas para ser invocadas sin argumentos.
+        """
+        factory = RequestFactory()
+
+        def peticion(path, user):
+            request = factory.get(path)
+            request.user = user
+            return request
+
+        usuario, _ = UserProfile.objects.get_or_create(
+            username="benchmark",
+            defaults={"email": "benchmark@example.com", "is_superuser": True},
+        )
+
+        # la categoria con mas posts
+        categoria = (
+            Category.objects.annotate(cantidad=Count("post"))
+            .order_by("-cantidad")
+            .first()
+        )
+        detalle_categoria = CategoryDetailView.as_view()
+
+        vistas = [
+            ("home", lambda: home_view(peticion("/", AnonymousUser()))),
+            (
+                "home (busqueda)",
+                lambda: home_view(peticion(f"/?input={CONSULTAS[0]}", AnonymousUser())),
+            ),
+            ("kanban_board", lambda: kanban_board(peticion("/posts/kanban/", usuario))),
+        ]
+
+        if categoria is not None:
+            vistas.append(
+                (
+                    "category_detail",
+                    lambda: detalle_categoria(
+                        peticion(f"/categories/{categoria.pk}/", usuario),
+                        pk=categoria.pk,
+                    ),
+                )
+            )
+
+        return vistas
+
+    def _medir_lexer(self, repeticiones):
+        for r in medir_lexer(repeticiones):
+            self.stdout.write(
+                f"  {r['entrada']:<25} largo={r['largo']:<6} "
+                f"actual={r['actual_ms']:8.3f}ms legacy={r['legacy_ms']:8.3f}ms "
+                f"({r['legacy_ms'] / r['actual_ms']:.1f}x)"
+            )
+
+    def _imprimir(self, nombre, r, extra=""):
+        self.stdout.write(
+            f"  {nombre:<40} mediana={r['mediana_ms']:8.2f}ms "
+            f"p95={r['p95_ms']:8.2f}ms{extra}"
+        )
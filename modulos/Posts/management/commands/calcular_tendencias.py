@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from modulos import paginas, secciones
+from modulos.Posts import tendencias
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula el puntaje de tendencia de los posts a partir de sus favoritos y "
+        "vistas recientes. Debe ejecutarse periodicamente (ej: cada hora). Las "
+        "secciones y las paginas del home se invalidan en el cache compartido, por lo "
+        "que el cambio se ve en todos los procesos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Cantidad de posts actualizados por consulta.",
+        )
+
+    def handle(self, *args, **options):
+        actualizados = tendencias.calcular(options["batch_size"])
+        if actualizados:
+            secciones.invalidar("tendencias")
+            paginas.purgar("home")
+        self.stdout.write(
+            self.style.SUCCESS(f"Puntajes de tendencia actualizados: {actualizados}.")
+        )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from modulos import paginas
+
+
+class Command(BaseCommand):
+    help = (
+        "Muestra la cantidad de aciertos y fallos del cache de paginas de los "
+        "visitantes anonimos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reiniciar",
+            action="store_true",
+            help="Reinicia los contadores luego de mostrarlos.",
+        )
+
+    def handle(self, *args, **options):
+        estadisticas = paginas.estadisticas()
+        self.stdout.write(
+            f"Aciertos: {estadisticas['aciertos']}\n"
+            f"Fallos: {estadisticas['fallos']}\n"
+            f"Tasa de aciertos: {estadisticas['tasa']:.1%}"
+        )
+
+        if options["reiniciar"]:
+            paginas.reiniciar_estadisticas()
+            self.stdout.write(self.style.SUCCESS("Contadores reiniciados."))
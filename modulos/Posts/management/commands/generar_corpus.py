@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from modulos.Posts.corpus import generar_corpus
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera un corpus sintetico de usuarios, categorias, posts, favoritos, "
+        "versiones y reportes para realizar mediciones de rendimiento."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--usuarios", type=int, default=100)
+        parser.add_argument("--categorias", type=int, default=10)
+        parser.add_argument("--posts", type=int, default=1000)
+        parser.add_argument("--semilla", type=int, default=0)
+
+    def handle(self, *args, **options):
+        generar_corpus(
+            usuarios=options["usuarios"],
+            categorias=options["categorias"],
+            posts=options["posts"],
+            semilla=options["semilla"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{options['posts']} posts generados para {options['usuarios']} "
+                f"usuarios y {options['categorias']} categorias."
+            )
+        )
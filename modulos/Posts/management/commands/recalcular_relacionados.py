@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from modulos.Posts import relacionados
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula los vectores TF-IDF y las publicaciones relacionadas de todos los "
+        "posts publicados. Necesario luego de cargas masivas que no disparan las "
+        "senales de guardado."
+    )
+
+    def handle(self, *args, **kwargs):
+        total = relacionados.recalcular()
+        self.stdout.write(
+            self.style.SUCCESS(f"Publicaciones relacionadas de {total} posts.")
+        )
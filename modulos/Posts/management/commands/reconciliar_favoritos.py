@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from modulos.Posts import favoritos
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula los contadores de favoritos de los posts y de las categorias a "
+        "partir de la tabla de favoritos."
+    )
+
+    def handle(self, *args, **kwargs):
+        posts, categorias = favoritos.reconciliar()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Favoritos recalculados: {posts} posts y {categorias} categorias."
+            )
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from modulos.Posts import para_ti
+from modulos.UserProfile.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstruye el feed "Para ti" de todos los usuarios a partir de sus posts '
+        "favoritos."
+    )
+
+    def handle(self, *args, **kwargs):
+        usuarios = 0
+        for usuario_id in UserProfile.objects.values_list("id", flat=True).iterator():
+            para_ti.reconstruir(usuario_id)
+            usuarios += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Feeds "Para ti" reconstruidos: {usuarios} usuarios.')
+        )
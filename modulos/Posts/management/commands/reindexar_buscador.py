@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from modulos.Posts.buscador.backends import get_backend
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye el indice del buscador a partir de todos los posts. "
+        "Necesario luego de cargas masivas que no disparan las senales de guardado."
+    )
+
+    def handle(self, *args, **kwargs):
+        backend = get_backend()
+        total = backend.reindexar()
+        self.stdout.write(
+            self.style.SUCCESS(f"{total} posts indexados ({backend.nombre}).")
+        )
@@ -0,0 +1,104 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:24
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+MAX_LARGO_TERMINO = 80
+
+PALABRA = re.compile(r"\w+")
+
+
+def normalizar(texto):
+    # copia de `modulos.normalizacion.normalizar` al momento de la migracion
+    if not texto:
+        return ""
+
+    texto = unicodedata.normalize("NFKD", texto.strip().casefold())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def extraer_terminos(texto):
+    # copia de `modulos.Posts.buscador.indice.extraer_terminos`
+    return {
+        t for t in PALABRA.findall(normalizar(texto)) if len(t) <= MAX_LARGO_TERMINO
+    }
+
+
+def usa_indice_invertido(schema_editor):
+    # el indice invertido solo se mantiene en los motores sin backend de texto
+    # completo propio (ver `modulos.Posts.buscador.backends.get_backend`)
+    nombre = getattr(settings, "BUSCADOR_BACKEND", None)
+    return (nombre or schema_editor.connection.vendor) not in ("sqlite", "postgresql")
+
+
+def indexar_posts_existentes(apps, schema_editor):
+    if not usa_indice_invertido(schema_editor):
+        return
+
+    Post = apps.get_model("Posts", "Post")
+    TerminoIndice = apps.get_model("Posts", "TerminoIndice")
+
+    entradas = []
+    for post in Post.objects.only("id", "title", "content", "tags").iterator():
+        for campo, texto in (
+            ("titulo", post.title),
+            ("contenido", post.content),
+            ("tags", post.tags),
+        ):
+            entradas.extend(
+                TerminoIndice(post_id=post.id, campo=campo, termino=termino)
+                for termino in extraer_terminos(texto)
+            )
+
+        if len(entradas) >= 10000:
+            TerminoIndice.objects.bulk_create(entradas, batch_size=1000)
+            entradas = []
+
+    TerminoIndice.objects.bulk_create(entradas, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Posts", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TerminoIndice",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("campo", models.CharField(max_length=10)),
+                ("termino", models.CharField(max_length=80)),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="terminos",
+                        to="Posts.post",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("campo", "termino", "post"),
+                        name="unique_termino_indice",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(indexar_posts_existentes, migrations.RunPython.noop),
+    ]
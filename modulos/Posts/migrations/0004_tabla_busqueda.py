@@ -0,0 +1,54 @@
+from django.db import migrations
+
+# Ver modulos.Posts.buscador.backends
+TABLA_FTS = "posts_busqueda"
+
+
+def crear_tabla_busqueda(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {TABLA_FTS} USING fts5("
+            "titulo, contenido, tags, tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {TABLA_FTS}(rowid, titulo, contenido, tags) "
+            'SELECT id, title, content, tags FROM "Posts_post"'
+        )
+
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE TABLE {TABLA_FTS} ("
+            'post_id bigint PRIMARY KEY REFERENCES "Posts_post" (id) '
+            "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "titulo tsvector NOT NULL, contenido tsvector NOT NULL, "
+            "tags tsvector NOT NULL)"
+        )
+        for columna in ("titulo", "contenido", "tags"):
+            schema_editor.execute(
+                f"CREATE INDEX {TABLA_FTS}_{columna}_gin "
+                f"ON {TABLA_FTS} USING GIN ({columna})"
+            )
+        schema_editor.execute(
+            f"INSERT INTO {TABLA_FTS} (post_id, titulo, contenido, tags) "
+            "SELECT id, to_tsvector('spanish', title), "
+            "to_tsvector('spanish', content), to_tsvector('spanish', tags) "
+            'FROM "Posts_post"'
+        )
+
+
+def eliminar_tabla_busqueda(apps, schema_editor):
+    if schema_editor.connection.vendor in ("sqlite", "postgresql"):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLA_FTS}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Posts", "0003_indice_invertido"),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_tabla_busqueda, eliminar_tabla_busqueda),
+    ]
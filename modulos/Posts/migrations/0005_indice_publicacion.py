@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Posts", "0004_tabla_busqueda"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["-publication_date", "-id"], name="post_publicacion_idx"
+            ),
+        ),
+    ]
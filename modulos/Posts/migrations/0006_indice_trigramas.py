@@ -0,0 +1,108 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:42
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def normalizar(texto):
+    # copia de `modulos.normalizacion.normalizar` al momento de la migracion
+    if not texto:
+        return ""
+
+    texto = unicodedata.normalize("NFKD", texto.strip().casefold())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def extraer_trigramas(texto):
+    # copia de `modulos.Posts.buscador.trigramas.extraer_trigramas`
+    if not texto:
+        return set()
+
+    texto = "".join(c if c.isalnum() else " " for c in normalizar(texto))
+
+    trigramas = set()
+    for palabra in texto.split():
+        palabra = f"  {palabra} "
+        trigramas.update(palabra[i : i + 3] for i in range(len(palabra) - 2))
+
+    return trigramas
+
+
+def crear_indice_trigramas(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        # en PostgreSQL la similitud se resuelve con pg_trgm sobre la tabla de posts
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for columna in ("title", "tags"):
+            schema_editor.execute(
+                f"CREATE INDEX post_{columna}_trgm "
+                f'ON "Posts_post" USING GIN ({columna} gin_trgm_ops)'
+            )
+        return
+
+    Post = apps.get_model("Posts", "Post")
+    TrigramaIndice = apps.get_model("Posts", "TrigramaIndice")
+
+    entradas = []
+    for post in Post.objects.only("id", "title", "tags").iterator():
+        for campo, texto in (("titulo", post.title), ("tags", post.tags)):
+            entradas.extend(
+                TrigramaIndice(post_id=post.id, campo=campo, trigrama=trigrama)
+                for trigrama in extraer_trigramas(texto)
+            )
+
+        if len(entradas) >= 10000:
+            TrigramaIndice.objects.bulk_create(entradas, batch_size=1000)
+            entradas = []
+
+    TrigramaIndice.objects.bulk_create(entradas, batch_size=1000)
+
+
+def eliminar_indice_trigramas(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for columna in ("title", "tags"):
+            schema_editor.execute(f"DROP INDEX IF EXISTS post_{columna}_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Posts", "0005_indice_publicacion"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TrigramaIndice",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("campo", models.CharField(max_length=10)),
+                ("trigrama", models.CharField(max_length=3)),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="trigramas",
+                        to="Posts.post",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("campo", "trigrama", "post"),
+                        name="unique_trigrama_indice",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(crear_indice_trigramas, eliminar_indice_trigramas),
+    ]
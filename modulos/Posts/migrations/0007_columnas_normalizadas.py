@@ -0,0 +1,132 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:53
+
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Ver modulos.Posts.buscador.backends
+TABLA_FTS = "posts_busqueda"
+
+MAX_LARGO_TERMINO = 80
+
+PALABRA = re.compile(r"\w+")
+
+
+def normalizar(texto):
+    # copia de `modulos.normalizacion.normalizar` al momento de la migracion
+    if not texto:
+        return ""
+
+    texto = unicodedata.normalize("NFKD", texto.strip().casefold())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def extraer_terminos(texto):
+    # copia de `modulos.Posts.buscador.indice.extraer_terminos`
+    return {
+        t for t in PALABRA.findall(normalizar(texto)) if len(t) <= MAX_LARGO_TERMINO
+    }
+
+
+def usa_indice_invertido(schema_editor):
+    # el indice invertido solo se mantiene en los motores sin backend de texto
+    # completo propio (ver `modulos.Posts.buscador.backends.get_backend`)
+    nombre = getattr(settings, "BUSCADOR_BACKEND", None)
+    return (nombre or schema_editor.connection.vendor) not in ("sqlite", "postgresql")
+
+
+def normalizar_posts(apps, schema_editor):
+    Post = apps.get_model("Posts", "Post")
+    TerminoIndice = apps.get_model("Posts", "TerminoIndice")
+
+    # los terminos del indice invertido ahora se guardan sin acentos. Con los
+    # backends de texto completo el indice no se utiliza y solo se vacia
+    TerminoIndice.objects.all().delete()
+    indexar = usa_indice_invertido(schema_editor)
+
+    posts, entradas = [], []
+    for post in Post.objects.only("id", "title", "content", "tags").iterator():
+        # la normalizacion puede superar el largo de la columna
+        post.title_normalizado = normalizar(post.title)[:255]
+        post.tags_normalizado = normalizar(post.tags)[:255]
+        post.content_normalizado = normalizar(post.content)
+        posts.append(post)
+
+        campos = (
+            ("titulo", post.title),
+            ("contenido", post.content),
+            ("tags", post.tags),
+        )
+        for campo, texto in campos if indexar else ():
+            entradas.extend(
+                TerminoIndice(post_id=post.id, campo=campo, termino=termino)
+                for termino in extraer_terminos(texto)
+            )
+
+        if len(posts) >= 1000:
+            Post.objects.bulk_update(
+                posts, ["title_normalizado", "tags_normalizado", "content_normalizado"]
+            )
+            TerminoIndice.objects.bulk_create(entradas, batch_size=1000)
+            posts, entradas = [], []
+
+    Post.objects.bulk_update(
+        posts, ["title_normalizado", "tags_normalizado", "content_normalizado"]
+    )
+    TerminoIndice.objects.bulk_create(entradas, batch_size=1000)
+
+    if schema_editor.connection.vendor == "postgresql":
+        # los tsvector y los indices de trigramas pasan a las columnas normalizadas
+        schema_editor.execute(
+            f"UPDATE {TABLA_FTS} SET "
+            "titulo = to_tsvector('spanish', p.title_normalizado), "
+            "contenido = to_tsvector('spanish', p.content_normalizado), "
+            "tags = to_tsvector('spanish', p.tags_normalizado) "
+            f'FROM "Posts_post" p WHERE {TABLA_FTS}.post_id = p.id'
+        )
+        for columna in ("title", "tags"):
+            schema_editor.execute(f"DROP INDEX IF EXISTS post_{columna}_trgm")
+            schema_editor.execute(
+                f'CREATE INDEX post_{columna}_normalizado_trgm ON "Posts_post" '
+                f"USING GIN ({columna}_normalizado gin_trgm_ops)"
+            )
+
+
+def restaurar_indices_trigramas(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for columna in ("title", "tags"):
+            schema_editor.execute(
+                f"DROP INDEX IF EXISTS post_{columna}_normalizado_trgm"
+            )
+            schema_editor.execute(
+                f"CREATE INDEX post_{columna}_trgm "
+                f'ON "Posts_post" USING GIN ({columna} gin_trgm_ops)'
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Posts", "0006_indice_trigramas"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="content_normalizado",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="tags_normalizado",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="title_normalizado",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(normalizar_posts, restaurar_indices_trigramas),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Posts", "0007_columnas_normalizadas"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FrecuenciaTermino",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("termino", models.CharField(max_length=80, unique=True)),
+                ("documentos", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="PostRelacionado",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("similitud", models.FloatField()),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="relacionados",
+                        to="Posts.post",
+                    ),
+                ),
+                (
+                    "relacionado",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="relacionados_de",
+                        to="Posts.post",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["post", "-similitud"], name="post_relacionado_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("post", "relacionado"), name="unique_post_relacionado"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="TerminoVector",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("termino", models.CharField(max_length=80)),
+                ("peso", models.FloatField()),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="vector",
+                        to="Posts.post",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("termino", "post"), name="unique_termino_vector"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,157 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:07
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+# Largo maximo del nombre de un tag
+MAX_LARGO = 80
+
+
+def normalizar(texto):
+    # copia de `modulos.normalizacion.normalizar` al momento de la migracion
+    if not texto:
+        return ""
+
+    texto = unicodedata.normalize("NFKD", texto.strip().casefold())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def clave(nombre):
+    # copia de `modulos.Posts.etiquetas.clave`: se recorta luego de normalizar
+    return normalizar(nombre)[:MAX_LARGO]
+
+
+def separar(tags):
+    # copia de `modulos.Posts.etiquetas.separar`
+    vistos = {}
+    for nombre in (tags or "").split(","):
+        nombre = nombre.strip()[:MAX_LARGO]
+        if nombre and clave(nombre) not in vistos:
+            vistos[clave(nombre)] = nombre
+    return list(vistos.values())
+
+
+def crear_tags(apps, schema_editor):
+    Post = apps.get_model("Posts", "Post")
+    Tag = apps.get_model("Posts", "Tag")
+    PostTag = apps.get_model("Posts", "PostTag")
+
+    # tags separados de cada post: [(post_id, visible, [nombres])]
+    posts = [
+        (post.id, post.status == "Publicado" and post.active, separar(post.tags))
+        for post in Post.objects.exclude(tags="")
+        .only("id", "status", "active", "tags")
+        .iterator()
+    ]
+
+    nombres = {}
+    for _, _, tags in posts:
+        for nombre in tags:
+            nombres.setdefault(clave(nombre), nombre)
+
+    Tag.objects.bulk_create(
+        [Tag(name=nombre, name_normalizado=n) for n, nombre in nombres.items()],
+        batch_size=1000,
+    )
+    ids = dict(Tag.objects.values_list("name_normalizado", "id"))
+
+    PostTag.objects.bulk_create(
+        [
+            PostTag(post_id=post_id, tag_id=ids[clave(nombre)], visible=visible)
+            for post_id, visible, tags in posts
+            for nombre in tags
+        ],
+        batch_size=5000,
+    )
+
+    cantidades = (
+        PostTag.objects.filter(visible=True)
+        .values("tag_id")
+        .annotate(cantidad=Count("id"))
+    )
+    Tag.objects.bulk_update(
+        [Tag(id=c["tag_id"], cantidad=c["cantidad"]) for c in cantidades],
+        ["cantidad"],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Posts", "0008_publicaciones_relacionadas"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=80, verbose_name="Nombre")),
+                (
+                    "name_normalizado",
+                    models.CharField(editable=False, max_length=80, unique=True),
+                ),
+                ("cantidad", models.IntegerField(db_index=True, default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="PostTag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("visible", models.BooleanField(default=False)),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="Posts.post"
+                    ),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="Posts.tag"
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="etiquetas",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="posts",
+                through="Posts.PostTag",
+                to="Posts.tag",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="posttag",
+            index=models.Index(fields=["tag", "post"], name="post_tag_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="posttag",
+            constraint=models.UniqueConstraint(
+                fields=("post", "tag"), name="unique_post_tag"
+            ),
+        ),
+        migrations.RunPython(crear_tags, migrations.RunPython.noop),
+    ]
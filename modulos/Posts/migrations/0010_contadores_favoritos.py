@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:10
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import (Count, IntegerField, OuterRef, Subquery, Sum,
+                              Value)
+from django.db.models.functions import Coalesce
+
+
+def calcular_favoritos(apps, schema_editor):
+    Post = apps.get_model("Posts", "Post")
+    Category = apps.get_model("Categories", "Category")
+    Favorito = Post.favorites.through
+
+    favoritos = (
+        Favorito.objects.filter(post_id=OuterRef("pk"))
+        .values("post_id")
+        .annotate(cantidad=Count("id"))
+        .values("cantidad")
+    )
+    Post.objects.update(
+        favorite_count=Coalesce(
+            Subquery(favoritos), Value(0), output_field=IntegerField()
+        )
+    )
+
+    totales = (
+        Post.objects.filter(category_id=OuterRef("pk"), status="Publicado", active=True)
+        .values("category_id")
+        .annotate(total=Sum("favorite_count"))
+        .values("total")
+    )
+    Category.objects.update(
+        favorite_count=Coalesce(
+            Subquery(totales), Value(0), output_field=IntegerField()
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Categories", "0003_contadores_favoritos"),
+        ("Posts", "0009_tags"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="favorite_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["status", "active", "-favorite_count", "-id"],
+                name="post_favoritos_idx",
+            ),
+        ),
+        migrations.RunPython(calcular_favoritos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:18
+
+import re
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+# Copia de `modulos.Posts.extractos` al momento de la migracion
+LARGO = 280
+PALABRAS_POR_MINUTO = 200
+COLUMNAS = ["excerpt", "word_count", "reading_time"]
+
+_BLOQUES_CODIGO = re.compile(r"^(```|~~~).*?^\1[^\n]*$", re.MULTILINE | re.DOTALL)
+_IMAGENES = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_ENLACES = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_MARCAS = re.compile(r"^\s{0,3}(#{1,6}|>+|[-*+]|\d+\.)\s+|[*_`~|]+", re.MULTILINE)
+_ESPACIOS = re.compile(r"\s+")
+_PALABRAS = re.compile(r"\w+")
+
+
+def texto_plano(markdown):
+    texto = _BLOQUES_CODIGO.sub(" ", markdown or "")
+    texto = _IMAGENES.sub(" ", texto)
+    texto = _ENLACES.sub(r"\1", texto)
+    texto = _MARCAS.sub("", strip_tags(texto))
+    return _ESPACIOS.sub(" ", texto).strip()
+
+
+def actualizar(post):
+    texto = texto_plano(post.content)
+    post.word_count = len(_PALABRAS.findall(texto))
+    post.reading_time = max(1, round(post.word_count / PALABRAS_POR_MINUTO))
+    post.excerpt = Truncator(texto).chars(LARGO)
+
+
+def calcular_extractos(apps, schema_editor):
+    Post = apps.get_model("Posts", "Post")
+
+    posts = []
+    for post in Post.objects.only("id", "content").iterator(chunk_size=1000):
+        actualizar(post)
+        posts.append(post)
+
+        if len(posts) >= 1000:
+            Post.objects.bulk_update(posts, COLUMNAS)
+            posts = []
+
+    Post.objects.bulk_update(posts, COLUMNAS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Posts", "0010_contadores_favoritos"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="excerpt",
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="reading_time",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="word_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(calcular_extractos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Categories", "0003_contadores_favoritos"),
+        ("Posts", "0011_extractos"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ActividadDiaria",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fecha", models.DateField(db_index=True)),
+                ("vistas", models.PositiveIntegerField(default=0)),
+                ("favoritos", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="trending_score",
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["status", "active", "-trending_score", "-id"],
+                name="post_tendencia_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="actividaddiaria",
+            name="post",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="actividad",
+                to="Posts.post",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="actividaddiaria",
+            constraint=models.UniqueConstraint(
+                fields=("post", "fecha"), name="unique_actividad_diaria"
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Posts", "0012_tendencias"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="destacado",
+            name="end_date",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Fin del destacado"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="destacado",
+            index=models.Index(fields=["-date"], name="destacado_fecha_idx"),
+        ),
+    ]
@@ -1,12 +1,48 @@
 from django.db import models
-from django.db.models import Count
 from django.utils.timezone import now
 
 from modulos.Categories.models import Category
+from modulos.contadores import sin_contadores
 from modulos.mdeditor.fields import MDTextField
+from modulos.normalizacion import normalizar_columnas
+from modulos.Posts import extractos
 from modulos.UserProfile.models import UserProfile
 
 
+class PostQuerySet(models.QuerySet):
+    # columnas que muestran las tarjetas y listas de posts (home, categorias,
+    # favoritos, kanban, administracion de posts, resultados de busqueda)
+    CAMPOS_TARJETA = [
+        "id",
+        "title",
+        "image",
+        "status",
+        "active",
+        "creation_date",
+        "publication_date",
+        "expiration_date",
+        "excerpt",
+        "reading_time",
+        "favorite_count",
+        "trending_score",
+        "category__id",
+        "category__name",
+        "category__moderacion",
+        "author__id",
+        "author__username",
+    ]
+
+    def tarjetas(self):
+        """
+        Posts con solo las columnas que muestran las listas, junto con su autor y su
+        categoria (en la misma consulta). No carga el contenido de los posts.
+
+        Ejemplo:
+            >>> Post.objects.filter(status=Post.PUBLISHED).tarjetas()
+        """
+        return self.select_related("author", "category").only(*self.CAMPOS_TARJETA)
+
+
 # Create your models here.
 class Post(models.Model):
     DRAFT = "Borrador"
@@ -53,22 +89,280 @@ class Post(models.Model):
         UserProfile, related_name="favorite_posts", verbose_name="Favoritos"
     )
 
+    # cantidad de favoritos, se mantiene desde `modulos.Posts.favoritos`
+    favorite_count = models.IntegerField(default=0, editable=False)
+
+    # puntaje de tendencia, lo calcula el comando `calcular_tendencias` (ver
+    # `modulos.Posts.tendencias`)
+    trending_score = models.FloatField(default=0, editable=False)
+
+    # tags de `tags` (separados por comas), se mantienen desde `modulos.Posts.etiquetas`
+    etiquetas = models.ManyToManyField(
+        "Tag", through="PostTag", related_name="posts", blank=True
+    )
+
+    # extracto en texto plano, cantidad de palabras y tiempo de lectura (en minutos)
+    # del contenido, se calculan al guardar (ver `modulos.Posts.extractos`)
+    excerpt = models.CharField(max_length=300, blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    # columnas normalizadas (sin acentos ni mayusculas) utilizadas por el buscador
+    title_normalizado = models.CharField(max_length=255, blank=True, editable=False)
+    tags_normalizado = models.CharField(max_length=255, blank=True, editable=False)
+    content_normalizado = models.TextField(blank=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    COLUMNAS_NORMALIZADAS = {
+        "title": "title_normalizado",
+        "tags": "tags_normalizado",
+        "content": "content_normalizado",
+    }
+
+    def save(self, *args, **kwargs):
+        kwargs["update_fields"] = sin_contadores(
+            self, ["favorite_count", "trending_score"], kwargs.get("update_fields")
+        )
+        kwargs["update_fields"] = normalizar_columnas(
+            self, self.COLUMNAS_NORMALIZADAS, kwargs["update_fields"]
+        )
+        kwargs["update_fields"] = extractos.actualizar(self, kwargs["update_fields"])
+        super().save(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            # paginacion por cursor del home y de las categorias
+            models.Index(
+                fields=["-publication_date", "-id"], name="post_publicacion_idx"
+            ),
+            # posts populares del home
+            models.Index(
+                fields=["status", "active", "-favorite_count", "-id"],
+                name="post_favoritos_idx",
+            ),
+            # posts populares (en tendencia) del home
+            models.Index(
+                fields=["status", "active", "-trending_score", "-id"],
+                name="post_tendencia_idx",
+            ),
+        ]
+
 
 def get_popular_posts():
     """
     Obtiene los 5 posts más populares. Los posts mas populares son aquellos con
-    mas conteo de favoritos.
+    mayor puntaje de tendencia (favoritos y vistas recientes, ver
+    `modulos.Posts.tendencias`).
     """
-    # Obtener los 5 posts más populares (mayor conteo de favoritos)
+    # Obtener los 5 posts más populares (mayor puntaje de tendencia)
     posts_populares = (
         Post.objects.filter(status=Post.PUBLISHED, active=True)
-        .annotate(favorite_count=Count("favorites"))
-        .order_by("-favorite_count")[:5]
+        .tarjetas()
+        .order_by("-trending_score", "-id")[:5]
     )
 
     return posts_populares
 
 
+class Tag(models.Model):
+    """
+    Tag de los posts. Se crean a partir del campo `Post.tags` (ver
+    `modulos.Posts.etiquetas`).
+    """
+
+    name = models.CharField(max_length=80, verbose_name="Nombre")
+    name_normalizado = models.CharField(max_length=80, unique=True, editable=False)
+
+    # cantidad de posts publicados y activos con el tag
+    cantidad = models.IntegerField(default=0, db_index=True)
+
+    COLUMNAS_NORMALIZADAS = {"name": "name_normalizado"}
+
+    def save(self, *args, **kwargs):
+        kwargs["update_fields"] = normalizar_columnas(
+            self, self.COLUMNAS_NORMALIZADAS, kwargs.get("update_fields")
+        )
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.name
+
+
+class PostTag(models.Model):
+    """
+    Tabla intermedia entre los posts y sus tags.
+    """
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
+
+    # el post esta publicado y activo, es decir, se cuenta en `Tag.cantidad`
+    visible = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["post", "tag"], name="unique_post_tag")
+        ]
+        indexes = [
+            # filtros por tag del buscador
+            models.Index(fields=["tag", "post"], name="post_tag_idx"),
+        ]
+
+
+class TerminoIndice(models.Model):
+    """
+    Entrada del indice invertido utilizado por el buscador.
+
+    Cada fila representa la aparicion de un termino (palabra normalizada) dentro de
+    uno de los campos de un post. El conjunto de filas con el mismo par (campo, termino)
+    forma la "posting list" de ese termino.
+
+    NO se debe instanciar de forma manual, el indice se mantiene desde
+    `modulos.Posts.buscador.indice`.
+    """
+
+    CAMPO_TITULO = "titulo"
+    CAMPO_CONTENIDO = "contenido"
+    CAMPO_TAGS = "tags"
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="terminos")
+    campo = models.CharField(max_length=10)
+    termino = models.CharField(max_length=80)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["campo", "termino", "post"], name="unique_termino_indice"
+            )
+        ]
+
+
+class TrigramaIndice(models.Model):
+    """
+    Entrada del indice de trigramas utilizado para la busqueda aproximada (tolerante
+    a errores de tipeo) sobre el titulo y los tags de los posts.
+
+    NO se debe instanciar de forma manual, el indice se mantiene desde
+    `modulos.Posts.buscador.trigramas`.
+    """
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="trigramas")
+    campo = models.CharField(max_length=10)
+    trigrama = models.CharField(max_length=3)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["campo", "trigrama", "post"], name="unique_trigrama_indice"
+            )
+        ]
+
+
+class TerminoVector(models.Model):
+    """
+    Componente del vector TF-IDF (normalizado) de un post publicado, utilizado para
+    calcular las publicaciones relacionadas.
+
+    NO se debe instanciar de forma manual, los vectores se mantienen desde
+    `modulos.Posts.relacionados`.
+    """
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="vector")
+    termino = models.CharField(max_length=80)
+    peso = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["termino", "post"], name="unique_termino_vector"
+            )
+        ]
+
+
+class FrecuenciaTermino(models.Model):
+    """
+    Cantidad de posts publicados cuyo vector contiene un termino (frecuencia de
+    documento, utilizada para calcular el IDF).
+    """
+
+    termino = models.CharField(max_length=80, unique=True)
+    documentos = models.IntegerField(default=0)
+
+
+class PostRelacionado(models.Model):
+    """
+    Publicacion relacionada (uno de los vecinos mas cercanos) de un post.
+    """
+
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="relacionados"
+    )
+    relacionado = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="relacionados_de"
+    )
+    similitud = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "relacionado"], name="unique_post_relacionado"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["post", "-similitud"], name="post_relacionado_idx"),
+        ]
+
+
+class ActividadDiaria(models.Model):
+    """
+    Vistas y favoritos (agregados menos quitados) de un post en un dia. Se utilizan
+    para calcular el puntaje de tendencia de los posts.
+    """
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="actividad")
+    fecha = models.DateField(db_index=True)
+    vistas = models.PositiveIntegerField(default=0)
+    favoritos = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "fecha"], name="unique_actividad_diaria"
+            )
+        ]
+
+
+class EntradaFeed(models.Model):
+    """
+    Post del feed "Para ti" de un usuario: un post publicado de las categorias o de
+    los autores de sus posts favoritos (ver `modulos.Posts.para_ti`).
+    """
+
+    usuario = models.ForeignKey(
+        UserProfile, on_delete=models.CASCADE, related_name="feed"
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="entradas_feed"
+    )
+
+    # copias de las fechas del post, para leer el feed sin consultar los posts
+    publication_date = models.DateTimeField(null=True)
+    expiration_date = models.DateTimeField(null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["usuario", "post"], name="unique_entrada_feed"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["usuario", "-publication_date", "-id"], name="feed_usuario_idx"
+            ),
+        ]
+
+
 class Version(models.Model):
     post_id = models.IntegerField(null=False)
     title = models.CharField(max_length=80, verbose_name="Titulo")
@@ -197,23 +491,23 @@ def is_valid(self):
 # Lista con los posts destacados manualmente por el admin.
 class Destacado(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, null=False)
+    # el destacado comienza en `date` (puede ser una fecha futura) y termina en
+    # `end_date` (o cuando se destaca otro post)
     date = models.DateTimeField(default=now, verbose_name="Fecha de destacado")
+    end_date = models.DateTimeField(
+        null=True, blank=True, verbose_name="Fin del destacado"
+    )
+
+    class Meta:
+        indexes = [models.Index(fields=["-date"], name="destacado_fecha_idx")]
 
 
 def get_highlighted_post():
     """
-    Retorna el post destacado del momento. El post destacado es el ultimo en ser anadido
-    a la lista.
+    Retorna el post destacado del momento, o None si no hay ninguno. El post destacado
+    es el ultimo en ser anadido a la lista cuyo destacado esta vigente (ver
+    `modulos.Posts.destacados`).
     """
-    # Obtener el post destacado (destacado por el admin)
-    # post_destacado = (
-    #     Destacado.objects.filter(post__status=Post.PUBLISHED, post__active=True)
-    #     .order_by("-date")
-    #     .first()
-    # )
-
-    # if post_destacado == None:
-        # return None
+    from modulos.Posts import destacados
 
-    # return post_destacado.post
-    return None
+    return destacados.actual()
@@ -0,0 +1,316 @@
+"""
+Feed "Para ti".
+
+Cada usuario tiene una lista precalculada (`EntradaFeed`) de los posts publicados de
+las categorias y de los autores de sus posts favoritos, limitada a los `LIMITE` posts
+mas recientes. Cargar una pagina del feed es una lectura por rango del indice
+(usuario, fecha de publicacion) y una consulta de los posts por clave primaria, en
+vez de agregar la tabla de favoritos en cada visita.
+
+Los intereses de un usuario son las categorias y los autores de sus favoritos
+publicados y activos. Las listas se mantienen desde las senales de guardado (ver
+`modulos.Posts.signals`), una vez confirmada la transaccion:
+    - Cuando se publica (o reactiva) un post, se agrega a la lista de los usuarios
+      interesados ("fan-out") y se recortan sus listas.
+    - Cuando un post deja de estar publicado o activo, se quita de las listas.
+    - Cuando un usuario agrega o quita favoritos, o un favorito cambia de categoria o
+      de visibilidad, se agregan los posts de sus nuevos intereses y se quitan los de
+      los intereses perdidos. Si sus intereses no cambian, su lista no se modifica.
+
+El comando `reconstruir_para_ti` reconstruye las listas de todos los usuarios.
+"""
+
+import itertools
+
+from django.db import transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from modulos.paginacion import CursorPage, paginar_keyset
+from modulos.Posts.models import EntradaFeed, Post
+
+Favorito = Post.favorites.through
+
+# Cantidad maxima de posts en el feed de cada usuario
+LIMITE = 200
+
+# Cantidad de usuarios actualizados por consulta en el fan-out
+LOTE = 1000
+
+# Cantidad de posts por pagina del feed
+POSTS_POR_PAGINA = 10
+
+
+def _visible(post: Post) -> bool:
+    return post.status == Post.PUBLISHED and post.active
+
+
+def _entrada(usuario_id: int, post) -> EntradaFeed:
+    return EntradaFeed(
+        usuario_id=usuario_id,
+        post_id=post.id,
+        publication_date=post.publication_date,
+        expiration_date=post.expiration_date,
+    )
+
+
+def _aporte(category_id, author_id) -> tuple[set, set]:
+    # intereses que aporta un favorito visible
+    return (
+        {category_id} if category_id is not None else set(),
+        {author_id} if author_id is not None else set(),
+    )
+
+
+def _union(intereses: tuple[set, set], aporte: tuple[set, set]) -> tuple[set, set]:
+    return intereses[0] | aporte[0], intereses[1] | aporte[1]
+
+
+def _lotes(valores):
+    valores = iter(valores)
+    while lote := list(itertools.islice(valores, LOTE)):
+        yield lote
+
+
+def _recortar(usuarios: list[int]) -> None:
+    # entradas de los usuarios fuera de los `LIMITE` posts mas recientes
+    sobrantes = list(
+        EntradaFeed.objects.filter(usuario_id__in=usuarios)
+        .annotate(
+            posicion=Window(
+                RowNumber(),
+                partition_by=F("usuario_id"),
+                order_by=[F("publication_date").desc(nulls_last=True), F("id").desc()],
+            )
+        )
+        .filter(posicion__gt=LIMITE)
+        .values_list("id", flat=True)
+    )
+    if sobrantes:
+        EntradaFeed.objects.filter(id__in=sobrantes).delete()
+
+
+def interesados(post: Post):
+    """
+    Retorna los ids de los usuarios con favoritos (visibles) de la categoria o del
+    autor del post, sin incluir al autor.
+    """
+    intereses = Q(post__category_id=post.category_id)
+    if post.author_id is not None:
+        intereses |= Q(post__author_id=post.author_id)
+
+    return (
+        Favorito.objects.filter(
+            intereses, post__status=Post.PUBLISHED, post__active=True
+        )
+        .exclude(userprofile_id=post.author_id)
+        .values_list("userprofile_id", flat=True)
+        .distinct()
+    )
+
+
+def publicar(post: Post) -> int:
+    """
+    Agrega un post publicado al feed de los usuarios interesados.
+
+    Returns:
+        int: Cantidad de usuarios interesados.
+    """
+    total = 0
+    for lote in _lotes(interesados(post).iterator(chunk_size=LOTE)):
+        EntradaFeed.objects.bulk_create(
+            [_entrada(usuario_id, post) for usuario_id in lote],
+            ignore_conflicts=True,
+        )
+        _recortar(lote)
+        total += len(lote)
+    return total
+
+
+def intereses(usuarios: list[int], excluir=()) -> dict[int, tuple[set, set]]:
+    """
+    Retorna las categorias y los autores de los favoritos visibles de cada usuario,
+    sin contar los posts de `excluir`.
+    """
+    resultado = {usuario_id: (set(), set()) for usuario_id in usuarios}
+    favoritos = (
+        Favorito.objects.filter(
+            userprofile_id__in=usuarios, post__status=Post.PUBLISHED, post__active=True
+        )
+        .exclude(post_id__in=excluir)
+        .values_list("userprofile_id", "post__category_id", "post__author_id")
+        .distinct()
+    )
+    for usuario_id, category_id, author_id in favoritos:
+        categorias, autores = resultado[usuario_id]
+        nuevas_categorias, nuevos_autores = _aporte(category_id, author_id)
+        categorias |= nuevas_categorias
+        autores |= nuevos_autores
+    return resultado
+
+
+def _posts(usuario_id: int, categorias: set, autores: set):
+    # los `LIMITE` posts visibles mas recientes de las categorias y los autores
+    return (
+        Post.objects.filter(
+            Q(category_id__in=categorias) | Q(author_id__in=autores),
+            Q(expiration_date__isnull=True) | Q(expiration_date__gt=timezone.now()),
+            status=Post.PUBLISHED,
+            active=True,
+        )
+        .exclude(author_id=usuario_id)
+        .order_by(F("publication_date").desc(nulls_last=True), "-id")
+        .only("id", "publication_date", "expiration_date")[:LIMITE]
+    )
+
+
+def _actualizar(usuario_id: int, antes: tuple[set, set], despues: tuple[set, set]):
+    """
+    Actualiza el feed de un usuario cuyos intereses (categorias y autores) cambian de
+    `antes` a `despues`: quita los posts que ya no corresponden a ningun interes y
+    agrega los de los nuevos intereses.
+    """
+    categorias, autores = despues
+    nuevas_categorias = categorias - antes[0]
+    nuevos_autores = autores - antes[1]
+    perdidas_categorias = antes[0] - categorias
+    perdidos_autores = antes[1] - autores
+
+    with transaction.atomic():
+        if perdidas_categorias or perdidos_autores:
+            entradas = EntradaFeed.objects.filter(usuario_id=usuario_id)
+            lleno = entradas.count() >= LIMITE
+            eliminadas, _ = (
+                entradas.filter(
+                    Q(post__category_id__in=perdidas_categorias)
+                    | Q(post__author_id__in=perdidos_autores)
+                )
+                .exclude(
+                    Q(post__category_id__in=categorias) | Q(post__author_id__in=autores)
+                )
+                .delete()
+            )
+            if eliminadas and lleno:
+                # los posts recortados de los intereses restantes vuelven a entrar
+                nuevas_categorias, nuevos_autores = categorias, autores
+
+        if nuevas_categorias or nuevos_autores:
+            EntradaFeed.objects.bulk_create(
+                [
+                    _entrada(usuario_id, p)
+                    for p in _posts(usuario_id, nuevas_categorias, nuevos_autores)
+                ],
+                ignore_conflicts=True,
+            )
+            _recortar([usuario_id])
+
+
+def favoritos_cambiados(usuarios: list[int], posts: list[int], agregados: bool):
+    """
+    Actualiza los feeds de los usuarios que agregan (o quitan) posts de sus
+    favoritos. Los favoritos que no estan visibles no cambian los intereses.
+
+    Args:
+        usuarios (list[int]): Usuarios que agregan o quitan los favoritos.
+        posts (list[int]): Posts agregados o quitados.
+        agregados (bool): True si los posts se agregaron a los favoritos.
+    """
+    aporte = (set(), set())
+    for category_id, author_id in Post.objects.filter(
+        id__in=posts, status=Post.PUBLISHED, active=True
+    ).values_list("category_id", "author_id"):
+        aporte = _union(aporte, _aporte(category_id, author_id))
+
+    if not aporte[0] and not aporte[1]:
+        return
+
+    for lote in _lotes(usuarios):
+        for usuario_id, otros in intereses(lote, excluir=posts).items():
+            con, sin = _union(otros, aporte), otros
+            if agregados:
+                _actualizar(usuario_id, sin, con)
+            else:
+                _actualizar(usuario_id, con, sin)
+
+
+def _favorito_cambiado(post: Post, anterior) -> None:
+    # el post cambia de categoria o de visibilidad: cambian los intereses de los
+    # usuarios que lo tienen como favorito
+    antes = _aporte(anterior[0], post.author_id) if anterior[1] else (set(), set())
+    despues = (
+        _aporte(post.category_id, post.author_id) if _visible(post) else (set(), set())
+    )
+    usuarios = Favorito.objects.filter(post_id=post.id).values_list(
+        "userprofile_id", flat=True
+    )
+    for lote in _lotes(usuarios.iterator(chunk_size=LOTE)):
+        for usuario_id, otros in intereses(lote, excluir=[post.id]).items():
+            _actualizar(usuario_id, _union(otros, antes), _union(otros, despues))
+
+
+def post_guardado(post: Post, anterior) -> None:
+    """
+    Actualiza los feeds cuando un post se publica, cambia o deja de estar visible.
+
+    Args:
+        post (Post): Post guardado.
+        anterior: Estado previo al guardado (ver `favoritos.estado_guardado`).
+    """
+    visible_antes = anterior is not None and anterior[1]
+
+    if anterior is not None and anterior[2]:
+        if visible_antes != _visible(post) or (
+            visible_antes and anterior[0] != post.category_id
+        ):
+            _favorito_cambiado(post, anterior)
+
+    if not _visible(post):
+        if visible_antes:
+            EntradaFeed.objects.filter(post=post).delete()
+        return
+
+    # las fechas del post pueden cambiar sin que cambie su visibilidad
+    EntradaFeed.objects.filter(post=post).update(
+        publication_date=post.publication_date,
+        expiration_date=post.expiration_date,
+    )
+
+    # un post publicado o que cambia de categoria tiene nuevos interesados
+    if not visible_antes or anterior[0] != post.category_id:
+        publicar(post)
+
+
+def reconstruir(usuario_id: int) -> None:
+    """
+    Reconstruye el feed de un usuario a partir de las categorias y los autores de
+    sus posts favoritos.
+    """
+    categorias, autores = intereses([usuario_id])[usuario_id]
+    posts = _posts(usuario_id, categorias, autores) if categorias or autores else []
+
+    with transaction.atomic():
+        EntradaFeed.objects.filter(usuario_id=usuario_id).delete()
+        EntradaFeed.objects.bulk_create([_entrada(usuario_id, p) for p in posts])
+
+
+def pagina(usuario_id: int, cursor: str | None, per_page: int) -> CursorPage:
+    """
+    Retorna una pagina del feed de un usuario (posts vigentes, del mas reciente al
+    mas antiguo), con los campos de las tarjetas (ver `PostQuerySet.tarjetas`).
+    """
+    entradas = paginar_keyset(
+        EntradaFeed.objects.filter(
+            Q(expiration_date__isnull=True) | Q(expiration_date__gt=timezone.now()),
+            usuario_id=usuario_id,
+        ).only("id", "post_id", "publication_date"),
+        cursor,
+        per_page,
+    )
+
+    posts = Post.objects.tarjetas().in_bulk([e.post_id for e in entradas])
+    return CursorPage(
+        [posts[e.post_id] for e in entradas if e.post_id in posts],
+        next_cursor=entradas.next_cursor,
+        previous_cursor=entradas.previous_cursor,
+    )
@@ -0,0 +1,92 @@
+"""
+Secciones del home cacheadas (ver `modulos.secciones`).
+
+Cada seccion tiene su propio tiempo de vida y se invalida desde las senales de
+guardado de los modelos de los que depende (ver `modulos.Posts.signals`):
+
+    - "posts": creacion, edicion, cambio de estado o eliminacion de un post.
+    - "categorias": creacion, edicion o eliminacion de una categoria.
+    - "favoritos": se agrega o quita un favorito.
+    - "tendencias": se recalculan los puntajes de tendencia (`calcular_tendencias`).
+    - "usuarios": cambio del nombre de un usuario (autor de los posts).
+
+El post destacado tiene su propio cache (ver `modulos.Posts.destacados`). Solo se
+cachea la primera pagina de los posts recientes, que es la que reciben
+todas las visitas al home sin busqueda.
+"""
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from modulos.Categories.models import Category
+from modulos.paginacion import paginar_keyset
+from modulos.Posts import etiquetas
+from modulos.Posts.models import Post, get_popular_posts
+from modulos.secciones import Seccion
+
+# Tiempo de vida (en segundos) de cada seccion, configurable desde
+# `settings.HOME_TIEMPOS_SECCIONES`
+TIEMPOS = {
+    "home:recientes": 60,
+    "home:populares": 60 * 5,
+    "home:categorias_populares": 60 * 10,
+    "home:tags": 60 * 10,
+    **getattr(settings, "HOME_TIEMPOS_SECCIONES", {}),
+}
+
+# Cantidad de posts recientes por pagina
+POSTS_POR_PAGINA = 10
+
+
+def posts_recientes():
+    """
+    Posts publicados, activos y vigentes, ordenados del mas reciente al mas antiguo.
+    """
+    return Post.objects.filter(
+        Q(status=Post.PUBLISHED)
+        & Q(active=True)
+        & (Q(expiration_date__gt=timezone.now()) | Q(expiration_date__isnull=True))
+    ).tarjetas()
+
+
+def _categorias_populares():
+    # categorias con mas favoritos que tienen algun post publicado
+    return list(
+        Category.objects.filter(
+            Exists(
+                Post.objects.filter(
+                    category=OuterRef("pk"), status=Post.PUBLISHED, active=True
+                )
+            )
+        ).order_by("-favorite_count", "id")[:3]
+    )
+
+
+RECIENTES = Seccion(
+    "home:recientes",
+    TIEMPOS["home:recientes"],
+    lambda: paginar_keyset(posts_recientes(), None, POSTS_POR_PAGINA),
+    ["posts", "categorias", "usuarios"],
+)
+
+POPULARES = Seccion(
+    "home:populares",
+    TIEMPOS["home:populares"],
+    lambda: list(get_popular_posts()),
+    ["posts", "tendencias"],
+)
+
+CATEGORIAS_POPULARES = Seccion(
+    "home:categorias_populares",
+    TIEMPOS["home:categorias_populares"],
+    _categorias_populares,
+    ["posts", "categorias", "favoritos"],
+)
+
+TAGS = Seccion(
+    "home:tags",
+    TIEMPOS["home:tags"],
+    etiquetas.nube,
+    ["posts"],
+)
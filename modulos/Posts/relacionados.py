@@ -0,0 +1,347 @@
+"""
+Publicaciones relacionadas.
+
+Cada post publicado se representa con un vector TF-IDF sobre los terminos de su
+titulo, tags y contenido (el titulo y los tags pesan mas que el contenido). Solo se
+conservan los `MAX_TERMINOS` terminos de mayor frecuencia de cada post, y el vector
+se guarda normalizado (largo 1) en la tabla `TerminoVector`, por lo que la
+similitud coseno entre dos posts es la suma de los productos de los pesos de los
+terminos que comparten. Esa suma se calcula en la base de datos, utilizando el
+indice por termino de `TerminoVector`.
+
+Los `CANTIDAD` vecinos mas cercanos de cada post se guardan en `PostRelacionado`,
+de modo que la pagina de detalle los obtiene con una sola consulta indexada.
+
+Actualizacion (una vez confirmada la transaccion, ver `modulos.Posts.signals`):
+    - Al publicar un post, o al editar el titulo, los tags o el contenido de un post
+      publicado, se recalcula su vector y sus vecinos, y el post se agrega a la lista
+      de cada uno de sus vecinos si los supera en similitud. Los demas cambios (ej:
+      estado de moderacion o fechas de un post publicado) no recalculan el vector.
+    - Al despublicar, inactivar o eliminar un post se quitan su vector y todas las
+      relaciones en las que aparece.
+    - Los pesos IDF de los demas posts no se recalculan en cada cambio. El comando
+      `recalcular_relacionados` reconstruye todos los vectores y vecinos (tambien
+      necesario luego de cargas masivas que no disparan las senales de guardado).
+"""
+
+import heapq
+import itertools
+import math
+import re
+from collections import Counter
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Q, Sum, Value, When
+from django.utils import timezone
+
+from modulos.normalizacion import normalizar
+from modulos.Posts.models import (FrecuenciaTermino, Post, PostRelacionado,
+                                  TerminoVector)
+
+# Cantidad de publicaciones relacionadas guardadas por post
+CANTIDAD = getattr(settings, "RELACIONADOS_CANTIDAD", 5)
+
+# Cantidad maxima de terminos del vector de un post
+MAX_TERMINOS = 64
+
+# Los terminos presentes en mas de esta proporcion de los posts (y en mas de
+# `MIN_DOCUMENTOS_COMUNES` posts) no se utilizan para buscar vecinos: su peso IDF es
+# bajo y su posting list es la mas larga.
+PROPORCION_COMUNES = 0.2
+MIN_DOCUMENTOS_COMUNES = 50
+
+# Peso de cada campo en la frecuencia de los terminos
+PESOS_CAMPOS = {
+    "title_normalizado": 3,
+    "tags_normalizado": 2,
+    "content_normalizado": 1,
+}
+
+# Palabras vacias (sin acentos, ver `modulos.normalizacion`)
+PALABRAS_VACIAS = frozenset("""
+    algo ante antes aqui asi aun cada como con contra cual cuando del desde donde
+    durante ella ellas ello ellos entre era eran esa esas ese eso esos esta estaba
+    estan estas este esto estos fue fueron hay hasta las les los mas mismo muy nos
+    nosotros otra otras otro otros para pero poco por porque que quien sea segun ser
+    sin sobre solo son su sus tambien tan tanto tiene tienen todo todos tras una uno
+    unos usted puede pueden the and for with that this from are was were not you
+    """.split())
+
+_PALABRA = re.compile(r"\w+")
+
+# Largo maximo de un termino (mismo valor que `TerminoVector.termino`)
+_MAX_LARGO = 80
+
+
+# Columnas de las que depende el vector de un post
+COLUMNAS_TEXTO = ("title", "tags", "content")
+
+
+def _publicados():
+    return Post.objects.filter(status=Post.PUBLISHED, active=True)
+
+
+def texto_cambiado(post: Post, update_fields=None) -> bool:
+    """
+    Indica si un guardado (aun no realizado) cambia el titulo, los tags o el
+    contenido de un post. Se utiliza desde la senal `pre_save`.
+    """
+    if post.pk is None:
+        return True
+    if update_fields is not None and not set(update_fields) & set(COLUMNAS_TEXTO):
+        return False
+
+    guardado = Post.objects.filter(pk=post.pk).values_list(*COLUMNAS_TEXTO).first()
+    return guardado != tuple(getattr(post, c) for c in COLUMNAS_TEXTO)
+
+
+def vector_tf(post: Post) -> dict[str, float]:
+    """
+    Retorna la frecuencia (sublineal y ponderada por campo) de los `MAX_TERMINOS`
+    terminos mas frecuentes de un post.
+    """
+    frecuencias = Counter()
+    for columna, peso in PESOS_CAMPOS.items():
+        texto = getattr(post, columna) or normalizar(
+            getattr(post, columna.removesuffix("_normalizado"))
+        )
+        for termino in _PALABRA.findall(texto):
+            if (
+                2 < len(termino) <= _MAX_LARGO
+                and not termino.isdigit()
+                and termino not in PALABRAS_VACIAS
+            ):
+                frecuencias[termino] += peso
+
+    mayores = heapq.nlargest(
+        MAX_TERMINOS, frecuencias.items(), key=lambda item: (item[1], item[0])
+    )
+    return {termino: 1 + math.log(f) for termino, f in mayores}
+
+
+def _idf(documentos: int, total: int) -> float:
+    return math.log((1 + total) / (1 + documentos)) + 1
+
+
+def _pesos(tf: dict[str, float], frecuencias: dict[str, int], total: int):
+    pesos = {t: v * _idf(frecuencias.get(t, 1), total) for t, v in tf.items()}
+    norma = math.sqrt(sum(p * p for p in pesos.values())) or 1
+    return {t: p / norma for t, p in pesos.items()}
+
+
+def _vecinos(post_id: int, pesos: dict[str, float], frecuencias, total: int):
+    """
+    Retorna los `CANTIDAD` posts mas similares como pares (id, similitud).
+    """
+    limite = max(MIN_DOCUMENTOS_COMUNES, PROPORCION_COMUNES * total)
+    terminos = [t for t in pesos if frecuencias.get(t, 0) <= limite]
+    if not terminos:
+        return []
+
+    # producto escalar: suma de peso(termino, vecino) * peso(termino, post)
+    peso_post = Case(
+        *[When(termino=t, then=Value(pesos[t])) for t in terminos],
+        output_field=FloatField(),
+    )
+    vecinos = (
+        TerminoVector.objects.filter(termino__in=terminos)
+        .exclude(post_id=post_id)
+        .values("post_id")
+        .annotate(similitud=Sum(F("peso") * peso_post))
+        .order_by("-similitud", "post_id")[:CANTIDAD]
+    )
+    return [(v["post_id"], v["similitud"]) for v in vecinos]
+
+
+def _ajustar_frecuencias(agregados: set[str], eliminados: set[str]) -> None:
+    if agregados:
+        FrecuenciaTermino.objects.bulk_create(
+            [FrecuenciaTermino(termino=t) for t in agregados], ignore_conflicts=True
+        )
+        FrecuenciaTermino.objects.filter(termino__in=agregados).update(
+            documentos=F("documentos") + 1
+        )
+
+    if eliminados:
+        FrecuenciaTermino.objects.filter(termino__in=eliminados).update(
+            documentos=F("documentos") - 1
+        )
+
+
+def _insertar_vecino(post_id: int, vecino_id: int, similitud: float) -> None:
+    """
+    Agrega un vecino a la lista de un post si esta entre los `CANTIDAD` mas similares.
+    """
+    actuales = dict(
+        PostRelacionado.objects.filter(post_id=post_id).values_list(
+            "relacionado_id", "similitud"
+        )
+    )
+    actuales[vecino_id] = similitud
+    mayores = dict(heapq.nlargest(CANTIDAD, actuales.items(), key=lambda v: v[1]))
+
+    if vecino_id not in mayores:
+        return
+
+    PostRelacionado.objects.update_or_create(
+        post_id=post_id, relacionado_id=vecino_id, defaults={"similitud": similitud}
+    )
+    PostRelacionado.objects.filter(post_id=post_id).exclude(
+        relacionado_id__in=mayores
+    ).delete()
+
+
+def actualizar_post(post: Post) -> None:
+    """
+    Recalcula el vector y los vecinos de un post publicado, y lo agrega a las listas
+    de sus vecinos. No realiza cambios si el vector del post (terminos y pesos) no
+    cambio.
+    """
+    tf = vector_tf(post)
+
+    with transaction.atomic():
+        actuales = dict(
+            TerminoVector.objects.filter(post=post).values_list("termino", "peso")
+        )
+        if set(actuales) != set(tf):
+            _ajustar_frecuencias(set(tf) - set(actuales), set(actuales) - set(tf))
+
+        total = _publicados().count()
+        frecuencias = dict(
+            FrecuenciaTermino.objects.filter(termino__in=tf).values_list(
+                "termino", "documentos"
+            )
+        )
+        pesos = _pesos(tf, frecuencias, total)
+
+        if actuales.keys() == pesos.keys() and all(
+            math.isclose(actuales[t], p, abs_tol=1e-9) for t, p in pesos.items()
+        ):
+            return
+
+        TerminoVector.objects.filter(post=post).delete()
+        TerminoVector.objects.bulk_create(
+            [TerminoVector(post=post, termino=t, peso=p) for t, p in pesos.items()]
+        )
+
+        vecinos = _vecinos(post.id, pesos, frecuencias, total)
+        PostRelacionado.objects.filter(post=post).delete()
+        PostRelacionado.objects.bulk_create(
+            [
+                PostRelacionado(post=post, relacionado_id=id, similitud=similitud)
+                for id, similitud in vecinos
+            ]
+        )
+
+        # la similitud es simetrica
+        for id, similitud in vecinos:
+            _insertar_vecino(id, post.id, similitud)
+
+
+def eliminar_post(post_id: int) -> None:
+    """
+    Quita el vector de un post y todas las relaciones en las que aparece.
+    """
+    with transaction.atomic():
+        terminos = set(
+            TerminoVector.objects.filter(post_id=post_id).values_list(
+                "termino", flat=True
+            )
+        )
+        if not terminos:
+            return
+
+        _ajustar_frecuencias(set(), terminos)
+        TerminoVector.objects.filter(post_id=post_id).delete()
+        PostRelacionado.objects.filter(post_id=post_id).delete()
+        PostRelacionado.objects.filter(relacionado_id=post_id).delete()
+
+
+def recalcular(batch_size: int = 1000) -> int:
+    """
+    Reconstruye los vectores y los vecinos de todos los posts publicados.
+
+    Returns:
+        int: Cantidad de posts procesados.
+    """
+    columnas = [
+        "id",
+        *PESOS_CAMPOS,
+        *(c.removesuffix("_normalizado") for c in PESOS_CAMPOS),
+    ]
+
+    def posts():
+        return _publicados().only(*columnas).iterator(chunk_size=batch_size)
+
+    with transaction.atomic():
+        TerminoVector.objects.all().delete()
+        FrecuenciaTermino.objects.all().delete()
+        PostRelacionado.objects.all().delete()
+
+        # primera pasada: frecuencias de documento
+        frecuencias = Counter()
+        total = 0
+        for post in posts():
+            frecuencias.update(vector_tf(post).keys())
+            total += 1
+
+        FrecuenciaTermino.objects.bulk_create(
+            [
+                FrecuenciaTermino(termino=t, documentos=d)
+                for t, d in frecuencias.items()
+            ],
+            batch_size=batch_size,
+        )
+
+        # segunda pasada: vectores
+        lote = []
+        for post in posts():
+            pesos = _pesos(vector_tf(post), frecuencias, total)
+            lote.extend(
+                TerminoVector(post_id=post.id, termino=t, peso=p)
+                for t, p in pesos.items()
+            )
+            if len(lote) >= batch_size:
+                TerminoVector.objects.bulk_create(lote)
+                lote = []
+        TerminoVector.objects.bulk_create(lote)
+
+        # tercera pasada: vecinos (los vectores se leen de a uno por vez)
+        componentes = (
+            TerminoVector.objects.order_by("post_id")
+            .values_list("post_id", "termino", "peso")
+            .iterator(chunk_size=batch_size)
+        )
+        lote = []
+        for post_id, filas in itertools.groupby(componentes, key=itemgetter(0)):
+            pesos = {termino: peso for _, termino, peso in filas}
+            lote.extend(
+                PostRelacionado(post_id=post_id, relacionado_id=id, similitud=s)
+                for id, s in _vecinos(post_id, pesos, frecuencias, total)
+            )
+            if len(lote) >= batch_size:
+                PostRelacionado.objects.bulk_create(lote)
+                lote = []
+        PostRelacionado.objects.bulk_create(lote)
+
+    return total
+
+
+def obtener(post: Post) -> list[Post]:
+    """
+    Retorna las publicaciones relacionadas visibles (publicadas, activas y no
+    vencidas) de un post, de la mas similar a la menos similar.
+    """
+    return list(
+        Post.objects.filter(
+            Q(expiration_date__isnull=True) | Q(expiration_date__gt=timezone.now()),
+            relacionados_de__post=post,
+            status=Post.PUBLISHED,
+            active=True,
+        )
+        .select_related("category")
+        .only("id", "title", "publication_date", "category", "category__name")
+        .order_by("-relacionados_de__similitud")
+    )
@@ -1,11 +1,362 @@
+from collections import Counter
+from functools import partial
+
 from django.core.mail import send_mail
-from django.db.models.signals import m2m_changed, post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
 from django.dispatch import receiver
 
-from modulos.Posts.models import Post
+from modulos import paginas, secciones
+from modulos.Categories.models import Category
+from modulos.Posts import (destacados, etiquetas, favoritos, para_ti,
+                           relacionados, tendencias)
+from modulos.Posts.buscador import nombres, resultados, sugerencias
+from modulos.Posts.buscador.backends import get_backend
+from modulos.Posts.models import Destacado
 from modulos.UserProfile.models import UserProfile
 
 from .models import Post, get_highlighted_post, get_popular_posts
 
 
+@receiver(post_save, sender=Post)
+def actualizar_indice_busqueda(sender, instance, raw=False, **kwargs):
+    """
+    Mantiene actualizado el indice del buscador cada vez que un post es creado o
+    modificado (edicion, cambio de estado, inactivacion, etc).
+    """
+    if raw:
+        return
+
+    get_backend().indexar(instance)
+
+
+@receiver(post_delete, sender=Post)
+def eliminar_de_indice_busqueda(sender, instance, **kwargs):
+    get_backend().eliminar(instance.id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidar_resultados_busqueda(sender, instance, **kwargs):
+    """
+    Invalida los resultados de busqueda guardados en cache. Cualquier cambio sobre un
+    post (publicacion, edicion, inactivacion, expiracion) puede modificarlos.
+    """
+    resultados.invalidar()
+
+
+@receiver(post_save, sender=Post)
+def actualizar_sugerencias_busqueda(sender, instance, raw=False, **kwargs):
+    """
+    Agrega los posts publicados al indice de sugerencias del buscador.
+    """
+    if raw or instance.status != Post.PUBLISHED or not instance.active:
+        return
+
+    sugerencias.post_publicado(instance)
+
+
+@receiver(pre_save, sender=Post)
+def guardar_estado_favoritos(sender, instance, raw=False, **kwargs):
+    # categoria y visibilidad previas, para actualizar los contadores de favoritos
+    # de las categorias luego del guardado
+    instance._estado_favoritos = None if raw else favoritos.estado_guardado(instance)
+
+
+@receiver(post_save, sender=Post)
+def actualizar_favoritos_categorias(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    favoritos.post_guardado(instance, getattr(instance, "_estado_favoritos", None))
+
+
+@receiver(m2m_changed, sender=Post.favorites.through)
+def actualizar_contadores_favoritos(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """
+    Actualiza los contadores de favoritos de los posts (y de sus categorias) cuando
+    se agregan o quitan favoritos, desde el post o desde el usuario.
+    """
+    if action in ("pre_remove", "pre_clear"):
+        # solo se descuentan las filas que existen
+        instance._favoritos_quitados = favoritos.existentes(instance, reverse, pk_set)
+
+    elif action in ("post_remove", "post_clear"):
+        quitados = getattr(instance, "_favoritos_quitados", Counter())
+        cantidades = Counter({id: -n for id, n in quitados.items()})
+        favoritos.sumar(cantidades)
+        tendencias.registrar_favoritos(cantidades)
+
+    elif action == "post_add" and pk_set:
+        # `pk_set` contiene solo las filas agregadas
+        if reverse:
+            cantidades = Counter(pk_set)
+        else:
+            cantidades = Counter({instance.pk: len(pk_set)})
+        favoritos.sumar(cantidades)
+        tendencias.registrar_favoritos(cantidades)
+
+
+@receiver(pre_delete, sender=Post)
+def descontar_favoritos_post(sender, instance, **kwargs):
+    favoritos.post_eliminado(instance)
+
+
+@receiver(pre_delete, sender=UserProfile)
+def descontar_favoritos_usuario(sender, instance, **kwargs):
+    # los favoritos del usuario se eliminan en cascada, sin `m2m_changed`
+    quitados = favoritos.existentes(instance, True, None)
+    favoritos.sumar(Counter({id: -n for id, n in quitados.items()}))
+
+
+@receiver(post_save, sender=Post)
+def sincronizar_tags(sender, instance, raw=False, **kwargs):
+    """
+    Sincroniza los tags de un post (y sus contadores) cada vez que es guardado.
+    """
+    if raw:
+        return
+
+    etiquetas.sincronizar(instance)
+
+
+@receiver(pre_delete, sender=Post)
+def descontar_tags(sender, instance, **kwargs):
+    etiquetas.eliminar(instance)
+
+
+@receiver(pre_save, sender=Post)
+def guardar_texto_relacionados(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    # solo importa si el post sigue visible (`_estado_favoritos` se guarda en el
+    # receptor anterior); en los demas casos el vector se recalcula o se elimina
+    anterior = getattr(instance, "_estado_favoritos", None)
+    visible = instance.status == Post.PUBLISHED and instance.active
+    if not raw and anterior is not None and anterior[1] and visible:
+        instance._texto_cambiado = relacionados.texto_cambiado(instance, update_fields)
+
+
+@receiver(post_save, sender=Post)
+def actualizar_relacionados(sender, instance, raw=False, **kwargs):
+    """
+    Recalcula las publicaciones relacionadas de un post cuando es publicado o cambia
+    su texto, y lo quita de las relaciones cuando deja de estar visible. El recalculo
+    se realiza una vez confirmada la transaccion.
+    """
+    if raw:
+        return
+
+    anterior = getattr(instance, "_estado_favoritos", None)
+    visible_antes = anterior is not None and anterior[1]
+    visible = instance.status == Post.PUBLISHED and instance.active
+
+    if visible and visible_antes and not getattr(instance, "_texto_cambiado", True):
+        return
+    if not visible and not visible_antes:
+        return
+
+    post_id = instance.pk
+
+    def actualizar():
+        # el post tal como quedo guardado, si esta visible
+        post = Post.objects.filter(
+            pk=post_id, status=Post.PUBLISHED, active=True
+        ).first()
+        if post is not None:
+            relacionados.actualizar_post(post)
+        else:
+            relacionados.eliminar_post(post_id)
+
+    transaction.on_commit(actualizar)
+
+
+@receiver(pre_delete, sender=Post)
+def eliminar_de_relacionados(sender, instance, **kwargs):
+    # antes de que el borrado en cascada elimine el vector del post
+    relacionados.eliminar_post(instance.id)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidar_nombres_busqueda(sender, instance, update_fields=None, **kwargs):
+    """
+    Invalida los resultados guardados del buscador (y el mapa de nombres de las
+    categorias) cuando se crea, renombra o elimina una categoria o un usuario. Otros
+    cambios (ej: el `last_login` de un usuario) no los afectan.
+    """
+    if update_fields is not None and not (
+        set(update_fields) & set(sender.COLUMNAS_NORMALIZADAS)
+    ):
+        return
+
+    # los autores se resuelven con una consulta, sin mapa en memoria
+    if sender is Category:
+        nombres.invalidar(nombres.RELACION_CATEGORIA)
+    resultados.invalidar()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidar_secciones_posts(sender, instance, **kwargs):
+    """
+    Invalida las secciones cacheadas que muestran posts (ver `modulos.Posts.portada`).
+    """
+    secciones.invalidar("posts")
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidar_secciones_categorias(sender, instance, **kwargs):
+    secciones.invalidar("categorias")
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidar_secciones_usuarios(sender, instance, update_fields=None, **kwargs):
+    # solo el nombre del usuario (autor de los posts) se muestra en las secciones
+    if update_fields is not None and not (
+        set(update_fields) & set(sender.COLUMNAS_NORMALIZADAS)
+    ):
+        return
+
+    secciones.invalidar("usuarios")
+
+
+@receiver(m2m_changed, sender=Post.favorites.through)
+def invalidar_secciones_favoritos(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        secciones.invalidar("favoritos")
+
+
+@receiver(post_save, sender=Destacado)
+@receiver(post_delete, sender=Destacado)
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidar_destacado(sender, instance, **kwargs):
+    """
+    Invalida el post destacado resuelto en cada proceso. Los cambios de un post (ej:
+    su inactivacion) pueden cambiar el post destacado.
+    """
+    destacados.invalidar()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def purgar_paginas_post(sender, instance, **kwargs):
+    """
+    Purga las paginas cacheadas que muestran el post: su detalle, el home y las
+    paginas de su categoria (y de la anterior, si cambio de categoria).
+    """
+    claves = {f"post:{instance.id}", f"categoria:{instance.category_id}", "home"}
+    anterior = getattr(instance, "_estado_favoritos", None)
+    if anterior is not None:
+        claves.add(f"categoria:{anterior[0]}")
+    paginas.purgar(*claves)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def purgar_paginas_categorias(sender, instance, **kwargs):
+    # las categorias se listan en el menu de todas las paginas
+    paginas.purgar("categorias", f"categoria:{instance.id}")
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def purgar_paginas_usuarios(sender, instance, update_fields=None, **kwargs):
+    # solo el nombre del usuario (autor de los posts) se muestra en las paginas
+    if update_fields is not None and not (
+        set(update_fields) & set(sender.COLUMNAS_NORMALIZADAS)
+    ):
+        return
+
+    paginas.purgar("usuarios")
+
+
+@receiver(post_save, sender=Destacado)
+@receiver(post_delete, sender=Destacado)
+def purgar_paginas_destacados(sender, instance, **kwargs):
+    paginas.purgar("home")
+
+
+@receiver(paginas.pagina_servida)
+def registrar_vista_cacheada(sender, vista, kwargs, **extra):
+    """
+    Registra las vistas de los posts servidos desde el cache de paginas (solo se
+    cachean las paginas de los posts publicados).
+    """
+    if vista == "post_detail":
+        tendencias.registrar_vista(kwargs["id"])
+
+
+@receiver(post_save, sender=Post)
+def actualizar_feeds_post(sender, instance, raw=False, **kwargs):
+    """
+    Agrega los posts publicados al feed "Para ti" de los usuarios interesados, y
+    quita los que dejan de estar publicados o activos. El fan-out se realiza una vez
+    confirmada la transaccion, con el post tal como quedo guardado.
+    """
+    if raw:
+        return
+
+    post_id = instance.pk
+    anterior = getattr(instance, "_estado_favoritos", None)
+
+    def actualizar():
+        post = Post.objects.filter(pk=post_id).first()
+        if post is not None:
+            para_ti.post_guardado(post, anterior)
+
+    transaction.on_commit(actualizar)
+
+
+@receiver(m2m_changed, sender=Post.favorites.through)
+def actualizar_feeds_favoritos(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Actualiza el feed "Para ti" de los usuarios que agregan o quitan favoritos
+    (pueden cambiar sus categorias y autores de interes), una vez confirmada la
+    transaccion.
+    """
+    if action == "pre_clear":
+        if reverse:
+            # posts que el usuario tenia como favoritos
+            instance._posts_feed = list(
+                favoritos.Favorito.objects.filter(
+                    userprofile_id=instance.pk
+                ).values_list("post_id", flat=True)
+            )
+        else:
+            # usuarios que tenian el post como favorito
+            instance._usuarios_feed = list(
+                favoritos.Favorito.objects.filter(post_id=instance.pk).values_list(
+                    "userprofile_id", flat=True
+                )
+            )
+        return
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if reverse:
+        usuarios = [instance.pk]
+        if action == "post_clear":
+            posts = getattr(instance, "_posts_feed", [])
+        else:
+            posts = list(pk_set or [])
+    else:
+        posts = [instance.pk]
+        if action == "post_clear":
+            usuarios = getattr(instance, "_usuarios_feed", [])
+        else:
+            usuarios = list(pk_set or [])
 
+    if usuarios and posts:
+        transaction.on_commit(
+            partial(para_ti.favoritos_cambiados, usuarios, posts, action == "post_add")
+        )
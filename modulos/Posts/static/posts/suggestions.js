@@ -0,0 +1,60 @@
+/**
+ * Sugerencias de busqueda (autocompletado) para el campo `#search-input`.
+ *
+ * Mientras el usuario escribe se consulta el endpoint indicado en el atributo
+ * `data-suggestions-url` del campo y se completa el `<datalist>` asociado con:
+ * - los titulos de los posts,
+ * - los tags, categorias y autores, en forma de filtro del buscador
+ *   (ej: "#categoria: Programacion").
+ *
+ * Las consultas se agrupan (debounce) para no realizar un pedido por cada tecla.
+ */
+(function() {
+    const DEBOUNCE_MS = 150;
+
+    const FILTROS = {
+        tags: '#tags: ',
+        categorias: '#categoria: ',
+        autores: '#autor: ',
+    };
+
+    document.querySelectorAll('#search-input[data-suggestions-url]').forEach(function(searchInput) {
+        const datalist = document.getElementById(searchInput.getAttribute('list'));
+        let timer = null;
+        let controller = null;
+
+        searchInput.addEventListener('input', function() {
+            clearTimeout(timer);
+            timer = setTimeout(function() {
+                const prefijo = searchInput.value.trim();
+                if (prefijo === '' || prefijo.startsWith('#')) {
+                    datalist.replaceChildren();
+                    return;
+                }
+
+                // cancelar el pedido anterior si aun no termino
+                if (controller) {
+                    controller.abort();
+                }
+                controller = new AbortController();
+
+                const url = `${searchInput.dataset.suggestionsUrl}?q=${encodeURIComponent(prefijo)}`;
+                fetch(url, { signal: controller.signal })
+                    .then(response => response.json())
+                    .then(function(sugerencias) {
+                        const opciones = sugerencias.titulos.map(s => s.valor);
+                        for (const [tipo, filtro] of Object.entries(FILTROS)) {
+                            opciones.push(...sugerencias[tipo].map(s => filtro + s.valor));
+                        }
+
+                        datalist.replaceChildren(...opciones.map(function(valor) {
+                            const option = document.createElement('option');
+                            option.value = valor;
+                            return option;
+                        }));
+                    })
+                    .catch(() => {});
+            }, DEBOUNCE_MS);
+        });
+    });
+})();
@@ -0,0 +1,229 @@
+"""
+Posts en tendencia.
+
+Los posts populares del home se ordenan por un puntaje de tendencia
+(`Post.trending_score`) que combina los favoritos y las vistas recientes del post y
+la antiguedad de su publicacion. La actividad de cada dia pesa la mitad cada
+`VIDA_MEDIA` dias, de modo que los posts antiguos dejan el primer lugar cuando dejan
+de recibir actividad:
+
+    puntaje = sum((PESO_FAVORITO * favoritos + PESO_VISTA * vistas) * decaimiento(d))
+              + PESO_PUBLICACION * decaimiento(dias desde la publicacion)
+
+    decaimiento(dias) = 0.5 ** (dias / VIDA_MEDIA)
+
+Las vistas y los favoritos se acumulan por dia en `ActividadDiaria` (una fila por
+post y por dia, actualizada con expresiones `F()`). Para no escribir en la base de
+datos en cada visita (incluidas las servidas desde el cache de paginas), cada proceso
+acumula las vistas en memoria y las escribe en lote cada `INTERVALO_VISTAS` segundos
+o cuando acumula `MAX_VISTAS_PENDIENTES` posts (ver `vaciar_vistas`); las vistas de
+un proceso que termina sin vaciarlas se pierden. El comando periodico
+`calcular_tendencias` recalcula todos los puntajes a partir de la actividad de los
+ultimos `VENTANA` dias y elimina la actividad anterior; el home solo lee los
+primeros posts del indice por puntaje.
+"""
+
+import itertools
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from modulos.Posts.models import ActividadDiaria, Post
+
+# Dias en los que la actividad de un post pierde la mitad de su peso
+VIDA_MEDIA = getattr(settings, "TENDENCIAS_VIDA_MEDIA", 3)
+
+# Dias de actividad utilizados (la actividad anterior pesa menos de 0.1%)
+VENTANA = 30
+
+PESO_FAVORITO = 5.0
+PESO_VISTA = 1.0
+PESO_PUBLICACION = 10.0
+
+# Decimales del puntaje guardado (los puntajes iguales no se vuelven a escribir)
+DECIMALES = 4
+
+# Tiempo maximo (en segundos) que las vistas se acumulan en memoria
+INTERVALO_VISTAS = getattr(settings, "TENDENCIAS_INTERVALO_VISTAS", 60)
+
+# Cantidad de posts con vistas pendientes a partir de la cual se escriben
+MAX_VISTAS_PENDIENTES = 1000
+
+
+def decaimiento(dias: float) -> float:
+    """
+    Peso de la actividad de hace `dias` dias.
+    """
+    return 0.5 ** (max(dias, 0) / VIDA_MEDIA)
+
+
+def _sumar(post_id: int, fecha: date, **cantidades) -> None:
+    actividad = ActividadDiaria.objects.filter(post_id=post_id, fecha=fecha)
+    incrementos = {campo: F(campo) + n for campo, n in cantidades.items()}
+
+    if actividad.update(**incrementos):
+        return
+
+    try:
+        with transaction.atomic():
+            ActividadDiaria.objects.create(post_id=post_id, fecha=fecha, **cantidades)
+    except IntegrityError:
+        # otra solicitud creo la fila del dia al mismo tiempo
+        actividad.update(**incrementos)
+
+
+class _VistasPendientes:
+    """
+    Vistas acumuladas en memoria por el proceso: (id del post, dia) -> vistas.
+    """
+
+    def __init__(self) -> None:
+        self.vistas = Counter()
+        self.vaciado = time.monotonic()
+        self._lock = threading.Lock()
+
+    def sumar(self, post_id: int, fecha: date) -> bool:
+        """
+        Suma una vista. Retorna True si se deben escribir las vistas pendientes.
+        """
+        with self._lock:
+            self.vistas[(post_id, fecha)] += 1
+            return (
+                len(self.vistas) >= MAX_VISTAS_PENDIENTES
+                or time.monotonic() - self.vaciado >= INTERVALO_VISTAS
+            )
+
+    def tomar(self) -> Counter:
+        """
+        Retorna las vistas pendientes y las quita del acumulador.
+        """
+        with self._lock:
+            vistas, self.vistas = self.vistas, Counter()
+            self.vaciado = time.monotonic()
+            return vistas
+
+
+_pendientes = _VistasPendientes()
+
+
+def registrar_vista(post_id: int) -> None:
+    """
+    Suma una vista a la actividad del dia de un post. La vista se acumula en memoria
+    y se escribe junto con las demas vistas pendientes (ver `vaciar_vistas`).
+    """
+    if _pendientes.sumar(post_id, timezone.localdate()):
+        vaciar_vistas()
+
+
+def vaciar_vistas() -> int:
+    """
+    Escribe en `ActividadDiaria` las vistas acumuladas por el proceso, en una sola
+    transaccion. Las vistas de los posts eliminados se descartan.
+
+    Returns:
+        int: Cantidad de vistas escritas.
+    """
+    vistas = _pendientes.tomar()
+    existentes = set(
+        Post.objects.filter(id__in={id for id, _ in vistas}).values_list(
+            "id", flat=True
+        )
+    )
+
+    total = 0
+    with transaction.atomic():
+        for (post_id, fecha), cantidad in sorted(vistas.items()):
+            if post_id in existentes:
+                _sumar(post_id, fecha, vistas=cantidad)
+                total += cantidad
+    return total
+
+
+def registrar_favoritos(cantidades: Counter) -> None:
+    """
+    Suma a la actividad del dia de los posts la cantidad de favoritos agregados (o
+    quitados, si es negativa).
+
+    Args:
+        cantidades (Counter): Id del post -> cantidad de favoritos.
+    """
+    hoy = timezone.localdate()
+    for post_id, cantidad in cantidades.items():
+        if cantidad:
+            _sumar(post_id, hoy, favoritos=cantidad)
+
+
+def puntajes(ahora=None) -> dict[int, float]:
+    """
+    Calcula el puntaje de tendencia de los posts con actividad o publicados en los
+    ultimos `VENTANA` dias.
+
+    Returns:
+        dict: Id del post -> puntaje (los demas posts tienen puntaje 0).
+    """
+    ahora = ahora or timezone.now()
+    hoy = timezone.localdate(ahora)
+    desde = hoy - timedelta(days=VENTANA)
+
+    # peso de cada dia de la ventana, calculado una sola vez
+    pesos = {hoy - timedelta(days=d): decaimiento(d) for d in range(VENTANA + 1)}
+
+    resultado = Counter()
+    for post_id, fecha, vistas, favoritos in (
+        ActividadDiaria.objects.filter(fecha__gte=desde)
+        .values_list("post_id", "fecha", "vistas", "favoritos")
+        .iterator(chunk_size=5000)
+    ):
+        # los favoritos quitados no descuentan mas que los agregados ese dia
+        actividad = PESO_FAVORITO * max(favoritos, 0) + PESO_VISTA * vistas
+        resultado[post_id] += actividad * pesos.get(fecha, 0)
+
+    for post_id, publicacion in Post.objects.filter(
+        publication_date__gte=ahora - timedelta(days=VENTANA)
+    ).values_list("id", "publication_date"):
+        dias = (ahora - publicacion).total_seconds() / 86400
+        resultado[post_id] += PESO_PUBLICACION * decaimiento(dias)
+
+    return {
+        post_id: round(puntaje, DECIMALES)
+        for post_id, puntaje in resultado.items()
+        if round(puntaje, DECIMALES)
+    }
+
+
+def calcular(batch_size: int = 1000) -> int:
+    """
+    Recalcula y guarda el puntaje de tendencia de todos los posts, y elimina la
+    actividad anterior a la ventana. Solo se escriben los puntajes que cambian.
+
+    Returns:
+        int: Cantidad de posts actualizados.
+    """
+    ahora = timezone.now()
+    nuevos = puntajes(ahora)
+
+    # los puntajes guardados que no estan en `nuevos` vuelven a 0
+    actuales = dict(
+        Post.objects.exclude(trending_score=0).values_list("id", "trending_score")
+    )
+    cambios = {id: 0.0 for id in actuales if id not in nuevos}
+    cambios.update({id: p for id, p in nuevos.items() if actuales.get(id) != p})
+
+    ids = iter(sorted(cambios))
+    while lote := list(itertools.islice(ids, batch_size)):
+        Post.objects.bulk_update(
+            [Post(id=id, trending_score=cambios[id]) for id in lote],
+            ["trending_score"],
+        )
+
+    ActividadDiaria.objects.filter(
+        fecha__lt=timezone.localdate(ahora) - timedelta(days=VENTANA)
+    ).delete()
+
+    return len(cambios)
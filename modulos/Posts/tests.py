@@ -1,12 +1,27 @@
+import json
+import time
+
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
+from modulos import cache_compartido, paginas, secciones
 from modulos.Authorization.permissions import *
 from modulos.Categories.models import Category
-from modulos.Posts.models import Category, Post, Version
+from modulos.Posts import (destacados, etiquetas, extractos, favoritos,
+                           para_ti, portada, relacionados, tendencias)
+from modulos.Posts.buscador import buscador, resultados, sugerencias
+from modulos.Posts.corpus import AGUJAS, CANTIDAD_AGUJAS, generar_corpus
+from modulos.Posts.models import (ActividadDiaria, Category, Destacado,
+                                  EntradaFeed, Post, PostRelacionado, Tag,
+                                  Version, get_highlighted_post,
+                                  get_popular_posts)
 
 
 @pytest.mark.django_db
@@ -501,3 +516,1044 @@ def test_publish_post(client):
     assert (
         post_free.publication_date is not None
     ), "Post should have a publication date after publishing."
+
+
+@pytest.mark.django_db
+def test_search_suggestions_view(client):
+    """
+    Test del endpoint de sugerencias del buscador.
+    """
+    categoria = Category.objects.create(name="Programacion")
+    Post.objects.create(
+        title="Programando en Python",
+        content="Contenido de prueba",
+        category=categoria,
+        tags="python",
+        status=Post.PUBLISHED,
+    )
+    sugerencias.get_indice().reconstruir()
+
+    response = client.get(reverse("post_search_suggestions") + "?q=prog")
+    assert response.status_code == 200
+
+    data = response.json()
+    assert [s["valor"] for s in data["titulos"]] == ["Programando en Python"]
+    assert data["categorias"] == [{"valor": "Programacion"}]
+    assert data["tags"] == []
+
+
+@pytest.mark.django_db
+def test_home_view_cursor_pagination(client, django_assert_max_num_queries):
+    """
+    Test de la paginacion por cursor del home: las paginas no se solapan y no se
+    realiza ningun COUNT.
+    """
+    categoria = Category.objects.create(name="hola")
+    ahora = timezone.now()
+    posts = [
+        Post.objects.create(
+            title=f"Post {i}",
+            content="Contenido",
+            status=Post.PUBLISHED,
+            category=categoria,
+            # dos posts por fecha para probar el desempate por id
+            publication_date=ahora - timezone.timedelta(days=i // 2),
+        )
+        for i in range(25)
+    ]
+    esperados = sorted(posts, key=lambda p: (p.publication_date, p.id), reverse=True)
+
+    url = reverse("home")
+    vistos = []
+    cursor = None
+    with django_assert_max_num_queries(50) as ctx:
+        for _ in range(3):
+            response = client.get(url, {"cursor": cursor} if cursor else {})
+            pagina = response.context["posts_recientes"]
+            vistos.extend(pagina)
+            cursor = pagina.next_cursor
+
+    assert cursor is None
+    assert [p.id for p in vistos] == [p.id for p in esperados]
+    # el paginador no realiza un COUNT(*)
+    assert not [q for q in ctx.captured_queries if "COUNT(*)" in q["sql"]]
+
+    # volver a la pagina anterior desde la ultima
+    response = client.get(url, {"cursor": pagina.previous_cursor})
+    anterior = response.context["posts_recientes"]
+    assert [p.id for p in anterior] == [p.id for p in esperados[10:20]]
+    assert anterior.has_previous() and anterior.has_next()
+
+    # un cursor invalido retorna la primera pagina
+    response = client.get(url, {"cursor": "invalido"})
+    assert [p.id for p in response.context["posts_recientes"]] == [
+        p.id for p in esperados[:10]
+    ]
+
+
+@pytest.mark.django_db
+def test_generar_corpus():
+    """
+    Test del generador de corpus sintetico utilizado por los benchmarks.
+    """
+    generar_corpus(usuarios=5, categorias=3, posts=40, semilla=1, batch_size=15)
+
+    assert Post.objects.count() == 40
+    assert Category.objects.filter(name__startswith="Categoria ").count() == 3
+    assert Post.objects.filter(status=Post.PUBLISHED).exists()
+    assert not Post.objects.filter(
+        status=Post.PUBLISHED, publication_date__isnull=True
+    ).exists()
+
+    # las versiones anteriores de cada post
+    post = Post.objects.filter(version__gt=1).first()
+    assert Version.objects.filter(post_id=post.id).count() == post.version - 1
+
+    # los posts generados son encontrados por el buscador
+    assert Post.objects.filter(title__contains=AGUJAS[0]).count() == CANTIDAD_AGUJAS
+    assert sugerencias.normalizar(AGUJAS[0]) in sugerencias.normalizar(
+        resultados.paginar(AGUJAS[0], None, 10)[0].title
+    )
+
+
+@pytest.mark.django_db
+def test_export_search_view(client):
+    """
+    Test de la exportacion de los resultados de una busqueda en CSV y JSONL.
+    """
+    categoria = Category.objects.create(name="Programación")
+    for i in range(3):
+        Post.objects.create(
+            title=f"Django {i}",
+            content="Contenido",
+            status=Post.PUBLISHED,
+            category=categoria,
+        )
+    Post.objects.create(title="Flask", content="Contenido", category=categoria)
+
+    url = reverse("post_search_export")
+    user = get_user_model().objects.create_user(
+        username="editor", email="editor@example.com", password="password"
+    )
+    client.login(username="editor", password="password")
+
+    # sin permiso
+    assert client.get(url, {"input": "django"}).status_code == 403
+
+    user.user_permissions.add(Permission.objects.get(codename=POST_REVIEW_PERMISSION))
+
+    response = client.get(url, {"input": "django"})
+    assert response.streaming
+    assert response["Content-Type"].startswith("text/csv")
+    lineas = b"".join(response.streaming_content).decode().splitlines()
+    assert lineas[0].startswith("id,titulo,estado,categoria")
+    assert len(lineas) == 4
+    assert "Programación" in lineas[1]
+
+    response = client.get(url, {"input": "#titulo: django", "formato": "jsonl"})
+    filas = [json.loads(l) for l in b"".join(response.streaming_content).splitlines()]
+    assert sorted(f["titulo"] for f in filas) == ["Django 0", "Django 1", "Django 2"]
+    assert filas[0]["url"].startswith("http://testserver/")
+
+    assert client.get(url, {"input": "django", "formato": "xml"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_publicaciones_relacionadas(client, django_capture_on_commit_callbacks):
+    """
+    Test de las publicaciones relacionadas: se actualizan al publicar, editar o
+    despublicar un post (una vez confirmada la transaccion) y se muestran en la
+    pagina de detalle.
+    """
+    categoria = Category.objects.create(name="Programación")
+
+    def confirmar():
+        return django_capture_on_commit_callbacks(execute=True)
+
+    def publicar(titulo, contenido, tags=""):
+        with confirmar():
+            return Post.objects.create(
+                title=titulo,
+                content=contenido,
+                tags=tags,
+                status=Post.PUBLISHED,
+                category=categoria,
+            )
+
+    django = publicar("Tutorial de Django", "Vistas, modelos y migraciones", "django")
+    orm = publicar("El ORM de Django", "Modelos, migraciones y consultas", "django")
+    cocina = publicar("Recetas de cocina", "Empanadas y chipa", "cocina")
+
+    def vecinos(post):
+        return [p.id for p in relacionados.obtener(post)]
+
+    assert vecinos(django) == [orm.id]
+    assert vecinos(orm) == [django.id]
+    assert vecinos(cocina) == []
+
+    # al editar un post se recalculan sus vecinos
+    with confirmar():
+        cocina.title = "Recetas para programadores Django"
+        cocina.tags = "django, cocina"
+        cocina.save()
+    assert cocina.id in vecinos(django)
+    assert vecinos(cocina)[0] in (django.id, orm.id)
+
+    # cambiar la frecuencia de los terminos (sin agregar terminos) cambia el vector
+    pesos = dict(cocina.vector.values_list("termino", "peso"))
+    with confirmar():
+        cocina.content = "Empanadas y chipa. Empanadas, empanadas y mas empanadas"
+        cocina.save()
+    assert dict(cocina.vector.values_list("termino", "peso")) != pesos
+
+    # los cambios que no afectan al texto no recalculan el vector, y los posts
+    # vencidos no se muestran como relacionados
+    with confirmar() as callbacks:
+        cocina.expiration_date = timezone.now() - timezone.timedelta(days=1)
+        cocina.save()
+    assert not [c for c in callbacks if "actualizar_relacionados" in c.__qualname__]
+    assert cocina.id not in vecinos(django)
+    with confirmar():
+        cocina.expiration_date = None
+        cocina.save(update_fields=["expiration_date"])
+
+    # un post que deja de estar publicado se quita de las relaciones
+    with confirmar():
+        orm.status = Post.DRAFT
+        orm.save()
+    assert not PostRelacionado.objects.filter(relacionado=orm).exists()
+    assert vecinos(django) == [cocina.id]
+
+    # el recalculo completo coincide con la actualizacion incremental
+    assert relacionados.recalcular() == 2
+    assert vecinos(django) == [cocina.id]
+
+    response = client.get(reverse("post_detail", args=[django.id]))
+    assert response.context["relacionados"][0].id == cocina.id
+    assert "Publicaciones relacionadas" in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_tags(django_assert_num_queries):
+    """
+    Test de la sincronizacion de los tags, sus contadores y los filtros por tag.
+    """
+    categoria = Category.objects.create(name="Programación")
+    python = Post.objects.create(
+        title="Python",
+        content="Contenido",
+        tags="Python, web, python",
+        status=Post.PUBLISHED,
+        category=categoria,
+    )
+    django = Post.objects.create(
+        title="Django",
+        content="Contenido",
+        tags="python, Django",
+        status=Post.PUBLISHED,
+        category=categoria,
+    )
+    borrador = Post.objects.create(
+        title="Borrador", content="Contenido", tags="python", category=categoria
+    )
+
+    def cantidades():
+        return dict(Tag.objects.values_list("name", "cantidad"))
+
+    assert etiquetas.separar(python.tags) == ["Python", "web"]
+    assert etiquetas.tags_de_post(django) == ["Python", "Django"]
+    # los borradores no se cuentan
+    assert cantidades() == {"Python": 2, "web": 1, "Django": 1}
+
+    with django_assert_num_queries(1):
+        assert [t.name for t in etiquetas.nube()] == ["Django", "Python", "web"]
+
+    def buscar(input):
+        return set(buscador.generate_query_set(input).execute())
+
+    assert buscar("#tags: python") == {python, django, borrador}
+    assert buscar("#tags: python, web") == {python}
+    assert buscar("#tags: web | #tags: djan") == {python, django}
+    assert buscar("#tags!: web") == {django, borrador}
+
+    # editar, despublicar y eliminar actualizan los contadores
+    python.tags = "web, api"
+    python.save()
+    assert cantidades() == {"Python": 1, "web": 1, "Django": 1, "api": 1}
+
+    django.active = False
+    django.save()
+    assert cantidades() == {"Python": 0, "web": 1, "Django": 0, "api": 1}
+
+    python.delete()
+    assert cantidades() == {"Python": 0, "web": 0, "Django": 0, "api": 0}
+
+    etiquetas.recalcular_cantidades()
+    assert set(cantidades().values()) == {0}
+
+    # la normalizacion puede alargar un nombre de 80 caracteres: se recorta despues
+    largo = "ß" * 80
+    assert etiquetas.separar(f"{largo}, {largo}x") == [largo]
+    django.tags = largo
+    django.save()
+    assert Tag.objects.get(name=largo).name_normalizado == "s" * 80
+
+
+@pytest.mark.django_db
+def test_contadores_de_favoritos(client, django_assert_num_queries):
+    """
+    Test de los contadores de favoritos de los posts y de las categorias.
+    """
+    programacion = Category.objects.create(name="Programación")
+    deportes = Category.objects.create(name="Deportes")
+    usuarios = [
+        get_user_model().objects.create_user(
+            username=f"usuario{i}", email=f"usuario{i}@example.com", password="x"
+        )
+        for i in range(3)
+    ]
+    posts = [
+        Post.objects.create(
+            title=f"Post {i}",
+            content="Contenido",
+            status=Post.PUBLISHED,
+            category=programacion,
+        )
+        for i in range(3)
+    ]
+
+    def contadores():
+        return [p.favorite_count for p in Post.objects.order_by("id")], {
+            c.name: c.favorite_count for c in Category.objects.all()
+        }
+
+    posts[0].favorites.add(*usuarios)
+    usuarios[0].favorite_posts.add(posts[1], posts[2])
+    assert contadores() == ([3, 1, 1], {"Programación": 5, "Deportes": 0})
+
+    # agregar o quitar favoritos inexistentes no modifica los contadores
+    posts[0].favorites.add(usuarios[0])
+    posts[1].favorites.remove(usuarios[1])
+    usuarios[1].favorite_posts.remove(posts[2])
+    assert contadores() == ([3, 1, 1], {"Programación": 5, "Deportes": 0})
+
+    # un guardado comun no sobrescribe el contador
+    post = Post.objects.get(id=posts[0].id)
+    posts[0].favorites.remove(usuarios[2])
+    post.category = deportes
+    post.save()
+    assert contadores() == ([2, 1, 1], {"Programación": 2, "Deportes": 2})
+
+    posts[1].status = Post.DRAFT
+    posts[1].save()
+    usuarios[0].favorite_posts.clear()
+    assert contadores() == ([1, 0, 0], {"Programación": 0, "Deportes": 1})
+
+    with django_assert_num_queries(1):
+        assert {p.id for p in get_popular_posts()} == {posts[0].id, posts[2].id}
+
+    # la vista de favoritos mantiene los contadores
+    client.login(username="usuario0", password="x")
+    client.post(reverse("post_favorite", args=[posts[2].id]))
+    assert contadores() == ([1, 0, 1], {"Programación": 1, "Deportes": 1})
+
+    usuarios[1].delete()
+    assert contadores() == ([0, 0, 1], {"Programación": 1, "Deportes": 0})
+
+    Post.objects.update(favorite_count=10)
+    assert favoritos.reconciliar() == (3, 2)
+    assert contadores() == ([0, 0, 1], {"Programación": 1, "Deportes": 0})
+
+    # guardar una instancia con columnas diferidas no las carga ni pisa contadores
+    post = Post.objects.only("id", "title", "status", "active").get(id=posts[2].id)
+    Post.objects.filter(id=post.id).update(favorite_count=5)
+    post.title = "Titulo editado"
+    with CaptureQueriesContext(connection) as consultas:
+        post.save()
+    actualizacion = next(
+        q["sql"] for q in consultas if q["sql"].startswith('UPDATE "Posts_post"')
+    )
+    assert '"title_normalizado"' in actualizacion
+    assert '"content"' not in actualizacion and '"favorite_count"' not in actualizacion
+    post = Post.objects.get(id=post.id)
+    assert (post.favorite_count, post.title_normalizado) == (5, "titulo editado")
+
+
+@pytest.mark.django_db
+def test_secciones_home(client, django_assert_num_queries, monkeypatch):
+    """
+    Test del cache de las secciones del home: las visitas siguientes no consultan las
+    secciones, que se invalidan al guardar los modelos de los que dependen.
+    """
+    cache.clear()
+    usuario = get_user_model().objects.create_user(
+        username="usuario", email="usuario@example.com", password="x"
+    )
+    categoria = Category.objects.create(name="Programación")
+    post = Post.objects.create(
+        title="Post popular",
+        content="Contenido",
+        status=Post.PUBLISHED,
+        category=categoria,
+    )
+
+    # usuario autenticado: sin el cache de paginas de los visitantes anonimos
+    client.login(username="usuario", password="x")
+    url = reverse("home")
+    client.get(url)
+    # solo la sesion y los permisos del usuario
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert not [q for q in ctx.captured_queries if "Posts_post" in q["sql"]]
+    assert [p.id for p in response.context["posts_recientes"]] == [post.id]
+    assert response.context["categorias_populares"] == [categoria]
+
+    # guardar un post invalida las secciones que muestran posts
+    otro = Post.objects.create(
+        title="Otro post",
+        content="Contenido",
+        status=Post.PUBLISHED,
+        category=categoria,
+    )
+    response = client.get(url)
+    assert [p.id for p in response.context["posts_recientes"]] == [otro.id, post.id]
+
+    # los favoritos invalidan las categorias populares, pero no los posts recientes
+    post.favorites.add(usuario)
+    assert portada.CATEGORIAS_POPULARES.obtener()[0].favorite_count == 1
+    with django_assert_num_queries(0):
+        portada.RECIENTES.obtener()
+
+    # los posts populares se actualizan al recalcular las tendencias
+    assert [p.id for p in portada.POPULARES.obtener()] == [otro.id, post.id]
+    call_command("calcular_tendencias")
+    assert [p.id for p in portada.POPULARES.obtener()] == [post.id, otro.id]
+
+    # renombrar una categoria actualiza el menu y los posts recientes
+    categoria.name = "Desarrollo"
+    categoria.save()
+    assert [c.name for c in client.get(url).context["categories"]] == ["Desarrollo"]
+    assert portada.RECIENTES.obtener()[0].category.name == "Desarrollo"
+
+
+@pytest.mark.django_db
+def test_secciones_bloqueo(django_assert_num_queries):
+    """
+    Test de la proteccion contra recalculos simultaneos: mientras otro proceso
+    recalcula una seccion se utiliza el valor anterior.
+    """
+    llamadas = []
+
+    def calcular():
+        llamadas.append(1)
+        return len(llamadas)
+
+    seccion = secciones.Seccion("test:bloqueo", 60, calcular, ["test"])
+    cache.delete_many([seccion.clave, seccion.clave_bloqueo])
+
+    assert seccion.obtener() == 1
+    assert seccion.obtener() == 1
+
+    # otro proceso tiene el bloqueo: se retorna el valor invalidado
+    secciones.invalidar("test")
+    cache.add(seccion.clave_bloqueo, 1)
+    assert seccion.obtener() == 1
+    assert len(llamadas) == 1
+
+    cache.delete(seccion.clave_bloqueo)
+    assert seccion.obtener() == 2
+    assert seccion.obtener() == 2
+    assert len(llamadas) == 2
+
+
+@pytest.mark.django_db
+def test_secciones_cache_compartido(settings):
+    """
+    Test de las secciones sobre un cache compartido (`DatabaseCache`): las
+    invalidaciones y los bloqueos de un proceso afectan a los demas.
+    """
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "cache_test",
+        }
+    }
+    call_command("createcachetable", verbosity=0)
+
+    valores = iter(range(1, 10))
+    # dos procesos con la misma seccion
+    seccion = secciones.Seccion("test:compartido", 60, lambda: next(valores), ["test"])
+    otra = secciones.Seccion("test:compartido", 60, lambda: next(valores), ["test"])
+
+    assert seccion.obtener() == 1
+    assert otra.obtener() == 1
+
+    version = secciones.versiones(["test"])
+    secciones.invalidar("test")
+    secciones.invalidar("test")
+    assert secciones.versiones(["test"]) != version
+    assert otra.obtener() == 2
+    assert seccion.obtener() == 2
+
+    # el bloqueo de un proceso impide el recalculo en los demas
+    secciones.invalidar("test")
+    assert cache.add(seccion.clave_bloqueo, 1, secciones.TIEMPO_BLOQUEO)
+    assert otra.obtener() == 2
+
+
+def test_cache_volatil(settings):
+    """
+    Test del cache volatil: las paginas y las listas de resultados no desplazan a las
+    versiones del cache por defecto.
+    """
+    assert cache_compartido.volatil() is caches["default"]
+
+    settings.CACHES = {
+        **settings.CACHES,
+        "volatil": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "volatil",
+            "OPTIONS": {"MAX_ENTRIES": 10},
+        },
+    }
+    assert cache_compartido.volatil() is caches["volatil"]
+
+    version = secciones.versiones(["test:volatil"])
+    for i in range(100):
+        cache_compartido.volatil().set(f"pagina:{i}", "contenido")
+    assert secciones.versiones(["test:volatil"]) == version
+
+
+@pytest.mark.django_db
+def test_extractos(client, django_assert_max_num_queries):
+    """
+    Test del extracto, la cantidad de palabras y el tiempo de lectura de los posts, y
+    de las listas que no cargan el contenido completo.
+    """
+    categoria = Category.objects.create(name="Programación")
+    post = Post.objects.create(
+        title="Post con markdown",
+        content=(
+            "# Introducción\n\nUn **post** con un [enlace](https://makex.com) y una "
+            "imagen ![portada](portada.png).\n\n```python\nprint('hola')\n```\n"
+        ),
+        status=Post.PUBLISHED,
+        category=categoria,
+    )
+    assert post.excerpt == "Introducción Un post con un enlace y una imagen ."
+    assert post.word_count == 9
+    assert post.reading_time == 1
+
+    post.content = "palabra " * 1000
+    post.save(update_fields=["content"])
+    post.refresh_from_db()
+    assert post.word_count == 1000
+    assert post.reading_time == 5
+    assert len(post.excerpt) <= extractos.LARGO
+
+    # guardar otras columnas no recalcula el extracto
+    Post.objects.filter(id=post.id).update(excerpt="sin cambios")
+    post.title = "Nuevo titulo"
+    post.save(update_fields=["title"])
+    post.refresh_from_db()
+    assert post.excerpt == "sin cambios"
+
+    # el home no carga el contenido de los posts
+    with django_assert_max_num_queries(50) as ctx:
+        response = client.get(reverse("home"))
+    assert b"sin cambios" in response.content
+    assert not [q for q in ctx.captured_queries if '"content"' in q["sql"]]
+
+
+@pytest.mark.django_db
+def test_listas_sin_consultas_por_post(client, django_assert_num_queries):
+    """
+    Test de las listas de posts: la cantidad de consultas no depende de la cantidad de
+    posts mostrados (el autor y la categoria se cargan en la misma consulta).
+    """
+    usuario = get_user_model().objects.create_user(
+        username="editor", email="editor@example.com", password="x"
+    )
+    for permiso in (
+        KANBAN_VIEW_PERMISSION,
+        POST_MANAGE_PERMISSION,
+        POST_EDIT_PERMISSION,
+    ):
+        usuario.user_permissions.add(Permission.objects.get(codename=permiso))
+    client.login(username="editor", password="x")
+
+    def crear_posts(cantidad):
+        for i in range(cantidad):
+            autor = get_user_model().objects.create_user(
+                username=f"autor{Post.objects.count()}",
+                email=f"autor{Post.objects.count()}@example.com",
+                password="x",
+            )
+            categoria = Category.objects.create(name=f"Categoria {autor.username}")
+            for estado in (Post.PUBLISHED, Post.PENDING_REVIEW, Post.DRAFT):
+                post = Post.objects.create(
+                    title=f"Post de {autor.username}",
+                    content="Contenido",
+                    status=estado,
+                    category=categoria,
+                    author=usuario if estado == Post.DRAFT else autor,
+                    publication_date=timezone.now(),
+                )
+                post.favorites.add(usuario)
+
+    urls = [
+        reverse("home"),
+        reverse("post_list"),
+        reverse("kanban_board"),
+        reverse("post_favorite_list"),
+    ]
+
+    def consultas(url):
+        # sin las secciones cacheadas, para que se consulten todas las listas
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            assert client.get(url).status_code == 200
+        return len(ctx.captured_queries)
+
+    crear_posts(1)
+    antes = {url: consultas(url) for url in urls}
+    crear_posts(4)
+    assert {url: consultas(url) for url in urls} == antes
+
+    categoria = Category.objects.first()
+    url = reverse("category_detail", args=[categoria.id])
+    antes = consultas(url)
+    Post.objects.filter(status=Post.PUBLISHED).update(category=categoria)
+    assert consultas(url) == antes
+
+    with django_assert_num_queries(1):
+        for post in Post.objects.tarjetas():
+            str(post.author), post.category.name, post.excerpt
+
+
+@pytest.mark.django_db
+def test_tendencias(client, monkeypatch):
+    """
+    Test del puntaje de tendencia: la actividad reciente pesa mas que la antigua, y
+    los posts populares del home se ordenan por el puntaje calculado.
+    """
+    tendencias.vaciar_vistas()
+    categoria = Category.objects.create(name="Programación")
+    hace_un_anio = timezone.now() - timezone.timedelta(days=365)
+    antiguo, reciente, sin_actividad = [
+        Post.objects.create(
+            title=f"Post {i}",
+            content="Contenido",
+            status=Post.PUBLISHED,
+            category=categoria,
+            publication_date=hace_un_anio,
+        )
+        for i in range(3)
+    ]
+    usuarios = [
+        get_user_model().objects.create_user(
+            username=f"usuario{i}", email=f"usuario{i}@example.com", password="x"
+        )
+        for i in range(3)
+    ]
+
+    # el post antiguo tiene mas favoritos, pero los recibio hace dos semanas
+    antiguo.favorites.add(*usuarios)
+    ActividadDiaria.objects.filter(post=antiguo).update(
+        fecha=timezone.localdate() - timezone.timedelta(days=14)
+    )
+    reciente.favorites.add(usuarios[0])
+    client.get(reverse("post_detail", args=[reciente.id]))
+    client.get(reverse("post_detail", args=[reciente.id]))
+
+    # las vistas se acumulan en memoria y se escriben en lote
+    assert ActividadDiaria.objects.get(post=reciente).vistas == 0
+    assert tendencias.vaciar_vistas() == 2
+    hoy = ActividadDiaria.objects.get(post=reciente)
+    assert (hoy.fecha, hoy.vistas, hoy.favoritos) == (timezone.localdate(), 2, 1)
+
+    # pasado el intervalo, la vista se escribe junto con las pendientes
+    monkeypatch.setattr(tendencias, "INTERVALO_VISTAS", 0)
+    tendencias.registrar_vista(sin_actividad.id)
+    assert ActividadDiaria.objects.get(post=sin_actividad).vistas == 1
+    ActividadDiaria.objects.filter(post=sin_actividad).delete()
+
+    assert tendencias.calcular() == 2
+    puntajes = dict(Post.objects.values_list("id", "trending_score"))
+    assert puntajes[reciente.id] == tendencias.PESO_FAVORITO + 2
+    assert 0 < puntajes[antiguo.id] < puntajes[reciente.id]
+    assert puntajes[sin_actividad.id] == 0
+    assert [p.id for p in get_popular_posts()] == [
+        reciente.id,
+        antiguo.id,
+        sin_actividad.id,
+    ]
+
+    # sin cambios no se escribe ningun puntaje; la actividad fuera de la ventana se
+    # descarta y los puntajes vuelven a 0
+    assert tendencias.calcular() == 0
+    ActividadDiaria.objects.update(
+        fecha=timezone.localdate() - timezone.timedelta(days=60)
+    )
+    assert tendencias.calcular() == 2
+    assert not ActividadDiaria.objects.exists()
+    assert not Post.objects.exclude(trending_score=0).exists()
+
+    # un guardado comun no sobrescribe el puntaje
+    guardado = Post.objects.get(id=antiguo.id)
+    Post.objects.filter(id=antiguo.id).update(trending_score=7)
+    guardado.title = "Otro titulo"
+    guardado.save()
+    assert Post.objects.get(id=antiguo.id).trending_score == 7
+
+
+@pytest.mark.django_db
+def test_post_destacado(client, django_assert_num_queries, monkeypatch):
+    """
+    Test del post destacado: destacados programados y con fecha de fin, y el cache
+    del destacado del momento.
+    """
+    categoria = Category.objects.create(name="Programación")
+    primero, segundo = [
+        Post.objects.create(
+            title=f"Post {i}",
+            content="Contenido",
+            status=Post.PUBLISHED,
+            category=categoria,
+        )
+        for i in range(2)
+    ]
+    assert get_highlighted_post() is None
+
+    usuario = get_user_model().objects.create_user(
+        username="admin", email="admin@example.com", password="x"
+    )
+    usuario.user_permissions.add(
+        Permission.objects.get(codename=POST_HIGHLIGHT_PERMISSION)
+    )
+    client.login(username="admin", password="x")
+    url = reverse("highlight_post", args=[primero.id])
+    assert client.get(url).status_code == 200
+    client.post(url, {"date": timezone.localtime().strftime("%Y-%m-%d %H:%M")})
+    assert get_highlighted_post() == primero
+
+    # el destacado del momento se resuelve una sola vez
+    with django_assert_num_queries(0):
+        assert get_highlighted_post() == primero
+        assert get_highlighted_post().excerpt == "Contenido"
+
+    # el valor guardado vence aunque no se invalide (ej: un cambio sin senales)
+    monkeypatch.setattr(destacados, "TIEMPO", 1)
+    destacados.invalidar()
+    assert get_highlighted_post() == primero
+    Destacado.objects.update(end_date=timezone.now())
+    assert get_highlighted_post() == primero
+    time.sleep(1.1)
+    assert get_highlighted_post() is None
+    Destacado.objects.update(end_date=None)
+    destacados.invalidar()
+    assert get_highlighted_post() == primero
+
+    # un destacado programado reemplaza al vigente cuando comienza, y este vuelve a
+    # mostrarse cuando el programado termina
+    ahora = timezone.now()
+    hora = timezone.timedelta(hours=1)
+    Destacado.objects.create(post=segundo, date=ahora + hora, end_date=ahora + 3 * hora)
+    assert get_highlighted_post() == primero
+    assert destacados.resolver(ahora) == (primero, ahora + hora)
+    assert destacados.resolver(ahora + 2 * hora) == (segundo, ahora + 3 * hora)
+    assert destacados.resolver(ahora + 4 * hora) == (primero, None)
+
+    # la fecha de fin debe ser posterior al comienzo
+    response = client.post(
+        url, {"date": "2030-01-02 00:00", "end_date": "2030-01-01 00:00"}
+    )
+    assert response.status_code == 200
+    assert Destacado.objects.count() == 2
+
+    # inactivar el post destacado invalida el destacado del momento
+    Destacado.objects.create(post=segundo)
+    assert get_highlighted_post() == segundo
+    segundo.active = False
+    segundo.save()
+    assert get_highlighted_post() == primero
+    assert client.get(reverse("home")).context["post_destacado"] == primero
+
+
+@pytest.mark.django_db
+def test_cache_paginas(client, django_assert_num_queries, monkeypatch):
+    """
+    Test del cache de paginas de los visitantes anonimos: las paginas se sirven sin
+    ejecutar las vistas y solo se purgan las paginas de los objetos modificados.
+    """
+    cache.clear()
+    paginas.reiniciar_estadisticas()
+    tendencias.vaciar_vistas()
+    monkeypatch.setattr(paginas, "INTERVALO_ESTADISTICAS", 60 * 60)
+    categoria = Category.objects.create(name="Programación")
+    otra_categoria = Category.objects.create(name="Diseño")
+    post, otro = [
+        Post.objects.create(
+            title=f"Post {i}",
+            content="Contenido",
+            status=Post.PUBLISHED,
+            category=categoria,
+        )
+        for i in range(2)
+    ]
+    url_post = reverse("post_detail", args=[post.id])
+    url_otro = reverse("post_detail", args=[otro.id])
+    url_categoria = reverse("category_detail", args=[categoria.id])
+    urls = [reverse("home"), url_post, url_otro, url_categoria]
+
+    for url in urls:
+        assert client.get(url)["X-Cache"] == "MISS"
+    # las vistas de los posts se acumulan en memoria
+    with django_assert_num_queries(0):
+        for url in urls:
+            assert client.get(url)["X-Cache"] == "HIT"
+
+    # las visitas servidas desde el cache suman vistas al post
+    tendencias.vaciar_vistas()
+    assert ActividadDiaria.objects.get(post=post).vistas == 2
+
+    # editar un post purga su detalle, el home y su categoria, pero no los demas posts
+    post.title = "Nuevo titulo"
+    post.save()
+    assert client.get(url_post)["X-Cache"] == "MISS"
+    assert client.get(reverse("home"))["X-Cache"] == "MISS"
+    assert client.get(url_categoria)["X-Cache"] == "MISS"
+    assert client.get(url_otro)["X-Cache"] == "HIT"
+
+    # cambiar de categoria purga tambien la categoria anterior
+    assert client.get(url_categoria)["X-Cache"] == "HIT"
+    otro.category = otra_categoria
+    otro.save()
+    assert client.get(url_categoria)["X-Cache"] == "MISS"
+
+    # las categorias se muestran en todas las paginas
+    otra_categoria.name = "Diseño gráfico"
+    otra_categoria.save()
+    for url in urls:
+        assert client.get(url)["X-Cache"] == "MISS"
+
+    # los usuarios autenticados no utilizan el cache
+    get_user_model().objects.create_user(
+        username="usuario", email="usuario@example.com", password="x"
+    )
+    client.login(username="usuario", password="x")
+    assert "X-Cache" not in client.get(url_post)
+
+    # los aciertos y fallos se acumulan en memoria hasta vaciarse
+    assert cache.get("paginas:aciertos") is None
+    assert paginas.estadisticas() == {"aciertos": 6, "fallos": 12, "tasa": 6 / 18}
+
+
+@pytest.mark.django_db
+def test_get_condicional(client, django_assert_num_queries):
+    """
+    Test de las solicitudes condicionales: las paginas sin cambios responden 304 sin
+    renderizar la plantilla, y los validadores cambian al modificar el contenido.
+    """
+    cache.clear()
+    tendencias.vaciar_vistas()
+    categoria = Category.objects.create(name="Programación")
+    post = Post.objects.create(
+        title="Post",
+        content="Contenido",
+        status=Post.PUBLISHED,
+        category=categoria,
+    )
+    url_post = reverse("post_detail", args=[post.id])
+    url_categoria = reverse("category_detail", args=[categoria.id])
+
+    for url in [reverse("home"), url_post, url_categoria]:
+        response = client.get(url)
+        assert response["ETag"].startswith('W/"')
+        assert client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 304
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        assert response.status_code == 304
+
+    # sin el cache de paginas (otra url): solo se consulta la version del post (la
+    # vista se acumula en memoria)
+    etag = client.get(url_post)["ETag"]
+    with django_assert_num_queries(1):
+        response = client.get(url_post + "?ref=1", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+    tendencias.vaciar_vistas()
+    assert ActividadDiaria.objects.get(post=post).vistas == 5
+
+    # editar el post cambia sus validadores
+    post.title = "Nuevo titulo"
+    post.save()
+    response = client.get(url_post, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+    # los posts expirados y los usuarios autenticados no tienen validadores
+    Post.objects.filter(id=post.id).update(
+        expiration_date=timezone.now() - timezone.timedelta(days=1)
+    )
+    assert "ETag" not in client.get(url_post + "?ref=2")
+    get_user_model().objects.create_user(
+        username="usuario", email="usuario@example.com", password="x"
+    )
+    client.login(username="usuario", password="x")
+    assert "ETag" not in client.get(url_categoria)
+
+
+@pytest.mark.django_db
+def test_cache_paginas_no_compartido(client, settings):
+    """
+    Test del cache de paginas con un cache no compartido entre procesos: las paginas
+    no se cachean ni responden solicitudes condicionales.
+    """
+    cache.clear()
+    settings.CACHE_COMPARTIDO = False
+    categoria = Category.objects.create(name="Programación")
+    post = Post.objects.create(
+        title="Post",
+        content="Contenido",
+        status=Post.PUBLISHED,
+        category=categoria,
+    )
+
+    for url in [reverse("home"), reverse("post_detail", args=[post.id])]:
+        for _ in range(2):
+            response = client.get(url)
+            assert response.status_code == 200
+            assert "X-Cache" not in response and "ETag" not in response
+
+
+@pytest.mark.django_db
+def test_feed_para_ti(
+    client,
+    django_assert_num_queries,
+    django_capture_on_commit_callbacks,
+    monkeypatch,
+):
+    """
+    Test del feed "Para ti": los posts publicados se agregan al feed de los usuarios
+    con favoritos de su categoria o de su autor una vez confirmada la transaccion, el
+    feed se actualiza de forma incremental cuando cambian los intereses, y se lee sin
+    agregar la tabla de favoritos.
+    """
+    programacion = Category.objects.create(name="Programación")
+    diseno = Category.objects.create(name="Diseño")
+    musica = Category.objects.create(name="Música")
+    autor, otro_autor, lector = [
+        get_user_model().objects.create_user(
+            username=nombre, email=f"{nombre}@example.com", password="x"
+        )
+        for nombre in ["autor", "otro_autor", "lector"]
+    ]
+
+    def confirmar():
+        return django_capture_on_commit_callbacks(execute=True)
+
+    def publicar(titulo, categoria, author, **kwargs):
+        with confirmar():
+            return Post.objects.create(
+                title=titulo,
+                content="Contenido",
+                status=Post.PUBLISHED,
+                category=categoria,
+                author=author,
+                publication_date=timezone.now(),
+                **kwargs,
+            )
+
+    def escrituras_feed(consultas):
+        tabla = EntradaFeed._meta.db_table
+        return [
+            q["sql"]
+            for q in consultas
+            if tabla in q["sql"] and not q["sql"].startswith("SELECT")
+        ]
+
+    # el lector tiene favoritos de programacion (de `autor`); el feed se actualiza
+    # recien al confirmarse la transaccion
+    favorito = publicar("Favorito", programacion, autor)
+    with confirmar() as callbacks:
+        lector.favorite_posts.add(favorito)
+        assert not lector.feed.exists()
+    assert callbacks
+    assert [e.post for e in lector.feed.all()] == [favorito]
+
+    # fan-out al publicar: misma categoria, mismo autor, y otros posts que no
+    # interesan al lector
+    misma_categoria = publicar("Misma categoria", programacion, otro_autor)
+    mismo_autor = publicar("Mismo autor", diseno, autor)
+    publicar("Otro tema", musica, otro_autor)
+    with confirmar():
+        borrador = Post.objects.create(
+            title="Borrador", content="Contenido", category=programacion, author=autor
+        )
+
+    client.login(username="lector", password="x")
+    response = client.get(reverse("post_para_ti"))
+    assert response.status_code == 200
+    assert [p.id for p in response.context["posts"]] == [
+        mismo_autor.id,
+        misma_categoria.id,
+        favorito.id,
+    ]
+
+    # una pagina del feed: el rango de entradas del usuario y los posts por id
+    with django_assert_num_queries(2):
+        assert len(para_ti.pagina(lector.id, None, 10)) == 3
+    primera = para_ti.pagina(lector.id, None, 2)
+    assert list(para_ti.pagina(lector.id, primera.next_cursor, 2)) == [favorito]
+
+    # el borrador se agrega al publicarse y se quita al inactivarse; los posts
+    # expirados no se muestran
+    with confirmar():
+        borrador.status = Post.PUBLISHED
+        borrador.publication_date = timezone.now()
+        borrador.save()
+    assert para_ti.pagina(lector.id, None, 10)[0] == borrador
+    with confirmar():
+        borrador.active = False
+        borrador.save()
+        mismo_autor.expiration_date = timezone.now() - timezone.timedelta(minutes=1)
+        mismo_autor.save()
+    assert list(para_ti.pagina(lector.id, None, 10)) == [misma_categoria, favorito]
+
+    # al quitar el favorito, el feed pierde sus categorias y autores
+    with confirmar():
+        lector.favorite_posts.remove(favorito)
+    assert not EntradaFeed.objects.filter(usuario=lector).exists()
+    with confirmar():
+        lector.favorite_posts.add(favorito)
+    assert EntradaFeed.objects.filter(usuario=lector).count() == 2
+
+    # un favorito de los mismos intereses no modifica el feed
+    otro_favorito = publicar("Otro favorito", programacion, autor)
+    assert EntradaFeed.objects.filter(usuario=lector).count() == 3
+    with CaptureQueriesContext(connection) as consultas, confirmar():
+        lector.favorite_posts.add(otro_favorito)
+        lector.favorite_posts.remove(otro_favorito)
+    assert escrituras_feed(consultas) == []
+
+    # al inactivarse un favorito, el feed pierde sus categorias y autores, y los
+    # recupera al reactivarse
+    with confirmar():
+        favorito.active = False
+        favorito.save()
+    assert not EntradaFeed.objects.filter(usuario=lector).exists()
+    with confirmar():
+        favorito.active = True
+        favorito.save()
+    assert EntradaFeed.objects.filter(usuario=lector).count() == 3
+
+    # el feed de cada usuario esta limitado a los posts mas recientes
+    monkeypatch.setattr(para_ti, "LIMITE", 2)
+    nuevo = publicar("Nuevo", programacion, otro_autor)
+    assert [e.post_id for e in lector.feed.order_by("-publication_date")] == [
+        nuevo.id,
+        otro_favorito.id,
+    ]
+
+    call_command("reconstruir_para_ti")
+    assert EntradaFeed.objects.filter(usuario=lector).count() == 2
@@ -8,6 +8,8 @@ urlpatterns = [
     path("inactives", manage_inactive_posts, name="inactives_list"),
     path("<int:id>/", view_post, name="post_detail"),
     path("search/", enhanced_search, name="post_search"),
+    path("search/export/", export_search, name="post_search_export"),
+    path("suggestions/", search_suggestions, name="post_search_suggestions"),
     # -- administracion de contenido --
     path("create/", create_post, name="post_create"),
     path("<int:id>/inactivate", inactivate_post, name="inactivate_post"),
@@ -38,4 +40,5 @@ urlpatterns = [
     # -- miscelanea --
     path("<int:id>/add_favorite", favorite_post, name="post_favorite"),
     path("favorites", favorite_list, name="post_favorite_list"),
+    path("para-ti/", para_ti_view, name="post_para_ti"),
 ]
@@ -5,14 +5,15 @@ from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.models import AnonymousUser, Group
 from django.core.mail import send_mail
 from django.core.paginator import Paginator
-from django.db.models import Count
 from django.db.models.query_utils import Q
 from django.http.response import (HttpResponse, HttpResponseBadRequest,
-                                  HttpResponseForbidden, HttpResponseRedirect)
+                                  HttpResponseForbidden, HttpResponseRedirect,
+                                  JsonResponse, StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
 
+from modulos import paginas
 from modulos.Authorization.decorators import permissions_required
 from modulos.Authorization.permissions import (KANBAN_VIEW_PERMISSION,
                                                POST_APPROVE_PERMISSION,
@@ -26,15 +27,60 @@ from modulos.Authorization.permissions import (KANBAN_VIEW_PERMISSION,
                                                POST_REVIEW_PERMISSION)
 from modulos.Authorization.roles import ADMIN
 from modulos.Categories.models import Category
-from modulos.Posts.buscador import buscador
+from modulos.paginacion import paginar_keyset
+from modulos.Posts import (etiquetas, exportacion, para_ti, portada,
+                           relacionados, tendencias)
+from modulos.Posts.buscador import resultados, sugerencias
 from modulos.Posts.disqus import get_disqus_stats
-from modulos.Posts.forms import ModalWithMsgForm, NewPostForm, SearchPostForm
+from modulos.Posts.forms import (DestacadoForm, ModalWithMsgForm, NewPostForm,
+                                 SearchPostForm)
 from modulos.Posts.models import (Destacado, Log, Post, RestorePost, Version,
-                                  get_highlighted_post, get_popular_posts,
-                                  new_creation_log, new_edition_log)
+                                  get_highlighted_post, new_creation_log,
+                                  new_edition_log)
 from modulos.utils import new_ctx
 
+# Tiempo de vida (en segundos) del home cacheado: muestra secciones que no se purgan
+# al cambiar (ej: las categorias populares)
+TIEMPO_CACHE_HOME = 60
 
+CLAVES_HOME = ["home", "categorias", "usuarios"]
+
+
+def _validadores_home(req):
+    # solo las paginas del home sin busqueda
+    if set(req.GET) <= {"cursor"}:
+        return paginas.validadores(CLAVES_HOME, TIEMPO_CACHE_HOME)
+    return None
+
+
+def _claves_post(id) -> list[str]:
+    return [f"post:{id}", "categorias", "usuarios"]
+
+
+def _validadores_post(request, id):
+    # una sola consulta por clave primaria, sin renderizar la pagina
+    post = (
+        Post.objects.filter(id=id)
+        .values("version", "publication_date", "expiration_date", "status", "active")
+        .first()
+    )
+    # solo los posts visibles para los visitantes anonimos
+    if (
+        post is None
+        or post["status"] != Post.PUBLISHED
+        or not post["active"]
+        or (post["expiration_date"] and post["expiration_date"] <= timezone.now())
+    ):
+        return None
+
+    return paginas.validadores(
+        _claves_post(id),
+        versiones=(post["version"],),
+        fechas=(post["publication_date"],),
+    )
+
+
+@paginas.condicional(_validadores_home)
 def home_view(req):
     """
     Vista de inicio 'home_view'.
@@ -47,65 +93,43 @@ def home_view(req):
     También maneja la búsqueda de posts a través del formulario.
     """
 
-    form = SearchPostForm(req.GET or None)
-
-    posts_populares = get_popular_posts()
-    post_destacado = get_highlighted_post()
+    # las paginas del home (sin busqueda) se cachean para los visitantes anonimos
+    if set(req.GET) <= {"cursor"}:
+        paginas.etiquetar(req, CLAVES_HOME, TIEMPO_CACHE_HOME)
 
-    categorias_populares = (
-        Category.objects.filter(post__status=Post.PUBLISHED, post__active=True)
-        .annotate(favorite_count=Count("post__favorites"))
-        .order_by("-favorite_count")[:3]
-    )
+    form = SearchPostForm(req.GET or None)
+    cursor = req.GET.get("cursor")
 
-    # Si hay búsqueda activa
+    # Si hay búsqueda activa (10 posts por página)
     if form.is_valid() and form.cleaned_data.get("input"):
         input_search = form.cleaned_data["input"]
-        posts_recientes = buscador.generate_query_set(input_search).execute()
+        posts_paginados = resultados.paginar(input_search, cursor, 10)
+    elif cursor:
+        # Paginación por cursor sobre (publication_date, id)
+        posts_paginados = paginar_keyset(
+            portada.posts_recientes(), cursor, portada.POSTS_POR_PAGINA
+        )
     else:
-        # Obtener los posts publicados más recientes
-        posts_recientes = Post.objects.filter(
-            Q(status=Post.PUBLISHED)
-            & Q(active=True)
-            & (Q(expiration_date__gt=timezone.now()) | Q(expiration_date__isnull=True))
-        ).order_by("-publication_date")
-
-    # Configuración de paginación (10 posts por página)
-    paginator = Paginator(posts_recientes, 10)
-
-    try:
-        page = int(req.GET.get("page", 1))
-    except ValueError:
-        page = 1
-
-    if page <= 0:
-        page = 1
-
-    # Obtener los posts de la página actual
-    posts_paginados = paginator.get_page(page)
+        # La primera página de los posts recientes es la misma para todas las visitas
+        posts_paginados = portada.RECIENTES.obtener()
 
     # Crear el contexto
     ctx = new_ctx(
         req,
         {
-            "post_destacado": post_destacado,
-            "categorias_populares": categorias_populares,
+            "post_destacado": get_highlighted_post(),
+            "categorias_populares": portada.CATEGORIAS_POPULARES.obtener(),
             "posts_recientes": posts_paginados,  # Los posts paginados o resultados de búsqueda
-            "posts_populares": posts_populares,
+            "posts_populares": portada.POPULARES.obtener(),
+            "nube_tags": portada.TAGS.obtener(),
             "form": form,  # Pasar el formulario de búsqueda
         },
     )
 
-    # Agregar los enlaces de página siguiente y anterior
-    if posts_paginados.has_next():
-        ctx.update({"next_page": posts_paginados.next_page_number()})
-
-    if posts_paginados.has_previous():
-        ctx.update({"previous_page": posts_paginados.previous_page_number()})
-
     return render(req, "pages/home.html", context=ctx)
 
 
+@paginas.condicional(_validadores_post)
 def view_post(request, id):
     """
     Vista de detalle de publicación 'PostDetailView'.
@@ -114,7 +138,11 @@ def view_post(request, id):
     Utiliza el modelo 'Post' para recuperar la instancia específica y renderiza el contenido
     utilizando la plantilla 'posts/post_detail.html'.
     """
+    # la pagina se cachea para los visitantes anonimos (solo si el post es visible)
+    paginas.etiquetar(request, _claves_post(id))
+
     post = get_object_or_404(Post, id=id)
+    paginas.vence(request, post.expiration_date)
     # Verificacion de permanencia de validez del post
     if (
         post.expiration_date
@@ -135,10 +163,12 @@ def view_post(request, id):
     user = request.user
     category = post.category
 
+    if post.status == Post.PUBLISHED and post.active:
+        tendencias.registrar_vista(post.id)
+
     # Si la categoría es gratis, mostrar el post completo sin restricción
     # Mostrar el detalle completo del post
-    tags = post.tags.split(",") if post.tags else []
-    tags = [tag.strip() for tag in tags]
+    tags = etiquetas.tags_de_post(post)
 
     # Verifica si el post es favorito del usuario actual
     es_favorito = (
@@ -152,6 +182,7 @@ def view_post(request, id):
             "tags": tags,
             "categories": Category.objects.all(),
             "es_favorito": es_favorito,
+            "relacionados": relacionados.obtener(post),
         },
     )
 
@@ -181,7 +212,7 @@ def manage_posts(request):
             POST_MANAGE_PERMISSION
         )  # pueden ver los posts de los demas.
         else Post.objects.filter(author=request.user, active=True)
-    )
+    ).tarjetas()
 
     ctx = new_ctx(
         request,
@@ -228,7 +259,7 @@ def manage_inactive_posts(request):
         Post.objects.filter(active=False)
         if can_delete
         else Post.objects.filter(author=request.user, active=False)
-    )
+    ).tarjetas()
 
     ctx = new_ctx(
         request,
@@ -532,6 +563,12 @@ def kanban_board(request):
 
     drafts = Post.objects.filter(status=Post.DRAFT, active=True, author=user)
 
+    # el tablero solo muestra el titulo y los datos de cada post
+    recently_published, pending_review, pending_publication, drafts = (
+        qs.tarjetas()
+        for qs in (recently_published, pending_review, pending_publication, drafts)
+    )
+
     # asignar publicacion directa a aquellas publicaciones cuya categoria es de tipo "libre"
     for post in drafts:
         if post.category.moderacion == Category.LIBRE:
@@ -743,14 +780,67 @@ def enhanced_search(request):
         return redirect("home")
 
     input = form.cleaned_data["input"]
-    results = buscador.generate_query_set(input).execute()
+    results = resultados.paginar(input, request.GET.get("cursor"), 20)
 
     ctx = new_ctx(
-        request, {"posts": results, "form": SearchPostForm(initial={"input": input})}
+        request,
+        {
+            "posts": results,
+            "input": input,
+            "form": SearchPostForm(initial={"input": input}),
+            "perm_export": any(request.user.has_perm(p) for p in EXPORT_PERMISSIONS),
+        },
     )
     return render(request, "pages/search_results.html", context=ctx)
 
 
+# Permisos que permiten exportar los resultados de una busqueda (basta con uno)
+EXPORT_PERMISSIONS = [
+    POST_REVIEW_PERMISSION,
+    POST_APPROVE_PERMISSION,
+    POST_PUBLISH_PERMISSION,
+]
+
+
+@login_required
+@permissions_required(EXPORT_PERMISSIONS)
+def export_search(request):
+    """
+    Exporta todos los resultados de una busqueda en formato CSV (por defecto) o JSONL
+    (`?formato=jsonl`). El archivo se genera a medida que se envia.
+
+    Args:
+        request (HttpRequest): Solicitud con la consulta del buscador en `input`.
+
+    Returns:
+        StreamingHttpResponse: El archivo exportado, o HttpResponseBadRequest si la
+        consulta o el formato son invalidos.
+    """
+    form = SearchPostForm(request.GET)
+    formato = request.GET.get("formato", exportacion.FORMATO_CSV)
+
+    if not form.is_valid() or formato not in exportacion.CONTENT_TYPES:
+        return HttpResponseBadRequest("Consulta o formato invalido.")
+
+    response = StreamingHttpResponse(
+        exportacion.filas(
+            form.cleaned_data["input"], formato, request.build_absolute_uri
+        ),
+        content_type=exportacion.CONTENT_TYPES[formato],
+    )
+    response["Content-Disposition"] = f'attachment; filename="busqueda.{formato}"'
+    return response
+
+
+def search_suggestions(request):
+    """
+    Retorna en formato JSON las sugerencias de autocompletado (titulos, tags,
+    categorias y autores) para el texto ingresado en el buscador.
+    """
+    prefijo = request.GET.get("q", "")[:120]
+    return JsonResponse(sugerencias.get_indice().sugerir(prefijo))
+
+
 @login_required
 def favorite_post(request, id):
     """
@@ -789,7 +879,9 @@ def favorite_list(request):
         HttpResponse: La respuesta HTTP con el contenido renderizado de la plantilla 'pages/posts_favorites_list.html'.
     """
     # Obtener los posts favoritos
-    posts_favorites = Post.objects.filter(favorites=request.user, active=True)
+    posts_favorites = Post.objects.filter(
+        favorites=request.user, active=True
+    ).tarjetas()
 
     # Paginación: 5 posts por página
     paginator = Paginator(posts_favorites, 5)  # 5 posts por página
@@ -811,14 +903,54 @@ def favorite_list(request):
     return render(request, "pages/posts_favorites_list.html", ctx)
 
 
+@login_required
+def para_ti_view(request):
+    """
+    Vista del feed "Para ti": posts publicados de las categorias y de los autores de
+    los posts favoritos del usuario, del mas reciente al mas antiguo.
+
+    El feed de cada usuario se precalcula al publicar los posts (ver
+    `modulos.Posts.para_ti`), por lo que cada pagina es una lectura por rango.
+
+    Args:
+        request (HttpRequest): El objeto de solicitud HTTP.
+
+    Returns:
+        HttpResponse: La respuesta HTTP con el contenido renderizado de la plantilla 'pages/para_ti.html'.
+    """
+    posts = para_ti.pagina(
+        request.user.id, request.GET.get("cursor"), para_ti.POSTS_POR_PAGINA
+    )
+
+    ctx = new_ctx(request, {"posts": posts})
+    return render(request, "pages/para_ti.html", ctx)
+
+
 @login_required
 @permission_required([POST_HIGHLIGHT_PERMISSION])
 def highlight_post(request, id):
+    """
+    Vista para destacar un post en el home.
+
+    Muestra un formulario con la fecha de comienzo (por defecto, en el momento) y la
+    fecha de fin (opcional) del destacado. Si la solicitud es un POST, se guarda el
+    destacado y se redirige al home.
+    """
     post = get_object_or_404(Post, pk=id)
-    Destacado(post=post).save()
 
-    # Redirigir al home después de destacar el post
-    return redirect("home")
+    if request.method == "POST":
+        form = DestacadoForm(request.POST, instance=Destacado(post=post))
+        if form.is_valid():
+            form.save()
+
+            # Redirigir al home después de destacar el post
+            return redirect("home")
+    else:
+        ahora = timezone.localtime().replace(second=0, microsecond=0)
+        form = DestacadoForm(initial={"date": ahora})
+
+    ctx = new_ctx(request, {"post": post, "form": form})
+    return render(request, "pages/highlight_post.html", ctx)
 
 
 # -----------------------
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:53
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def normalizar(texto):
+    # copia de `modulos.normalizacion.normalizar` al momento de la migracion
+    if not texto:
+        return ""
+
+    texto = unicodedata.normalize("NFKD", texto.strip().casefold())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def normalizar_usuarios(apps, schema_editor):
+    UserProfile = apps.get_model("UserProfile", "UserProfile")
+
+    usuarios = list(UserProfile.objects.only("id", "username"))
+    for usuario in usuarios:
+        # la normalizacion puede superar el largo de la columna
+        usuario.username_normalizado = normalizar(usuario.username)[:255]
+
+    UserProfile.objects.bulk_update(usuarios, ["username_normalizado"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("UserProfile", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="username_normalizado",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=255
+            ),
+        ),
+        migrations.RunPython(normalizar_usuarios, migrations.RunPython.noop),
+    ]
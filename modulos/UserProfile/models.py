@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from modulos.normalizacion import normalizar_columnas
+
 # Create your models here.
 
 
@@ -37,5 +39,19 @@ class UserProfile(AbstractUser):
     # estadisticas de admin
     c_audit_eliminados = models.IntegerField(default=0)
 
+    # nombre de usuario normalizado (sin acentos ni mayusculas) utilizado por el
+    # buscador
+    username_normalizado = models.CharField(
+        max_length=255, blank=True, editable=False, db_index=True
+    )
+
+    COLUMNAS_NORMALIZADAS = {"username": "username_normalizado"}
+
+    def save(self, *args, **kwargs):
+        kwargs["update_fields"] = normalizar_columnas(
+            self, self.COLUMNAS_NORMALIZADAS, kwargs.get("update_fields")
+        )
+        super().save(*args, **kwargs)
+
     def has_perm(self, perm: str, obj=None) -> bool:
         return super().has_perm("UserProfile." + perm, obj)
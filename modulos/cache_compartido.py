@@ -0,0 +1,71 @@
+"""
+Cache compartido entre procesos.
+
+Las invalidaciones de los valores cacheados (generaciones y versiones, ver
+`modulos.secciones` y `modulos.Posts.buscador.resultados`) y los bloqueos de los
+recalculos se guardan en el cache de Django, por lo que solo tienen efecto en todos
+los procesos (workers de gunicorn, comandos periodicos) si el cache es compartido:
+base de datos (configuracion por defecto, ver `project.envs.common`), Redis o
+memcached.
+
+`LocMemCache` guarda un cache distinto en cada proceso: solo es valido cuando un
+unico proceso atiende todas las solicitudes (servidor de desarrollo, tests), lo que
+se indica con `settings.CACHE_COMPARTIDO = True`.
+
+Los valores voluminosos y de corta vida (paginas completas, listas de resultados del
+buscador) se guardan en el cache "volatil" si esta configurado (ver `volatil`), para
+que al llenarse no desplacen a las versiones y generaciones del cache por defecto.
+"""
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+
+# Alias del cache de los valores voluminosos y de corta vida
+ALIAS_VOLATIL = "volatil"
+
+# Backends que guardan un cache distinto en cada proceso
+BACKENDS_LOCALES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def es_compartido() -> bool:
+    """
+    Indica si el cache por defecto es compartido por todos los procesos.
+    """
+    compartido = getattr(settings, "CACHE_COMPARTIDO", None)
+    if compartido is not None:
+        return compartido
+
+    return settings.CACHES["default"]["BACKEND"] not in BACKENDS_LOCALES
+
+
+def volatil():
+    """
+    Retorna el cache de los valores voluminosos y de corta vida, o el cache por
+    defecto si no se configuro uno aparte.
+    """
+    if ALIAS_VOLATIL in settings.CACHES:
+        return caches[ALIAS_VOLATIL]
+    return caches["default"]
+
+
+@checks.register(checks.Tags.caches)
+def verificar_cache(app_configs, **kwargs):
+    if es_compartido():
+        return []
+
+    return [
+        checks.Warning(
+            "El cache por defecto no es compartido entre procesos: las "
+            "invalidaciones de un proceso no afectan a los demas, y el cache de "
+            "paginas y las solicitudes condicionales se desactivan.",
+            hint=(
+                "Utilizar un cache compartido (ej: DatabaseCache) o definir "
+                "CACHE_COMPARTIDO = True si un unico proceso atiende las solicitudes."
+            ),
+            id="modulos.W001",
+        )
+    ]
@@ -0,0 +1,41 @@
+"""
+Columnas contadoras (desnormalizadas).
+
+Las columnas contadoras (ej: `Post.favorite_count`) se actualizan unicamente con
+expresiones `F()` desde la base de datos. Un `save` comun escribiria el valor leido
+al cargar la instancia, descartando los incrementos realizados desde entonces, por
+lo que los modelos las excluyen de sus guardados con `sin_contadores`.
+
+`sin_contadores` se llama antes que el resto de los calculos del `save` del modelo,
+de forma que el guardado de una instancia cargada con `only`/`defer` no cargue (ni
+escriba) las columnas diferidas.
+"""
+
+
+def sin_contadores(instancia, contadores: list[str], update_fields=None):
+    """
+    Retorna los `update_fields` del guardado de una instancia sin las columnas
+    contadoras. Se utiliza desde el metodo `save` de los modelos.
+
+    Las instancias nuevas se insertan completas (los contadores toman su valor
+    inicial), por lo que en ese caso `update_fields` no se modifica. Si no se indica
+    `update_fields` se guardan las columnas cargadas, como en `Model.save`: las
+    diferidas no se cargan.
+
+    Args:
+        instancia (Model): Instancia a guardar.
+        contadores (list): Nombres de las columnas contadoras.
+        update_fields (iterable): `update_fields` recibido por `save`.
+    """
+    if instancia._state.adding:
+        return update_fields
+
+    if update_fields is None:
+        diferidas = instancia.get_deferred_fields()
+        update_fields = [
+            f.name
+            for f in instancia._meta.concrete_fields
+            if not f.primary_key and f.attname not in diferidas
+        ]
+
+    return [f for f in update_fields if f not in contadores]
@@ -0,0 +1,79 @@
+"""
+Normalizacion de textos para las busquedas.
+
+Los textos se comparan sin distinguir mayusculas ni acentos ("Publicación" y
+"publicacion" son equivalentes). Para no normalizar en cada consulta, los modelos
+guardan una copia normalizada de las columnas sobre las que se busca (columnas
+"sombra", con el sufijo `_normalizado`) que se actualiza al guardar.
+
+Ejemplo:
+    >>> normalizar("  Programación ")
+    'programacion'
+"""
+
+import unicodedata
+
+from django.db import connection
+from django.db.models import Q
+
+# Caracter con el mayor code point, limite superior de los filtros por prefijo
+_MAXIMO = "\U0010ffff"
+
+
+def normalizar(texto: str | None) -> str:
+    """
+    Retorna el texto sin espacios al inicio ni al final, en minusculas (casefold) y
+    sin acentos ni diacriticos.
+    """
+    if not texto:
+        return ""
+
+    texto = unicodedata.normalize("NFKD", texto.strip().casefold())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def normalizar_columnas(instancia, columnas: dict[str, str], update_fields=None):
+    """
+    Actualiza las columnas normalizadas de una instancia a partir de sus columnas
+    originales, recortadas al `max_length` de la columna normalizada. Se utiliza
+    desde el metodo `save` de los modelos.
+
+    Args:
+        instancia (Model): Instancia a actualizar.
+        columnas (dict): Columna original -> columna normalizada.
+        update_fields (iterable): `update_fields` recibido por `save`.
+
+    Returns:
+        `update_fields` junto con las columnas normalizadas de las columnas
+        originales que contiene (None si no se indico).
+    """
+    for origen, destino in columnas.items():
+        # solo las columnas que se guardan (sin cargar las diferidas)
+        if update_fields is None or origen in update_fields:
+            valor = normalizar(getattr(instancia, origen))
+            # la normalizacion puede alargar el texto (ej: "ß" se convierte en "ss")
+            largo = instancia._meta.get_field(destino).max_length
+            setattr(instancia, destino, valor[:largo] if largo else valor)
+
+    if update_fields is None:
+        return None
+
+    update_fields = set(update_fields)
+    return update_fields | {d for o, d in columnas.items() if o in update_fields}
+
+
+def filtro_prefijo(columna: str, prefijo: str) -> Q:
+    """
+    Filtro de las filas cuya columna (normalizada) comienza con el prefijo.
+
+    En PostgreSQL `startswith` utiliza el indice `varchar_pattern_ops` que Django
+    crea para las columnas con `db_index`. En SQLite `LIKE` no distingue mayusculas,
+    por lo que no puede utilizar el indice; se agrega el rango equivalente, que si
+    lo utiliza.
+    """
+    filtro = Q(**{f"{columna}__startswith": prefijo})
+
+    if connection.vendor == "sqlite":
+        filtro &= Q(**{f"{columna}__gte": prefijo, f"{columna}__lt": prefijo + _MAXIMO})
+
+    return filtro
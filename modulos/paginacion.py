@@ -0,0 +1,196 @@
+"""
+Paginacion por cursor.
+
+A diferencia de `django.core.paginator.Paginator`, no se realiza un `COUNT(*)` ni se
+utiliza `OFFSET`: cada pagina se obtiene a partir de la ultima fila de la pagina
+anterior (keyset), por lo que el costo de una pagina no depende de su profundidad.
+
+Las paginas exponen cursores opacos (`next_cursor` y `previous_cursor`) que se
+envian a la vista en el parametro `cursor` del query string.
+
+Ejemplo:
+    >>> posts = paginar_keyset(Post.objects.filter(...), request.GET.get("cursor"), 10)
+    >>> posts.has_next(), posts.next_cursor
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.db.models import F, Q
+
+# Direccion de un cursor
+SIGUIENTE = "s"
+ANTERIOR = "a"
+
+
+def codificar_cursor(datos: dict) -> str:
+    """
+    Codifica los datos de un cursor en un string opaco, seguro para ser utilizado
+    dentro de una URL.
+    """
+    raw = json.dumps(datos, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str | None) -> dict | None:
+    """
+    Decodifica un cursor generado por `codificar_cursor`. Retorna None si el cursor
+    no existe o es invalido.
+    """
+    if not cursor:
+        return None
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        datos = json.loads(raw)
+    except (binascii.Error, ValueError):
+        return None
+
+    return datos if isinstance(datos, dict) else None
+
+
+class CursorPage:
+    """
+    Pagina de resultados de una paginacion por cursor.
+
+    Se comporta como una lista de objetos (soporta `len`, iteracion e indices) y
+    expone los cursores para las paginas siguiente y anterior.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None) -> None:
+        self.object_list = list(object_list)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __repr__(self) -> str:
+        return f"<CursorPage ({len(self)} objetos)>"
+
+
+def _cursor_de(obj, campo: str, direccion: str) -> str:
+    fecha = getattr(obj, campo)
+    return codificar_cursor(
+        {"d": direccion, "f": fecha.isoformat() if fecha else None, "id": obj.id}
+    )
+
+
+def paginar_keyset(qs, cursor: str | None, per_page: int, campo="publication_date"):
+    """
+    Pagina un queryset ordenado de forma descendente por (`campo`, id).
+
+    Los objetos con `campo` nulo se ubican al final. Se obtienen `per_page + 1` filas
+    para saber si existe una pagina mas en la direccion recorrida, sin contar el total.
+
+    Args:
+        qs (QuerySet): Queryset a paginar. Su orden es reemplazado.
+        cursor (str): Cursor recibido en la peticion (None para la primera pagina).
+        per_page (int): Cantidad de objetos por pagina.
+        campo (str): Campo de tipo fecha sobre el que se ordena.
+
+    Returns:
+        CursorPage: La pagina solicitada.
+    """
+    datos = decodificar_cursor(cursor)
+
+    try:
+        direccion = datos["d"]
+        fecha = datetime.fromisoformat(datos["f"]) if datos["f"] else None
+        id = int(datos["id"])
+    except (TypeError, KeyError, ValueError):
+        direccion = None
+
+    if direccion == ANTERIOR:
+        if fecha is None:
+            filtro = Q(**{f"{campo}__isnull": False}) | Q(
+                **{f"{campo}__isnull": True}, id__gt=id
+            )
+        else:
+            filtro = Q(**{f"{campo}__gt": fecha}) | Q(**{campo: fecha}, id__gt=id)
+
+        filas = list(
+            qs.filter(filtro).order_by(F(campo).asc(nulls_first=True), "id")[
+                : per_page + 1
+            ]
+        )
+        hay_mas = len(filas) > per_page
+        filas = filas[:per_page][::-1]
+
+        if filas:
+            return CursorPage(
+                filas,
+                next_cursor=_cursor_de(filas[-1], campo, SIGUIENTE),
+                previous_cursor=(
+                    _cursor_de(filas[0], campo, ANTERIOR) if hay_mas else None
+                ),
+            )
+
+        # no hay objetos anteriores al cursor: retornar la primera pagina
+        direccion = None
+
+    if direccion == SIGUIENTE:
+        if fecha is None:
+            filtro = Q(**{f"{campo}__isnull": True}, id__lt=id)
+        else:
+            filtro = (
+                Q(**{f"{campo}__lt": fecha})
+                | Q(**{campo: fecha}, id__lt=id)
+                | Q(**{f"{campo}__isnull": True})
+            )
+        qs = qs.filter(filtro)
+
+    filas = list(qs.order_by(F(campo).desc(nulls_last=True), "-id")[: per_page + 1])
+    hay_mas = len(filas) > per_page
+    filas = filas[:per_page]
+
+    if not filas:
+        return CursorPage([])
+
+    return CursorPage(
+        filas,
+        next_cursor=_cursor_de(filas[-1], campo, SIGUIENTE) if hay_mas else None,
+        previous_cursor=(
+            _cursor_de(filas[0], campo, ANTERIOR) if direccion == SIGUIENTE else None
+        ),
+    )
+
+
+def paginar_lista(objetos: list, cursor: str | None, per_page: int) -> CursorPage:
+    """
+    Pagina una lista que ya se encuentra en memoria (ej: ids de resultados guardados
+    en cache). El cursor contiene la posicion de inicio de la pagina.
+    """
+    datos = decodificar_cursor(cursor) or {}
+
+    try:
+        inicio = max(int(datos.get("o", 0)), 0)
+    except (TypeError, ValueError):
+        inicio = 0
+
+    fin = inicio + per_page
+
+    return CursorPage(
+        objetos[inicio:fin],
+        next_cursor=codificar_cursor({"o": fin}) if fin < len(objetos) else None,
+        previous_cursor=(
+            codificar_cursor({"o": max(inicio - per_page, 0)}) if inicio > 0 else None
+        ),
+    )
@@ -0,0 +1,382 @@
+"""
+Cache de paginas completas para los visitantes anonimos.
+
+Las vistas mas visitadas (home, detalle de un post, detalle de una categoria) marcan
+su respuesta como cacheable con `etiquetar`, indicando las claves sustitutas
+("surrogate keys") de los objetos que muestra la pagina (ej: "post:12",
+"categoria:3", "home"). `CachePaginasMiddleware` guarda esas respuestas en el cache
+de Django y las sirve a las siguientes visitas anonimas sin ejecutar la vista.
+
+`purgar` invalida todas las paginas etiquetadas con una clave (desde las senales de
+guardado de los modelos, ver `modulos.Posts.signals`). Cada clave tiene una version
+(ver `modulos.secciones.versiones`) y cada pagina guarda las versiones de sus claves
+al momento de generarse, por lo que solo se descartan las paginas afectadas.
+
+Solo se cachean las respuestas 200 a solicitudes GET de usuarios anonimos, que no
+modifican la sesion ni utilizan el token CSRF (el token es distinto para cada
+visitante) ni tienen mensajes pendientes.
+
+Las mismas paginas responden a las solicitudes condicionales (`If-None-Match`,
+`If-Modified-Since`) de los navegadores y CDN con `304 Not Modified`, sin consultar
+los datos ni renderizar la plantilla (ver `condicional` y `validadores`). El ETag se
+deriva de las versiones de las claves de la pagina.
+
+Las visitas servidas desde el cache o con una respuesta 304 no ejecutan la vista: la
+senal `pagina_servida` permite registrar sus efectos (ej: el contador de vistas de
+un post).
+
+Los aciertos y fallos del cache se acumulan en memoria en cada proceso y se suman a
+los contadores del cache compartido cada `INTERVALO_ESTADISTICAS` segundos (ver
+`estadisticas`), para no escribir en el cache en cada visita.
+
+Las versiones de las claves y los validadores se guardan en el cache de Django, y las
+paginas en el cache volatil (ver `modulos.cache_compartido.volatil`). Las purgas deben alcanzar a todos los procesos: si el cache no es
+compartido (ver `modulos.cache_compartido`) el middleware se desactiva y las vistas
+no responden solicitudes condicionales.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.dispatch import Signal
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+from modulos import secciones
+from modulos.cache_compartido import es_compartido, volatil
+
+# Tiempo de vida (en segundos) por defecto de las paginas cacheadas
+TIEMPO = getattr(settings, "PAGINAS_TIEMPO", 60 * 5)
+
+# Tiempo maximo (en segundos) que los aciertos y fallos se acumulan en memoria
+INTERVALO_ESTADISTICAS = getattr(settings, "PAGINAS_INTERVALO_ESTADISTICAS", 60)
+
+_CLAVE_ACIERTOS = "paginas:aciertos"
+_CLAVE_FALLOS = "paginas:fallos"
+
+# Enviada cuando una pagina se sirve sin ejecutar la vista (desde el cache o con una
+# respuesta 304), con el nombre de la url (`vista`) y sus argumentos (`kwargs`)
+pagina_servida = Signal()
+
+
+def _dependencia(clave: str) -> str:
+    return f"paginas:{clave}"
+
+
+def _clave_modificacion(clave: str) -> str:
+    return f"paginas:modificacion:{clave}"
+
+
+def _clave_pagina(request) -> str:
+    return f"paginas:url:{request.get_full_path()}"
+
+
+def etiquetar(request, claves: list[str], tiempo: int | None = None) -> None:
+    """
+    Marca la respuesta de la solicitud como cacheable para los visitantes anonimos.
+    Debe llamarse antes de consultar los datos de la pagina: si alguna clave se purga
+    mientras se genera la pagina, la pagina guardada queda invalidada.
+
+    Args:
+        request (HttpRequest): Solicitud de la vista.
+        claves (list[str]): Claves sustitutas de los objetos que muestra la pagina.
+        tiempo (int): Tiempo de vida (en segundos) de la pagina, por defecto `TIEMPO`.
+    """
+    if request.user.is_authenticated:
+        return
+
+    request.pagina_claves = list(claves)
+    request.pagina_version = secciones.versiones([_dependencia(c) for c in claves])
+    request.pagina_tiempo = TIEMPO if tiempo is None else tiempo
+
+
+def vence(request, fecha) -> None:
+    """
+    Limita el tiempo de vida de la pagina cacheada (ver `etiquetar`) hasta la fecha
+    indicada (ej: la expiracion de un post).
+    """
+    if getattr(request, "pagina_claves", None) is None or fecha is None:
+        return
+
+    segundos = int((fecha - timezone.now()).total_seconds())
+    request.pagina_tiempo = min(request.pagina_tiempo, segundos)
+    if request.pagina_tiempo <= 0:
+        request.pagina_claves = None
+
+
+def purgar(*claves: str) -> None:
+    """
+    Invalida las paginas cacheadas etiquetadas con alguna de las claves.
+    """
+    for clave in claves:
+        secciones.invalidar(_dependencia(clave))
+
+    # momento de la ultima modificacion, para el encabezado Last-Modified
+    ahora = time.time()
+    cache.set_many({_clave_modificacion(c): ahora for c in claves}, timeout=None)
+
+
+def validadores(
+    claves: list[str], tiempo: int | None = None, versiones=(), fechas=()
+) -> tuple[str, int]:
+    """
+    Calcula los validadores (ETag y Last-Modified) de una pagina etiquetada con las
+    claves indicadas (ver `etiquetar`), sin consultar la base de datos.
+
+    Los validadores cambian cuando se purga alguna de las claves y, como el cache de
+    la pagina, al menos cada `tiempo` segundos (las paginas muestran datos que no se
+    purgan al cambiar, ej: los posts populares).
+
+    Args:
+        claves (list[str]): Claves sustitutas de los objetos que muestra la pagina.
+        tiempo (int): Tiempo maximo (en segundos) de validez, por defecto `TIEMPO`.
+        versiones (tuple): Versiones adicionales del contenido (ej: la version del post).
+        fechas (tuple[datetime]): Fechas adicionales de modificacion del contenido (ej:
+            la fecha de publicacion del post).
+
+    Returns:
+        tuple: El ETag (debil) y la fecha de ultima modificacion (timestamp).
+    """
+    tiempo = TIEMPO if tiempo is None else tiempo
+    ahora = time.time()
+    periodo = int(ahora // tiempo)
+
+    version = secciones.versiones([_dependencia(c) for c in claves])
+    etag = hashlib.md5(repr((version, periodo, tuple(versiones))).encode()).hexdigest()
+
+    claves_modificacion = [_clave_modificacion(c) for c in claves]
+    modificaciones = cache.get_many(claves_modificacion)
+    for clave in claves_modificacion:
+        if clave not in modificaciones:
+            # sin registro de la ultima purga (cache vacio o expulsada)
+            cache.add(clave, ahora, timeout=None)
+            modificaciones[clave] = cache.get(clave, ahora)
+
+    ultima = max(
+        periodo * tiempo,
+        *modificaciones.values(),
+        *(fecha.timestamp() for fecha in fechas if fecha is not None),
+    )
+    return f'W/"{etag}"', math.ceil(ultima)
+
+
+def condicional(validar):
+    """
+    Decorador de vistas que responde `304 Not Modified` a las solicitudes
+    condicionales de los visitantes anonimos cuyos validadores no cambiaron, sin
+    ejecutar la vista, y agrega los encabezados ETag y Last-Modified a la respuesta.
+
+    Args:
+        validar (callable): Funcion que recibe los argumentos de la vista y retorna
+            los validadores de la pagina (ver `validadores`), o None si la pagina no
+            puede validarse (ej: un post no publicado).
+
+    Ejemplo:
+        @condicional(lambda request, id: validadores([f"post:{id}"]))
+        def view_post(request, id):
+            ...
+    """
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            resultado = (
+                validar(request, *args, **kwargs)
+                if _cacheable(request) and es_compartido()
+                else None
+            )
+            if resultado is None:
+                return view_func(request, *args, **kwargs)
+
+            etag, ultima = resultado
+            response = get_conditional_response(request, etag, ultima)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+            elif response.status_code == 304:
+                _servida(view_func, request)
+
+            if response.status_code in (200, 304):
+                response.headers.setdefault("ETag", etag)
+                response.headers.setdefault("Last-Modified", http_date(ultima))
+            return response
+
+        return _wrapped_view
+
+    return decorator
+
+
+def _servida(sender, request) -> None:
+    match = request.resolver_match
+    pagina_servida.send(
+        sender=sender,
+        request=request,
+        vista=match.url_name if match else None,
+        kwargs=match.kwargs if match else {},
+    )
+
+
+class _Contadores:
+    """
+    Aciertos y fallos acumulados en memoria por el proceso: clave -> cantidad.
+    """
+
+    def __init__(self) -> None:
+        self.cantidades = Counter()
+        self.vaciado = time.monotonic()
+        self._lock = threading.Lock()
+
+    def sumar(self, clave: str) -> bool:
+        """
+        Suma uno a un contador. Retorna True si se deben escribir los pendientes.
+        """
+        with self._lock:
+            self.cantidades[clave] += 1
+            return time.monotonic() - self.vaciado >= INTERVALO_ESTADISTICAS
+
+    def tomar(self) -> Counter:
+        """
+        Retorna las cantidades pendientes y las quita del acumulador.
+        """
+        with self._lock:
+            cantidades, self.cantidades = self.cantidades, Counter()
+            self.vaciado = time.monotonic()
+            return cantidades
+
+
+_pendientes = _Contadores()
+
+
+def _contar(clave: str) -> None:
+    if _pendientes.sumar(clave):
+        vaciar_estadisticas()
+
+
+def vaciar_estadisticas() -> None:
+    """
+    Suma a los contadores del cache los aciertos y fallos acumulados por el proceso.
+    """
+    for clave, cantidad in _pendientes.tomar().items():
+        cache.add(clave, 0, timeout=None)
+        try:
+            cache.incr(clave, cantidad)
+        except ValueError:
+            pass
+
+
+def estadisticas() -> dict:
+    """
+    Retorna la cantidad de aciertos y fallos del cache de paginas, y la tasa de
+    aciertos (incluidos los acumulados por el proceso actual).
+    """
+    vaciar_estadisticas()
+    aciertos = cache.get(_CLAVE_ACIERTOS, 0)
+    fallos = cache.get(_CLAVE_FALLOS, 0)
+    total = aciertos + fallos
+    return {
+        "aciertos": aciertos,
+        "fallos": fallos,
+        "tasa": aciertos / total if total else 0.0,
+    }
+
+
+def reiniciar_estadisticas() -> None:
+    _pendientes.tomar()
+    cache.delete_many([_CLAVE_ACIERTOS, _CLAVE_FALLOS])
+
+
+def _cacheable(request) -> bool:
+    return (
+        request.method in ("GET", "HEAD")
+        # los mensajes pendientes se muestran una sola vez
+        and "messages" not in request.COOKIES
+        and not request.user.is_authenticated
+    )
+
+
+def _guardable(request, response) -> bool:
+    return (
+        request.method == "GET"
+        and getattr(request, "pagina_claves", None) is not None
+        and response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        # el token CSRF es distinto para cada visitante
+        and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+        and not request.META.get("CSRF_COOKIE_USED")
+        and not getattr(getattr(request, "session", None), "modified", False)
+    )
+
+
+class CachePaginasMiddleware:
+    """
+    Sirve y guarda las paginas cacheadas (ver `etiquetar`). Debe ubicarse luego de
+    `AuthenticationMiddleware`, al final de la lista, para que las respuestas
+    servidas desde el cache pasen por los demas middlewares.
+
+    Se desactiva si el cache no es compartido por todos los procesos.
+    """
+
+    def __init__(self, get_response):
+        if not es_compartido():
+            raise MiddlewareNotUsed(
+                "El cache de paginas requiere un cache compartido entre procesos."
+            )
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not _cacheable(request):
+            return self.get_response(request)
+
+        clave = _clave_pagina(request)
+        entrada = volatil().get(clave)
+        if entrada is not None:
+            claves, version, contenido, cabeceras, vista, kwargs = entrada
+            if secciones.versiones([_dependencia(c) for c in claves]) == version:
+                _contar(_CLAVE_ACIERTOS)
+                pagina_servida.send(
+                    sender=self.__class__, request=request, vista=vista, kwargs=kwargs
+                )
+                response = HttpResponse(contenido, headers=cabeceras)
+                response["X-Cache"] = "HIT"
+                return get_conditional_response(
+                    request,
+                    response.get("ETag"),
+                    parse_http_date_safe(response.get("Last-Modified", "")),
+                    response,
+                )
+
+        response = self.get_response(request)
+        if not _guardable(request, response):
+            return response
+
+        claves, version = request.pagina_claves, request.pagina_version
+        vista = request.resolver_match.url_name if request.resolver_match else None
+        kwargs = request.resolver_match.kwargs if request.resolver_match else {}
+        volatil().set(
+            clave,
+            (
+                claves,
+                version,
+                response.content,
+                {
+                    cabecera: response[cabecera]
+                    for cabecera in ("Content-Type", "ETag", "Last-Modified")
+                    if response.has_header(cabecera)
+                },
+                vista,
+                kwargs,
+            ),
+            request.pagina_tiempo,
+        )
+        _contar(_CLAVE_FALLOS)
+        response["X-Cache"] = "MISS"
+        return response
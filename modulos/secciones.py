@@ -0,0 +1,152 @@
+"""
+Cache de secciones (fragmentos) de las paginas.
+
+Una seccion es un valor costoso de calcular que se muestra en varias paginas o en
+cada visita (ej: los posts populares del home). Su valor se guarda en el cache de
+Django durante el tiempo de vida de la seccion, y se invalida de forma explicita
+cuando cambian los modelos de los que depende (ver `invalidar`).
+
+Las versiones de las dependencias y los bloqueos se guardan en el cache, por lo que
+requieren un cache compartido por todos los procesos (ver `modulos.cache_compartido`).
+Invalidar una dependencia escribe una version nueva y unica (una sola escritura): no
+se utiliza `cache.incr`, que en `DatabaseCache` lee y escribe el valor por separado y
+puede perder una invalidacion concurrente.
+
+Para que muchas visitas simultaneas no recalculen la misma seccion (por ejemplo,
+con el cache vacio luego de un deploy) solo el proceso que obtiene el bloqueo de la
+seccion (`cache.add`, atomico tambien en `DatabaseCache`) la recalcula:
+    - Si existe un valor vencido o invalidado, los demas lo siguen utilizando
+      mientras tanto.
+    - Si no existe ningun valor, los demas esperan (como maximo `ESPERA_MAXIMA`
+      segundos) a que el valor este disponible.
+
+Ejemplo:
+    >>> POPULARES = Seccion("populares", 60 * 5, calcular_populares, ["posts"])
+    >>> POPULARES.obtener()
+    >>> invalidar("posts")  # desde las senales de guardado
+"""
+
+import time
+import uuid
+
+from django.core.cache import cache
+
+# Tiempo (en segundos) que se conserva un valor vencido para ser utilizado mientras
+# se recalcula
+GRACIA = 60 * 60
+
+# Tiempo maximo (en segundos) del bloqueo de un recalculo
+TIEMPO_BLOQUEO = 30
+
+# Espera de las visitas sin valor mientras otro proceso recalcula la seccion
+ESPERA_MAXIMA = 2
+INTERVALO_ESPERA = 0.05
+
+
+def _clave_dependencia(dependencia: str) -> str:
+    return f"secciones:dependencias:{dependencia}"
+
+
+def _nueva_version() -> str:
+    # unica: no coincide con ninguna version anterior, aunque la version de la
+    # dependencia haya sido expulsada del cache
+    return uuid.uuid4().hex
+
+
+def versiones(dependencias: list[str], guardadas: dict | None = None) -> tuple:
+    """
+    Retorna la version actual de cada dependencia. Un valor calculado con estas
+    versiones es valido mientras no se invalide ninguna de las dependencias.
+
+    Args:
+        dependencias (list[str]): Nombres de las dependencias.
+        guardadas (dict): Versiones ya leidas del cache (clave -> version), para no
+            volver a leerlas.
+    """
+    claves = [_clave_dependencia(d) for d in dependencias]
+    if guardadas is None:
+        guardadas = cache.get_many(claves)
+
+    resultado = []
+    for clave in claves:
+        if clave not in guardadas:
+            cache.add(clave, _nueva_version(), timeout=None)
+            guardadas[clave] = cache.get(clave)
+        resultado.append(guardadas[clave])
+    return tuple(resultado)
+
+
+class Seccion:
+    """
+    Seccion cacheada.
+
+    Args:
+        nombre (str): Identificador unico de la seccion.
+        tiempo (int): Tiempo de vida (en segundos) del valor.
+        calcular (callable): Funcion sin argumentos que calcula el valor. Debe
+            retornar un valor que pueda guardarse en el cache (ej: una lista, no un
+            queryset sin evaluar).
+        dependencias (list[str]): Nombres de las dependencias que invalidan la
+            seccion (ver `invalidar`).
+    """
+
+    def __init__(self, nombre: str, tiempo: int, calcular, dependencias) -> None:
+        self.nombre = nombre
+        self.tiempo = tiempo
+        self.calcular = calcular
+
+        self.dependencias = list(dependencias)
+
+        self.clave = f"secciones:{nombre}"
+        self.clave_bloqueo = f"secciones:{nombre}:bloqueo"
+        self.claves_dependencias = [_clave_dependencia(d) for d in dependencias]
+
+    def _recalcular(self, generacion: tuple):
+        try:
+            valor = self.calcular()
+            # la generacion se leyo antes de calcular: si la seccion se invalida
+            # durante el calculo, el valor guardado ya queda invalidado
+            cache.set(
+                self.clave,
+                (generacion, time.time() + self.tiempo, valor),
+                self.tiempo + GRACIA,
+            )
+            return valor
+        finally:
+            cache.delete(self.clave_bloqueo)
+
+    def obtener(self):
+        """
+        Retorna el valor de la seccion, recalculandolo si es necesario.
+        """
+        guardados = cache.get_many([self.clave, *self.claves_dependencias])
+        entrada = guardados.pop(self.clave, None)
+        generacion = versiones(self.dependencias, guardados)
+
+        if entrada is not None:
+            generacion_valor, vence, valor = entrada
+            if generacion_valor == generacion and vence > time.time():
+                return valor
+
+        if cache.add(self.clave_bloqueo, 1, TIEMPO_BLOQUEO):
+            return self._recalcular(generacion)
+
+        # otro proceso esta recalculando la seccion
+        if entrada is not None:
+            return entrada[2]
+
+        for _ in range(int(ESPERA_MAXIMA / INTERVALO_ESPERA)):
+            time.sleep(INTERVALO_ESPERA)
+            entrada = cache.get(self.clave)
+            if entrada is not None and entrada[0] == generacion:
+                return entrada[2]
+
+        return self.calcular()
+
+
+def invalidar(dependencia: str) -> None:
+    """
+    Invalida todas las secciones que dependen de la dependencia indicada. Sus
+    valores anteriores se siguen utilizando mientras se recalculan.
+    """
+    cache.set(_clave_dependencia(dependencia), _nueva_version(), timeout=None)
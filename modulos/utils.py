@@ -5,6 +5,12 @@ from modulos.Authorization.permissions import (KANBAN_VIEW_PERMISSION,
                                                VIEW_PURCHASED_CATEGORIES)
 from modulos.Categories.models import Category
 from modulos.Posts.forms import SearchPostForm
+from modulos.secciones import Seccion
+
+# Categorias del menu, incluidas en todas las paginas (ver `new_ctx`)
+CATEGORIAS = Seccion(
+    "categorias", 60 * 10, lambda: list(Category.objects.all()), ["categorias"]
+)
 
 
 def new_ctx(req, params):
@@ -58,7 +64,7 @@ def new_ctx(req, params):
                 sitios.append("reports")
 
     base = {
-        "categories": Category.objects.all(),
+        "categories": CATEGORIAS.obtener(),
         "permisos": sitios,
         "post_search_input": SearchPostForm,
         "has_kanban_access": kanban_permission,
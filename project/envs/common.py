@@ -54,6 +54,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "modulos.paginas.CachePaginasMiddleware",
 ]
 
 ROOT_URLCONF = "project.urls"
@@ -87,6 +88,28 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Compartido por todos los workers (ver `modulos.cache_compartido`). Las tablas se
+# crean con `python manage.py createcachetable`.
+# Al superar `MAX_ENTRIES`, `DatabaseCache` elimina 1/`CULL_FREQUENCY` de las
+# entradas sin importar su tiempo de vida: las paginas y las listas de resultados
+# (una por url o por consulta) se guardan en un cache aparte ("volatil"), para que no
+# desplacen a las versiones y generaciones de las invalidaciones del cache por
+# defecto.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "cache_makex",
+        "OPTIONS": {"MAX_ENTRIES": 50000, "CULL_FREQUENCY": 10},
+    },
+    "volatil": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "cache_makex_volatil",
+        "OPTIONS": {"MAX_ENTRIES": 5000, "CULL_FREQUENCY": 4},
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
@@ -1,2 +1,11 @@
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
+
+# El servidor de desarrollo (y los tests) atiende todas las solicitudes en un solo
+# proceso: el cache en memoria es compartido
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+CACHE_COMPARTIDO = True